@@ -0,0 +1,28 @@
+"""
+Script to recompute the per-question item statistics (see utils/item_analysis.py):
+p-value, point-biserial discrimination and distractor distribution.
+Admins can also start a run from POST /api/admin/item-stats/refresh.
+
+Usage:
+    python analyze_items.py
+    python analyze_items.py --link-tests   # First backfill test_result_id on older attempts
+
+Example crontab entry (nightly at 03:00):
+    0 3 * * * cd /path/to/backend && python analyze_items.py
+"""
+import sys
+from app import app
+from database import db
+from utils.item_analysis import compute_item_stats, link_attempts_to_tests
+
+if __name__ == "__main__":
+    with app.app_context():
+        db.create_all()  # Make sure the stats table exists
+        if "--link-tests" in sys.argv[1:]:
+            print("🔗 Linking older attempts to their tests...")
+            linked, unlinked = link_attempts_to_tests()
+            print(f"   ✅ {linked} linked, {unlinked} without a matching test")
+        print("🔄 Analysing question attempts...")
+        count = compute_item_stats()
+        print(f"   ✅ {count} questions analysed")
+    print("🏁 Done.")
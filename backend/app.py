@@ -1,3 +1,4 @@
+import os
 from flask import Flask, jsonify
 from flask_cors import CORS
 from sqlalchemy import text
@@ -10,6 +11,9 @@ from routes.discussion import discussion_bp
 from routes.suggestions import suggestions_bp
 from routes.admin import admin_bp
 from routes.groups import groups_bp
+from utils.attempt_queue import attempt_queue
+from utils.goal_lifecycle import goal_sweeper
+from utils.question_import import import_runner
 
 
 app = Flask(__name__)
@@ -21,9 +25,30 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # Security Key for the Tokens (In production, this should be hidden in .env file)
 app.config['JWT_SECRET_KEY'] = 'super-secret-key-123'
+
+# Write-behind attempt ingestion (exam days): submit-test returns after saving the
+# TestResult, and a background thread writes the attempts in batches
+app.config['ATTEMPT_WRITE_BEHIND'] = False
+app.config['ATTEMPT_QUEUE_MAXSIZE'] = 2000      # Queued submissions before backpressure
+app.config['ATTEMPT_FLUSH_BATCH_SIZE'] = 500    # Attempts per flush transaction
+app.config['ATTEMPT_FLUSH_INTERVAL'] = 1.0      # Max seconds an attempt waits in the queue
+
+# Close group goals past their end_date: `python sweep_goals.py` from cron by default.
+# Opt exactly one process in (GOAL_SWEEP_ENABLED=1) to sweep from a background thread
+# instead - every web worker would otherwise start its own sweeper.
+app.config['GOAL_SWEEP_ENABLED'] = os.environ.get('GOAL_SWEEP_ENABLED') == '1'
+app.config['GOAL_SWEEP_INTERVAL'] = 300         # Seconds between sweeps
+
+# Background CSV question imports
+app.config['IMPORT_CHUNK_SIZE'] = 500           # Questions per insert transaction
+app.config['IMPORT_MAX_ERRORS'] = 100           # Row errors kept on the job
+
 # --- Init Extensions ---
 db.init_app(app)
 jwt = JWTManager(app) # Initialize JWT
+attempt_queue.init_app(app)
+goal_sweeper.init_app(app)
+import_runner.init_app(app)
 
 # --- Register Blueprints ---
 # This tells Flask: "Any request starting with /api/auth goes to auth_bp"
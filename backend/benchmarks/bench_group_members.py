@@ -0,0 +1,112 @@
+"""
+Benchmark: member statistics for group details / group leaderboard,
+per-member queries vs one grouped query over the activity rollup.
+
+Usage (from backend/):
+    python -m benchmarks.bench_group_members
+"""
+import random
+from datetime import datetime, timedelta
+from database import db
+from models import Group, GroupMember, QuestionAttempt, TestResult, User
+from utils.leaderboard import group_member_stats
+from utils.projections import rebuild_daily_activity
+from benchmarks.common import make_app, seed_bank, seed_users, timed, QueryCounter
+
+GROUP_SIZES = [10, 100, 1000]
+
+
+def legacy_details(group):
+    """The previous get_group_details: two queries per member."""
+    members = []
+    for m in group.members:
+        member_user = m.user
+        test_count = TestResult.query.filter_by(user_id=member_user.id).count()
+        avg_score = db.session.query(
+            db.func.avg(TestResult.score)
+        ).filter(TestResult.user_id == member_user.id).scalar()
+        members.append((member_user.id, test_count, avg_score))
+    return members
+
+
+def legacy_leaderboard(group, date_filter):
+    """The previous get_group_leaderboard: four queries per member."""
+    results = []
+    for member_id in [m.user_id for m in group.members]:
+        member_user = User.query.get(member_id)
+        correct_count = QuestionAttempt.query.filter(
+            QuestionAttempt.user_id == member_id,
+            QuestionAttempt.is_correct == True,
+            QuestionAttempt.created_at >= date_filter
+        ).count()
+        test_q = TestResult.query.filter(TestResult.user_id == member_id, TestResult.date_taken >= date_filter)
+        tests_taken = test_q.count()
+        avg_score = test_q.with_entities(db.func.avg(TestResult.score)).scalar()
+        results.append((member_user.display_name, correct_count, tests_taken, avg_score))
+    return results
+
+
+def seed_group(members, question_ids):
+    user_ids = seed_users(members, prefix=f"m{members}u")
+    now = datetime.utcnow()
+
+    group = Group(name=f"Station {members}", invite_code=f"S{members:05d}", created_by=user_ids[0])
+    db.session.add(group)
+    db.session.flush()
+    db.session.execute(GroupMember.__table__.insert(), [
+        {'group_id': group.id, 'user_id': uid, 'role': 'member', 'joined_at': now} for uid in user_ids
+    ])
+
+    db.session.execute(TestResult.__table__.insert(), [{
+        'user_id': uid,
+        'protocol_id': None,
+        'score': random.randint(40, 100),
+        'date_taken': now - timedelta(days=random.randint(0, 40))
+    } for uid in user_ids for _ in range(5)])
+    db.session.execute(QuestionAttempt.__table__.insert(), [{
+        'user_id': uid,
+        'question_id': random.choice(question_ids),
+        'is_correct': random.random() < 0.6,
+        'user_answer': 'a',
+        'created_at': now - timedelta(days=random.randint(0, 40))
+    } for uid in user_ids for _ in range(20)])
+    db.session.commit()
+    rebuild_daily_activity()
+    return group
+
+
+def main():
+    print(f"{'members':>7} | {'endpoint':<11} | {'legacy sql':>10} | {'legacy ms':>9} | {'grouped sql':>11} | {'grouped ms':>10}")
+    print("-" * 74)
+    for members in GROUP_SIZES:
+        app = make_app()
+        with app.app_context():
+            question_ids = seed_bank(num_protocols=5, questions_per_protocol=50)
+            group = seed_group(members, question_ids)
+
+            date_filter = datetime.utcnow() - timedelta(days=7)
+            first_day = date_filter.date()
+
+            cases = [
+                ('details', lambda: legacy_details(group), lambda: group_member_stats(group.id)),
+                ('leaderboard', lambda: legacy_leaderboard(group, date_filter),
+                 lambda: group_member_stats(group.id, first_day))
+            ]
+            for name, legacy, grouped in cases:
+                db.session.expire_all()
+                with QueryCounter() as legacy_queries:
+                    legacy()
+                with QueryCounter() as grouped_queries:
+                    grouped()
+
+                legacy_ms, _ = timed(legacy, repeat=3)
+                grouped_ms, _ = timed(grouped, repeat=10)
+
+                print(f"{members:>7} | {name:<11} | {legacy_queries.count:>10} | {legacy_ms:>9.1f} "
+                      f"| {grouped_queries.count:>11} | {grouped_ms:>10.1f}")
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: groups competition leaderboard, per-group loops vs grouped query.
+
+Shows that the number of SQL statements stays constant as groups and
+members grow, while the previous implementation grew with both.
+
+Usage (from backend/):
+    python -m benchmarks.bench_groups_leaderboard
+"""
+import random
+from datetime import datetime, timedelta
+from database import db
+from models import Group, GroupMember, QuestionAttempt, User
+from utils.leaderboard import group_standings
+from utils.projections import rebuild_daily_activity
+from benchmarks.common import make_app, seed_bank, seed_users, timed, QueryCounter
+
+SCENARIOS = [(10, 10), (50, 20), (200, 20)]  # (groups, members per group)
+
+
+def legacy_standings(date_filter):
+    """The previous implementation: queries per group and per member."""
+    results = []
+    for group in Group.query.all():
+        member_ids = [m.user_id for m in GroupMember.query.filter_by(group_id=group.id).all()]
+        if not member_ids:
+            continue
+
+        correct_query = QuestionAttempt.query.filter(
+            QuestionAttempt.user_id.in_(member_ids),
+            QuestionAttempt.is_correct == True,
+            QuestionAttempt.created_at >= date_filter
+        )
+        total_correct = correct_query.count()
+
+        top_contributor = None
+        top_count = 0
+        for member_id in member_ids:
+            count = QuestionAttempt.query.filter(
+                QuestionAttempt.user_id == member_id,
+                QuestionAttempt.is_correct == True,
+                QuestionAttempt.created_at >= date_filter
+            ).count()
+            if count > top_count:
+                top_count = count
+                member = User.query.get(member_id)
+                top_contributor = member.display_name if member else "Unknown"
+
+        results.append((group.id, total_correct, top_contributor))
+    return results
+
+
+def seed_groups(num_groups, members_per_group, question_ids):
+    user_ids = seed_users(num_groups * members_per_group, prefix=f"g{num_groups}m")
+    now = datetime.utcnow()
+
+    for g in range(num_groups):
+        group = Group(name=f"Group {g}", invite_code=f"{num_groups:03d}{g:05d}", created_by=user_ids[0])
+        db.session.add(group)
+        db.session.flush()
+        members = user_ids[g * members_per_group:(g + 1) * members_per_group]
+        db.session.execute(GroupMember.__table__.insert(), [
+            {'group_id': group.id, 'user_id': uid, 'role': 'member', 'joined_at': now} for uid in members
+        ])
+
+    db.session.execute(QuestionAttempt.__table__.insert(), [{
+        'user_id': uid,
+        'question_id': random.choice(question_ids),
+        'is_correct': random.random() < 0.6,
+        'user_answer': 'a',
+        'created_at': now - timedelta(days=random.randint(0, 6))
+    } for uid in user_ids for _ in range(20)])
+    db.session.commit()
+    rebuild_daily_activity()
+
+
+def main():
+    print(f"{'groups':>6} x {'members':<7} | {'legacy sql':>10} | {'legacy ms':>9} | {'grouped sql':>11} | {'grouped ms':>10}")
+    print("-" * 68)
+    for num_groups, members_per_group in SCENARIOS:
+        app = make_app()
+        with app.app_context():
+            question_ids = seed_bank(num_protocols=5, questions_per_protocol=50)
+            seed_groups(num_groups, members_per_group, question_ids)
+
+            date_filter = datetime.utcnow() - timedelta(days=7)
+            first_day = date_filter.date()
+
+            with QueryCounter() as legacy_queries:
+                legacy_standings(date_filter)
+            with QueryCounter() as grouped_queries:
+                group_standings(first_day)
+
+            legacy_ms, _ = timed(lambda: legacy_standings(date_filter), repeat=1)
+            grouped_ms, _ = timed(lambda: group_standings(first_day), repeat=10)
+
+            print(f"{num_groups:>6} x {members_per_group:<7} | {legacy_queries.count:>10} | {legacy_ms:>9.1f} "
+                  f"| {grouped_queries.count:>11} | {grouped_ms:>10.1f}")
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
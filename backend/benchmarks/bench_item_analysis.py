@@ -0,0 +1,74 @@
+"""
+Benchmark: item analysis over the attempt history, per-question ORM loops
+vs the chunked NumPy pass in utils/item_analysis.py.
+
+Usage (from backend/):
+    python -m benchmarks.bench_item_analysis
+"""
+import random
+import time
+from datetime import datetime, timedelta
+from database import db
+from models import QuestionAttempt, TestResult
+from utils.item_analysis import compute_item_stats
+from benchmarks.common import make_app, seed_bank, seed_users, QueryCounter
+
+ATTEMPT_COUNTS = [100000, 1000000]
+QUESTIONS_PER_TEST = 20
+
+
+def seed_history(total_attempts, question_ids, user_ids):
+    now = datetime.utcnow()
+    tests, attempts = [], []
+    for i in range(total_attempts // QUESTIONS_PER_TEST):
+        user_id = random.choice(user_ids)
+        taken_at = now - timedelta(seconds=i)
+        answers = [(qid, random.random() < 0.6) for qid in random.sample(question_ids, QUESTIONS_PER_TEST)]
+        test_id = i + 1
+        tests.append({'id': test_id, 'user_id': user_id, 'protocol_id': None, 'date_taken': taken_at,
+                      'score': 100 * sum(c for _, c in answers) // QUESTIONS_PER_TEST})
+        attempts.extend({'user_id': user_id, 'question_id': qid, 'is_correct': correct,
+                         'user_answer': 'a' if correct else random.choice('bcd'), 'created_at': taken_at,
+                         'test_result_id': test_id}
+                        for qid, correct in answers)
+        if len(attempts) >= 100000:
+            db.session.execute(QuestionAttempt.__table__.insert(), attempts)
+            attempts = []
+    if attempts:
+        db.session.execute(QuestionAttempt.__table__.insert(), attempts)
+    db.session.execute(TestResult.__table__.insert(), tests)
+    db.session.commit()
+
+
+def legacy_p_values(question_ids):
+    """What an ORM loop would do: load each question's attempts as objects."""
+    for qid in question_ids:
+        attempts = QuestionAttempt.query.filter_by(question_id=qid).all()
+        sum(a.is_correct for a in attempts) / max(len(attempts), 1)
+
+
+def main():
+    print(f"{'attempts':>9} | {'ORM loop ms (50 q)':>18} | {'est. ORM s (all)':>16} | {'numpy s':>7} | {'numpy sql':>9} | {'questions':>9}")
+    print("-" * 86)
+    for total in ATTEMPT_COUNTS:
+        random.seed(total)
+        app = make_app()
+        with app.app_context():
+            question_ids = seed_bank(num_protocols=20, questions_per_protocol=100)
+            seed_history(total, question_ids, seed_users(500))
+
+            start = time.perf_counter()
+            legacy_p_values(question_ids[:50])
+            legacy_ms = (time.perf_counter() - start) * 1000
+
+            with QueryCounter() as qc:
+                start = time.perf_counter()
+                count = compute_item_stats()
+                numpy_s = time.perf_counter() - start
+
+            estimated_s = legacy_ms / 50 * len(question_ids) / 1000
+            print(f"{total:>9} | {legacy_ms:>18.0f} | {estimated_s:>16.1f} | {numpy_s:>7.1f} | {qc.count:>9} | {count:>9}")
+
+
+if __name__ == '__main__':
+    main()
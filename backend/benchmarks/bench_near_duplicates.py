@@ -0,0 +1,93 @@
+"""
+Benchmark: near-duplicate lookups against a large question bank,
+a linear Jaccard scan vs the MinHash / LSH bucket index.
+
+Usage (from backend/):
+    python -m benchmarks.bench_near_duplicates
+"""
+import random
+import time
+from database import db
+from models import Protocol, Question
+from utils.similarity import (
+    find_near_duplicates, fingerprint, jaccard, question_shingles, rebuild_similarity_index, DUPLICATE_THRESHOLD
+)
+from benchmarks.common import make_app, timed, QueryCounter
+
+BANK_SIZES = [5000, 50000]
+WORDS = [
+    "מטופל", "מבוגר", "ילד", "דום", "לב", "החייאה", "עיסויים", "הנשמה", "קצב", "מינון", "אדרנלין",
+    "אמיודרון", "דפיברילציה", "שוק", "חשמלי", "נתיב", "אוויר", "סטורציה", "לחץ", "דם", "דופק",
+    "טיפול", "ראשוני", "בזירה", "פינוי", "מהו", "כמה", "מתי", "יש", "לתת", "במקרה", "של", "עם"
+]
+
+
+def random_question():
+    text = " ".join(random.choices(WORDS, k=random.randint(8, 16))) + "?"
+    options = [" ".join(random.choices(WORDS, k=random.randint(2, 5))) for _ in range(4)]
+    return text, options
+
+
+def seed_questions(count):
+    db.session.add(Protocol(title="Protocol", category="Category"))
+    db.session.flush()
+    questions = []
+    rows = []
+    for _ in range(count):
+        text, options = random_question()
+        questions.append((text, options))
+        rows.append({
+            'protocol_id': 1, 'text': text,
+            'option_a': options[0], 'option_b': options[1], 'option_c': options[2], 'option_d': options[3],
+            'correct_answer': 'a', 'difficulty_level': 1
+        })
+    db.session.execute(Question.__table__.insert(), rows)
+    db.session.commit()
+    return questions
+
+
+def paraphrase(text, options):
+    """Drop one word and swap two options - a typical AI-generated rewording."""
+    words = text.split()
+    words.pop(random.randrange(len(words)))
+    options = list(options)
+    options[0], options[1] = options[1], options[0]
+    return " ".join(words), options
+
+
+def linear_scan(fp):
+    """Compare against every question in the bank."""
+    best = None
+    for q in db.session.query(Question.id, Question.text, Question.option_a, Question.option_b, Question.option_c, Question.option_d):
+        score = jaccard(fp.shingles, question_shingles(q.text, (q.option_a, q.option_b, q.option_c, q.option_d)))
+        if score >= DUPLICATE_THRESHOLD and (best is None or score > best[1]):
+            best = (q.id, score)
+    return best
+
+
+def main():
+    print(f"{'bank':>6} | {'index build s':>13} | {'scan ms':>8} | {'lsh ms':>7} | {'lsh sql':>7} | {'batch 500 ms':>12} | {'recall':>6}")
+    print("-" * 80)
+    for size in BANK_SIZES:
+        random.seed(size)
+        app = make_app()
+        with app.app_context():
+            questions = seed_questions(size)
+
+            start = time.perf_counter()
+            rebuild_similarity_index()
+            build_s = time.perf_counter() - start
+
+            probes = [fingerprint(*paraphrase(*random.choice(questions))) for _ in range(500)]
+            scan_ms, _ = timed(lambda: linear_scan(probes[0]), repeat=3)
+            lsh_ms, _ = timed(lambda: find_near_duplicates([probes[0]]), repeat=20)
+            with QueryCounter() as qc:
+                find_near_duplicates([probes[0]])
+            batch_ms, _ = timed(lambda: find_near_duplicates(probes), repeat=3)
+            found = sum(1 for match in find_near_duplicates(probes) if match)
+
+            print(f"{size:>6} | {build_s:>13.1f} | {scan_ms:>8.1f} | {lsh_ms:>7.2f} | {qc.count:>7} | {batch_ms:>12.1f} | {found / len(probes):>6.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: question search, LIKE '%..%' scans vs the inverted index.
+
+Usage (from backend/):
+    python -m benchmarks.bench_search
+"""
+import random
+import time
+from database import db
+from models import Protocol, Question
+from utils.search import rebuild_search_index, search_questions, search_cache
+from benchmarks.common import make_app, timed, QueryCounter
+
+BANK_SIZES = [5000, 50000]
+LETTERS = "אבגדהוזחטיכלמנסעפצקרשת"
+# Queries by word-frequency rank: one frequent word, one rarer word, and word pairs
+QUERY_RANKS = [(5,), (200,), (2, 10), (20, 60)]
+
+
+def make_vocabulary(size=5000):
+    """Random Hebrew-like words, picked with a Zipf-like distribution."""
+    words = list(dict.fromkeys("".join(random.choices(LETTERS, k=random.randint(3, 7))) for _ in range(size)))
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    return words, weights
+
+
+def seed_questions(count, words, weights):
+
+    def sentence(k):
+        return " ".join(random.choices(words, weights, k=k))
+
+    for p in range(10):
+        db.session.add(Protocol(title=f"Protocol {p}", category="Category"))
+    db.session.flush()
+    db.session.execute(Question.__table__.insert(), [{
+        'protocol_id': 1 + i % 10,
+        'text': sentence(random.randint(8, 16)) + "?",
+        'option_a': sentence(2), 'option_b': sentence(2),
+        'option_c': sentence(2), 'option_d': sentence(2),
+        'correct_answer': 'a',
+        'explanation': sentence(10),
+        'difficulty_level': 1 + i % 3
+    } for i in range(count)])
+    db.session.commit()
+
+
+def like_search(query_text, limit=20):
+    """Every word must appear in the text, options or explanation."""
+    query = Question.query
+    for word in query_text.split():
+        pattern = f"%{word}%"
+        query = query.filter(db.or_(
+            Question.text.like(pattern), Question.option_a.like(pattern), Question.option_b.like(pattern),
+            Question.option_c.like(pattern), Question.option_d.like(pattern), Question.explanation.like(pattern)
+        ))
+    return query.count(), query.limit(limit).all()
+
+
+def main():
+    print(f"{'bank':>6} | {'index build s':>13} | {'word ranks':<20} | {'hits':>6} | {'LIKE ms':>8} | {'index ms':>8} | {'cached ms':>9} | {'cached sql':>10}")
+    print("-" * 103)
+    for size in BANK_SIZES:
+        random.seed(size)
+        app = make_app()
+        with app.app_context():
+            words, weights = make_vocabulary()
+            seed_questions(size, words, weights)
+            start = time.perf_counter()
+            rebuild_search_index()
+            build_s = time.perf_counter() - start
+
+            for ranks in QUERY_RANKS:
+                query_text = " ".join(words[rank] for rank in ranks)
+                like_ms, _ = timed(lambda: like_search(query_text), repeat=3)
+                index_ms, _ = timed(lambda: (search_cache.invalidate(), search_questions(query_text)), repeat=10)
+                with QueryCounter() as qc:
+                    total, _ = search_questions(query_text)  # Cached: next page / repeat search
+                cached_ms, _ = timed(lambda: search_questions(query_text, offset=20), repeat=10)
+                print(f"{size:>6} | {build_s:>13.1f} | {str(ranks):<20} | {total:>6} | {like_ms:>8.1f} | {index_ms:>8.1f} | {cached_ms:>9.2f} | {qc.count:>10}")
+
+
+if __name__ == '__main__':
+    main()
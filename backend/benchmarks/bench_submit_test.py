@@ -0,0 +1,72 @@
+"""
+Benchmark: submit_test attempt ingestion, per-object ORM path vs bulk path.
+
+Usage (from backend/):
+    python -m benchmarks.bench_submit_test
+"""
+import random
+from datetime import datetime
+from database import db
+from models import QuestionAttempt, TestResult
+from utils.attempts import parse_answers, verify_question_ids, insert_attempts
+from benchmarks.common import make_app, seed_bank, seed_users, timed, QueryCounter
+
+SIZES = [20, 100, 500]
+
+
+def make_payload(question_ids, size):
+    return [{
+        'question_id': qid,
+        'user_answer': random.choice('abcd'),
+        'is_correct': random.random() < 0.7
+    } for qid in random.sample(question_ids, size)]
+
+
+def orm_path(user_id, answers):
+    """The previous implementation: one ORM object per answer."""
+    db.session.add(TestResult(user_id=user_id, protocol_id=None, score=80))
+    for answer in answers:
+        db.session.add(QuestionAttempt(
+            user_id=user_id,
+            question_id=answer.get('question_id'),
+            user_answer=answer.get('user_answer'),
+            is_correct=answer.get('is_correct', False)
+        ))
+    db.session.commit()
+
+
+def bulk_path(user_id, answers):
+    """Validate once, verify IDs in one query, one multi-row INSERT."""
+    rows = parse_answers(answers)
+    verify_question_ids(rows)
+    taken_at = datetime.utcnow()
+    db.session.add(TestResult(user_id=user_id, protocol_id=None, score=80, date_taken=taken_at))
+    insert_attempts(user_id, rows, taken_at)
+    db.session.commit()
+
+
+def main():
+    app = make_app()
+    with app.app_context():
+        question_ids = seed_bank(num_protocols=10, questions_per_protocol=100)
+        user_id = seed_users(1)[0]
+
+        print(f"{'answers':>8} | {'orm median':>11} | {'bulk median':>11} | {'speedup':>7} | {'orm sql':>7} | {'bulk sql':>8}")
+        print("-" * 70)
+        for size in SIZES:
+            answers = make_payload(question_ids, size)
+
+            with QueryCounter() as orm_queries:
+                orm_path(user_id, answers)
+            with QueryCounter() as bulk_queries:
+                bulk_path(user_id, answers)
+
+            orm_ms, _ = timed(lambda: orm_path(user_id, answers))
+            bulk_ms, _ = timed(lambda: bulk_path(user_id, answers))
+
+            print(f"{size:>8} | {orm_ms:>8.2f} ms | {bulk_ms:>8.2f} ms | {orm_ms / bulk_ms:>6.1f}x "
+                  f"| {orm_queries.count:>7} | {bulk_queries.count:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway in-memory SQLite database, so they can be
+run anywhere without touching the MySQL development database.
+"""
+import random
+import statistics
+import time
+from flask import Flask
+from sqlalchemy import event
+from database import db
+from models import User, Protocol, Question
+
+
+def make_app():
+    """A minimal app bound to an in-memory SQLite database, with all tables created."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed_bank(num_protocols=10, questions_per_protocol=100):
+    """Insert protocols and questions. Returns the list of question IDs."""
+    for p in range(num_protocols):
+        db.session.add(Protocol(title=f"Protocol {p}", category=f"Category {p % 4}"))
+    db.session.flush()
+
+    protocol_ids = [pid for (pid,) in db.session.query(Protocol.id)]
+    rows = [{
+        'protocol_id': pid,
+        'text': f"Question {pid}-{i}",
+        'option_a': 'a', 'option_b': 'b', 'option_c': 'c', 'option_d': 'd',
+        'correct_answer': random.choice('abcd'),
+        'difficulty_level': 1 + i % 3
+    } for pid in protocol_ids for i in range(questions_per_protocol)]
+    db.session.execute(Question.__table__.insert(), rows)
+    db.session.commit()
+    return [qid for (qid,) in db.session.query(Question.id)]
+
+
+def seed_users(count, prefix='user'):
+    """Insert `count` users. Returns their IDs."""
+    start = db.session.query(db.func.count(User.id)).scalar()
+    rows = [{
+        'username': f"{prefix}{start + i}",
+        'email': f"{prefix}{start + i}@example.com",
+        'password_hash': 'x',
+        'display_name': f"{prefix.title()} {start + i}",
+        'is_admin': False
+    } for i in range(count)]
+    db.session.execute(User.__table__.insert(), rows)
+    db.session.commit()
+    return [uid for (uid,) in db.session.query(User.id).filter(User.username.like(f"{prefix}%"))]
+
+
+def timed(fn, repeat=20):
+    """Run fn `repeat` times. Returns (median_ms, mean_ms)."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), statistics.mean(samples)
+
+
+class QueryCounter:
+    """Counts SQL statements executed on the engine while active."""
+
+    def __init__(self):
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(db.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(db.engine, 'before_cursor_execute', self._on_execute)
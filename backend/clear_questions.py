@@ -5,26 +5,47 @@ Run this when you want to start fresh with real questions.
 """
 from app import app
 from database import db
-from models import Question, QuestionAttempt, QuestionComment, QuestionFlag
+from models import (
+    Question, QuestionAttempt, QuestionComment, QuestionFlag, QuestionSimilarityBucket, QuestionSearchTerm,
+    QuestionSuggestion, QuestionItemStats, UserQuestionStats
+)
+from utils.cache import bump_bank_version
+
+
+def delete_all_questions():
+    """
+    Delete every question and the rows that reference it (foreign keys first).
+    Must be committed by the caller. Returns {table: rows deleted}.
+    """
+    deleted = {
+        'question flags': db.session.query(QuestionFlag).delete(),
+        'question comments': db.session.query(QuestionComment).delete(),
+        'question attempts': db.session.query(QuestionAttempt).delete(),
+        'user question stats': db.session.query(UserQuestionStats).delete(),
+        'question item stats': db.session.query(QuestionItemStats).delete()
+    }
+    # Suggestions outlive the bank; they just lose their near-duplicate link
+    db.session.query(QuestionSuggestion).filter(QuestionSuggestion.duplicate_of_id.isnot(None)).update(
+        {'duplicate_of_id': None, 'duplicate_score': None}, synchronize_session=False
+    )
+    db.session.query(QuestionSimilarityBucket).delete()
+    db.session.query(QuestionSearchTerm).delete()
+
+    # Now delete questions
+    deleted['questions'] = db.session.query(Question).delete()
+
+    # Invalidate cached test payloads in every running worker
+    bump_bank_version()
+    return deleted
+
 
 def clear_questions():
     print("🗑️ Clearing existing questions...")
     
     with app.app_context():
         try:
-            # First, delete related data (due to foreign keys)
-            flags_deleted = db.session.query(QuestionFlag).delete()
-            print(f"   Deleted {flags_deleted} question flags")
-            
-            comments_deleted = db.session.query(QuestionComment).delete()
-            print(f"   Deleted {comments_deleted} question comments")
-            
-            attempts_deleted = db.session.query(QuestionAttempt).delete()
-            print(f"   Deleted {attempts_deleted} question attempts")
-            
-            # Now delete questions
-            questions_deleted = db.session.query(Question).delete()
-            print(f"   Deleted {questions_deleted} questions")
+            for table, count in delete_all_questions().items():
+                print(f"   Deleted {count} {table}")
             
             db.session.commit()
             print("✅ All questions cleared! Ready for fresh import.")
@@ -2,6 +2,28 @@ from app import app
 from database import db
 from sqlalchemy import text
 
+# Columns added to existing tables after they were first created
+COLUMNS = [
+    ("group_goal.final_value", "ALTER TABLE group_goal ADD COLUMN final_value INTEGER NULL;"),
+    ("group_goal.closed_at", "ALTER TABLE group_goal ADD COLUMN closed_at DATETIME NULL;"),
+    ("group_member.last_read_at", "ALTER TABLE group_member ADD COLUMN last_read_at DATETIME NULL;"),
+    ("question_suggestion.duplicate_of_id", "ALTER TABLE question_suggestion ADD COLUMN duplicate_of_id INTEGER NULL, ADD FOREIGN KEY (duplicate_of_id) REFERENCES question (id);"),
+    ("question_suggestion.duplicate_score", "ALTER TABLE question_suggestion ADD COLUMN duplicate_score FLOAT NULL;"),
+    ("import_job.duplicate_count", "ALTER TABLE import_job ADD COLUMN duplicate_count INTEGER NOT NULL DEFAULT 0;"),
+    ("question_attempt.test_result_id", "ALTER TABLE question_attempt ADD COLUMN test_result_id INTEGER NULL, ADD FOREIGN KEY (test_result_id) REFERENCES test_result (id);"),
+]
+
+# Indexes added to existing tables after they were first created
+# (db.create_all() only creates indexes together with new tables)
+INDEXES = [
+    ("ix_test_result_user_date", "CREATE INDEX ix_test_result_user_date ON test_result (user_id, date_taken, id);"),
+    ("ix_group_goal_status_end", "CREATE INDEX ix_group_goal_status_end ON group_goal (status, end_date);"),
+    ("ix_group_post_feed", "CREATE INDEX ix_group_post_feed ON group_post (group_id, is_pinned, created_at, id);"),
+    ("ix_question_suggestion_status_created", "CREATE INDEX ix_question_suggestion_status_created ON question_suggestion (status, created_at);"),
+    ("ix_question_flag_status_question", "CREATE INDEX ix_question_flag_status_question ON question_flag (status, question_id, created_at);"),
+    ("ix_question_attempt_test_result_id", "CREATE INDEX ix_question_attempt_test_result_id ON question_attempt (test_result_id);"),
+]
+
 with app.app_context():
     print("🔧 Fixing schema...")
     try:
@@ -18,4 +40,26 @@ with app.app_context():
         else:
             print("⚠️ Could not alter table. If the table doesn't exist, it will be created by seed.py.")
 
+    for name, statement in COLUMNS:
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text(statement))
+                print(f"✅ Added column '{name}'.")
+        except Exception as e:
+            if "Duplicate column name" in str(e):
+                print(f"✅ Column '{name}' already exists.")
+            else:
+                print(f"⚠️ Could not add column '{name}': {e}")
+
+    for name, statement in INDEXES:
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text(statement))
+                print(f"✅ Created index '{name}'.")
+        except Exception as e:
+            if "Duplicate key name" in str(e):
+                print(f"✅ Index '{name}' already exists.")
+            else:
+                print(f"⚠️ Could not create index '{name}': {e}")
+
 print("🏁 Done.")
@@ -62,6 +62,10 @@ class QuestionFlag(db.Model):
     # Relationships
     question = db.relationship('Question', backref='flags')
     user = db.relationship('User', backref='flagged_questions')
+
+    # Review queue: flags of a status grouped by question
+    __table_args__ = (db.Index('ix_question_flag_status_question', 'status', 'question_id', 'created_at'),)
+
 class TestResult(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)     # Who took the test?
@@ -69,6 +73,9 @@ class TestResult(db.Model):
     score = db.Column(db.Integer, nullable=False) # Score (e.g., 80)
     date_taken = db.Column(db.DateTime, default=datetime.utcnow) # When was it taken?
 
+    # Keyset pagination of a user's history (newest first)
+    __table_args__ = (db.Index('ix_test_result_user_date', 'user_id', 'date_taken', 'id'),)
+
 # --- Question Comment Table (for discussions) ---
 class QuestionComment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -105,11 +112,16 @@ class QuestionSuggestion(db.Model):
     admin_feedback = db.Column(db.Text, nullable=True)     # Feedback from admin
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     reviewed_at = db.Column(db.DateTime, nullable=True)
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=True)  # Closest bank question, if near-duplicate
+    duplicate_score = db.Column(db.Float, nullable=True)   # Its similarity (0-1)
     
     # Relationships
     user = db.relationship('User', backref='suggestions')
     protocol = db.relationship('Protocol', backref='suggestions')
 
+    # Admin review queue: filter by status, newest first
+    __table_args__ = (db.Index('ix_question_suggestion_status_created', 'status', 'created_at'),)
+
 # --- Question Attempt Table (for tracking individual answers) ---
 class QuestionAttempt(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -118,6 +130,7 @@ class QuestionAttempt(db.Model):
     is_correct = db.Column(db.Boolean, nullable=False)        # Did they get it right?
     user_answer = db.Column(db.String(1), nullable=True)      # What they answered ('a', 'b', 'c', 'd')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)  # When was it attempted?
+    test_result_id = db.Column(db.Integer, db.ForeignKey('test_result.id'), nullable=True, index=True)  # Test it was answered in
     
     # Relationships for easy access
     user = db.relationship('User', backref='attempts')
@@ -143,6 +156,7 @@ class GroupMember(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     role = db.Column(db.String(20), default='member')  # 'admin' or 'member'
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_read_at = db.Column(db.DateTime, nullable=True)  # Last time the member opened the feed (unread counts)
     
     # Relationship for easy access to user
     user = db.relationship('User', backref='group_memberships')
@@ -165,6 +179,9 @@ class GroupPost(db.Model):
     group = db.relationship('Group', backref='posts')
     comments = db.relationship('GroupPostComment', backref='post', lazy=True, cascade='all, delete-orphan')
 
+    # Keyset pagination of a group's feed (pinned first, newest first)
+    __table_args__ = (db.Index('ix_group_post_feed', 'group_id', 'is_pinned', 'created_at', 'id'),)
+
 # --- Group Post Comment Table ---
 class GroupPostComment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -192,10 +209,151 @@ class GroupGoal(db.Model):
     start_date = db.Column(db.DateTime, default=datetime.utcnow)
     end_date = db.Column(db.DateTime, nullable=True)          # Optional deadline
     status = db.Column(db.String(20), default='active')       # 'active', 'completed', 'expired'
+    final_value = db.Column(db.Integer, nullable=True)        # Group progress frozen when the goal closed
+    closed_at = db.Column(db.DateTime, nullable=True)         # When it was completed/expired
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     group = db.relationship('Group', backref='goals')
     creator = db.relationship('User', backref='created_goals')
+    progress = db.relationship('GoalProgress', uselist=False, cascade='all, delete-orphan')
+    contributions = db.relationship('GoalContribution', lazy=True, cascade='all, delete-orphan')
+
+    # Lifecycle sweeps: active goals past their end_date
+    __table_args__ = (db.Index('ix_group_goal_status_end', 'status', 'end_date'),)
+
+
+# --- User Protocol Best Table (per-user rollup for the protocols library) ---
+class UserProtocolBest(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    protocol_id = db.Column(db.Integer, db.ForeignKey('protocol.id'), nullable=False)
+    best_score = db.Column(db.Integer, nullable=False)         # Highest score achieved on this protocol
+    tests_taken = db.Column(db.Integer, default=0)             # Number of protocol tests submitted
+    last_attempt_at = db.Column(db.DateTime, nullable=True)    # When was the last test submitted?
+
+    # One rollup row per (user, protocol) - kept current by submit_test
+    __table_args__ = (db.UniqueConstraint('user_id', 'protocol_id', name='unique_user_protocol_best'),)
+
+# --- Cache Version Table (cross-worker cache invalidation counters) ---
+class CacheVersion(db.Model):
+    name = db.Column(db.String(64), primary_key=True)          # e.g. 'question_bank', 'protocol:12'
+    version = db.Column(db.Integer, nullable=False, default=0) # Bumped whenever the cached data changes
+
+# --- User Question Stats Table (per-user mastery projection for the weakness test) ---
+class UserQuestionStats(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+    pass_count = db.Column(db.Integer, nullable=False, default=0)  # Times answered correctly
+    fail_count = db.Column(db.Integer, nullable=False, default=0)  # Times answered incorrectly
+    net_score = db.Column(db.Integer, nullable=False, default=0)   # fail_count - pass_count (> 0 = still weak)
+    last_seen_at = db.Column(db.DateTime, nullable=True)           # Last time the user answered it
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'question_id', name='unique_user_question_stats'),
+        db.Index('ix_user_question_stats_weakness', 'user_id', 'net_score'),  # Top-N weakness reads
+    )
+
+# --- User Daily Activity Table (daily rollup powering the leaderboards) ---
+class UserDailyActivity(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)                            # UTC calendar day
+    tests_taken = db.Column(db.Integer, nullable=False, default=0)      # TestResults submitted that day
+    score_sum = db.Column(db.Integer, nullable=False, default=0)        # Sum of their scores (avg = score_sum / tests_taken)
+    correct_answers = db.Column(db.Integer, nullable=False, default=0)  # Correct QuestionAttempts that day
+    attempts = db.Column(db.Integer, nullable=False, default=0)         # All QuestionAttempts that day
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', name='unique_user_daily_activity'),
+        db.Index('ix_user_daily_activity_day', 'day', 'user_id'),  # Period scans for leaderboards
+    )
+
+# --- Goal Progress Table (running totals per group goal) ---
+class GoalProgress(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    goal_id = db.Column(db.Integer, db.ForeignKey('group_goal.id'), nullable=False)
+    tests_count = db.Column(db.Integer, nullable=False, default=0)      # Tests taken by members since start_date
+    score_sum = db.Column(db.Integer, nullable=False, default=0)        # Sum of their scores (avg = score_sum / tests_count)
+    correct_answers = db.Column(db.Integer, nullable=False, default=0)  # Correct answers by members since start_date
+
+    # One row per goal - kept current by submit_test while the goal is active
+    __table_args__ = (db.UniqueConstraint('goal_id', name='unique_goal_progress'),)
+
+# --- Goal Contribution Table (per-member share of a group goal) ---
+class GoalContribution(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    goal_id = db.Column(db.Integer, db.ForeignKey('group_goal.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    tests_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    correct_answers = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (db.UniqueConstraint('goal_id', 'user_id', name='unique_goal_contribution'),)
+
+# --- Import Job Table (background CSV question imports) ---
+class ImportJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    dry_run = db.Column(db.Boolean, default=False)                    # Validate only, write nothing
+    status = db.Column(db.String(20), default='queued')               # 'queued', 'running', 'completed', 'failed'
+    total_bytes = db.Column(db.Integer, nullable=False, default=0)    # Upload size (progress = bytes_read / total_bytes)
+    bytes_read = db.Column(db.Integer, nullable=False, default=0)
+    processed_rows = db.Column(db.Integer, nullable=False, default=0) # CSV rows read so far
+    valid_count = db.Column(db.Integer, nullable=False, default=0)    # Rows that passed validation
+    imported_count = db.Column(db.Integer, nullable=False, default=0) # Questions written (0 for dry runs)
+    failed_count = db.Column(db.Integer, nullable=False, default=0)   # Rows rejected or not written
+    duplicate_count = db.Column(db.Integer, nullable=False, default=0) # Rows skipped as near-duplicates
+    errors = db.Column(db.Text, nullable=True)                        # JSON list of the first row errors
+    message = db.Column(db.Text, nullable=True)                       # Why the job failed, if it did
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+# --- Question Similarity Bucket Table (LSH index for near-duplicate detection) ---
+class QuestionSimilarityBucket(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+    bucket = db.Column(db.BigInteger, nullable=False)  # Hash of one MinHash band (utils/similarity.py)
+
+    __table_args__ = (
+        db.Index('ix_question_similarity_bucket', 'bucket', 'question_id'),  # Candidate lookups
+        db.Index('ix_question_similarity_question', 'question_id'),          # Re-indexing / deletes
+    )
+
+# --- Question Search Term Table (inverted index for /api/content/search) ---
+class QuestionSearchTerm(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    term = db.Column(db.String(64), nullable=False)      # Normalized word (utils/search.py)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+    weight = db.Column(db.Integer, nullable=False)       # Field-weighted occurrences of the term in the question
+
+    __table_args__ = (
+        db.Index('ix_question_search_term', 'term', 'question_id', 'weight'),  # Posting lists
+        db.Index('ix_question_search_question', 'question_id'),                # Re-indexing / deletes
+    )
+
+# --- Site Hourly Activity Table (site-wide rollup for the admin dashboard) ---
+class SiteHourlyActivity(db.Model):
+    hour = db.Column(db.DateTime, primary_key=True)                  # Start of the UTC hour
+    new_users = db.Column(db.Integer, nullable=False, default=0)     # Registrations
+    tests_taken = db.Column(db.Integer, nullable=False, default=0)   # TestResults submitted
+    attempts = db.Column(db.Integer, nullable=False, default=0)      # QuestionAttempts recorded
+    flags = db.Column(db.Integer, nullable=False, default=0)         # QuestionFlags raised
 
+# --- Question Item Stats Table (classical item analysis, see utils/item_analysis.py) ---
+class QuestionItemStats(db.Model):
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)       # Answers recorded
+    p_value = db.Column(db.Float, nullable=True)                      # Share answered correctly (difficulty)
+    point_biserial = db.Column(db.Float, nullable=True)               # Correctness vs test score (discrimination)
+    scored_attempts = db.Column(db.Integer, nullable=False, default=0) # Attempts matched to a test score
+    answers_a = db.Column(db.Integer, nullable=False, default=0)      # Distractor distribution (user_answer)
+    answers_b = db.Column(db.Integer, nullable=False, default=0)
+    answers_c = db.Column(db.Integer, nullable=False, default=0)
+    answers_d = db.Column(db.Integer, nullable=False, default=0)
+    answers_none = db.Column(db.Integer, nullable=False, default=0)   # No / unknown answer
+    computed_at = db.Column(db.DateTime, nullable=True)
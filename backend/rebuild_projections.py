@@ -0,0 +1,54 @@
+"""
+Script to rebuild the read-side projection tables from the raw history.
+submit_test keeps these tables current incrementally; run this once after
+deploying a new projection, or whenever a projection looks out of sync.
+
+Usage:
+    python rebuild_projections.py            # rebuild everything
+    python rebuild_projections.py protocol_bests
+"""
+import sys
+from app import app
+from database import db
+from utils.projections import (
+    rebuild_protocol_bests, rebuild_question_stats, rebuild_daily_activity, rebuild_goal_progress,
+    rebuild_site_activity
+)
+from utils.similarity import rebuild_similarity_index
+from utils.search import rebuild_search_index
+
+# Projection name -> rebuild function (each returns the number of rows written)
+PROJECTIONS = {
+    'protocol_bests': rebuild_protocol_bests,
+    'question_stats': rebuild_question_stats,
+    'daily_activity': rebuild_daily_activity,
+    'goal_progress': rebuild_goal_progress,  # Active goals only
+    'site_activity': rebuild_site_activity,  # Admin dashboard activity metrics
+    'similarity_index': rebuild_similarity_index,  # Near-duplicate buckets
+    'search_index': rebuild_search_index,  # /api/content/search postings
+}
+
+
+def rebuild(names):
+    with app.app_context():
+        db.create_all()  # Make sure projection tables exist
+
+        for name in names:
+            print(f"🔄 Rebuilding {name}...")
+            try:
+                count = PROJECTIONS[name]()
+                print(f"   ✅ {count} rows written")
+            except Exception as e:
+                db.session.rollback()
+                print(f"   ❌ Error: {e}")
+
+
+if __name__ == "__main__":
+    requested = sys.argv[1:] or list(PROJECTIONS)
+    unknown = [n for n in requested if n not in PROJECTIONS]
+    if unknown:
+        print(f"❌ Unknown projection(s): {', '.join(unknown)}. Available: {', '.join(PROJECTIONS)}")
+        sys.exit(1)
+
+    rebuild(requested)
+    print("🏁 Done.")
@@ -1,9 +1,27 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import QuestionSuggestion, Question, Protocol, User, QuestionFlag
+from models import (
+    QuestionSuggestion, Question, Protocol, User, QuestionFlag, ImportJob, SiteHourlyActivity, QuestionItemStats
+)
 from database import db
 from utils.decorators import admin_required
-from datetime import datetime
+from utils.cache import (
+    bump_bank_version, bump_versions, counters, leaderboard_cache, BANK_VERSION, SUGGESTIONS_VERSION, USERS_VERSION
+)
+from utils.projections import SITE_COUNTERS
+from utils.pagination import parse_cursor, make_cursor, after_cursor
+from sqlalchemy.orm import joinedload
+from sqlalchemy import case
+from utils.attempt_queue import attempt_queue
+from utils.question_import import REQUIRED_HEADERS, import_job_status, import_runner, read_headers
+from utils.similarity import index_questions
+from utils.search import index_question_terms, search_cache
+from utils.item_analysis import (
+    item_analysis_runner, LOW_DISCRIMINATION, MIN_ATTEMPTS, TOO_EASY_P, TOO_HARD_P
+)
+from datetime import datetime, timedelta
+import os
+import tempfile
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -19,13 +37,36 @@ def get_suggestions():
     if status not in ['pending', 'approved', 'rejected', 'all']:
         return jsonify({"message": "Invalid status filter"}), 400
 
-    # Query based on status
-    if status == 'all':
-        suggestions = QuestionSuggestion.query.order_by(QuestionSuggestion.created_at.desc()).all()
-    else:
-        suggestions = QuestionSuggestion.query.filter_by(status=status)\
-                                              .order_by(QuestionSuggestion.created_at.desc())\
-                                              .all()
+    # Keyset pages: ?limit=&before=<created_at ISO>,<id>, optional ?protocol_id= / ?user_id=
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    protocol_id = request.args.get('protocol_id', type=int)
+    user_id = request.args.get('user_id', type=int)
+    before = request.args.get('before')
+    try:
+        cursor = parse_cursor(before) if before else None
+    except ValueError:
+        return jsonify({"message": "Invalid cursor. Expected format: <created_at ISO>,<id>"}), 400
+
+    # Query based on filters, with protocol and author loaded in the same query
+    query = QuestionSuggestion.query.options(
+        joinedload(QuestionSuggestion.protocol),
+        joinedload(QuestionSuggestion.user)
+    )
+    if status != 'all':
+        query = query.filter(QuestionSuggestion.status == status)
+    if protocol_id is not None:
+        query = query.filter(QuestionSuggestion.protocol_id == protocol_id)
+    if user_id is not None:
+        query = query.filter(QuestionSuggestion.user_id == user_id)
+    if cursor:
+        query = after_cursor(query, QuestionSuggestion.created_at, QuestionSuggestion.id, cursor)
+
+    suggestions = query.order_by(
+        QuestionSuggestion.created_at.desc(),
+        QuestionSuggestion.id.desc()
+    ).limit(limit + 1).all()
+    has_more = len(suggestions) > limit
+    suggestions = suggestions[:limit]
 
     output = []
     for s in suggestions:
@@ -46,16 +87,43 @@ def get_suggestions():
             "suggested_by_email": s.user.email if s.user else None,
             "status": s.status,
             "created_at": s.created_at.strftime("%d/%m/%Y %H:%M"),
-            "admin_feedback": s.admin_feedback
+            "admin_feedback": s.admin_feedback,
+            "duplicate_of_id": s.duplicate_of_id,  # Near-duplicate bank question found at submission
+            "duplicate_score": s.duplicate_score
         })
 
     return jsonify({
         "count": len(output),
         "status_filter": status,
-        "suggestions": output
+        "suggestions": output,
+        # Pass next_cursor as ?before= for the next page
+        "next_cursor": make_cursor(suggestions[-1].created_at, suggestions[-1].id) if has_more else None,
+        "limit": limit
     }), 200
 
 
+# --- Suggestion counts per status (cached until a suggestion changes) ---
+@admin_bp.route('/suggestions/count', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_suggestion_counts():
+    return jsonify(suggestion_counts()), 200
+
+
+def suggestion_counts():
+    """{pending, approved, rejected, total}, recounted only after suggestions change."""
+    def count():
+        counts = {'pending': 0, 'approved': 0, 'rejected': 0}
+        for status, n in db.session.query(
+            QuestionSuggestion.status, db.func.count(QuestionSuggestion.id)
+        ).group_by(QuestionSuggestion.status):
+            counts[status] = n
+        counts['total'] = sum(counts.values())
+        return counts
+
+    return counters.get(SUGGESTIONS_VERSION, count)
+
+
 # --- Approve a suggestion (create actual Question) ---
 @admin_bp.route('/approve/<int:suggestion_id>', methods=['POST'])
 @jwt_required()
@@ -93,11 +161,17 @@ def approve_suggestion(suggestion_id):
 
     db.session.add(new_question)
     db.session.flush()  # Get the new question ID before commit
+    index_questions([new_question])  # Near-duplicate index
+    index_question_terms([new_question])  # Search index
 
     # Update suggestion status
     suggestion.status = 'approved'
     suggestion.reviewed_at = datetime.utcnow()
 
+    # Invalidate cached test payloads for this protocol and suggestion counts (all workers)
+    bump_bank_version([suggestion.protocol_id])
+    bump_versions(SUGGESTIONS_VERSION)
+
     db.session.commit()
 
     return jsonify({
@@ -127,6 +201,7 @@ def reject_suggestion(suggestion_id):
     suggestion.status = 'rejected'
     suggestion.admin_feedback = reason if reason else "השאלה לא עמדה בקריטריונים"
     suggestion.reviewed_at = datetime.utcnow()
+    bump_versions(SUGGESTIONS_VERSION)  # Invalidate cached suggestion counts
 
     db.session.commit()
 
@@ -141,27 +216,76 @@ def reject_suggestion(suggestion_id):
 @jwt_required()
 @admin_required
 def get_admin_stats():
-    pending_count = QuestionSuggestion.query.filter_by(status='pending').count()
-    approved_count = QuestionSuggestion.query.filter_by(status='approved').count()
-    rejected_count = QuestionSuggestion.query.filter_by(status='rejected').count()
-    total_questions = Question.query.count()
-    total_users = User.query.count()
+    totals = admin_totals()
 
     return jsonify({
-        "suggestions": {
-            "pending": pending_count,
-            "approved": approved_count,
-            "rejected": rejected_count
-        },
-        "total_questions": total_questions,
-        "total_users": total_users
+        "suggestions": totals["suggestions"],
+        "total_questions": totals["total_questions"],
+        "total_users": totals["total_users"],
+        "activity": activity_metrics()
     }), 200
 
 
-# --- Bulk User Import Questions ---
-import csv
-import io
+def admin_totals():
+    """Suggestion, question and user totals in one query, recounted only after any of them change."""
+    def count():
+        status = QuestionSuggestion.status
+        row = db.session.query(
+            db.func.sum(case((status == 'pending', 1), else_=0)),
+            db.func.sum(case((status == 'approved', 1), else_=0)),
+            db.func.sum(case((status == 'rejected', 1), else_=0)),
+            db.session.query(db.func.count(Question.id)).scalar_subquery(),
+            db.session.query(db.func.count(User.id)).scalar_subquery()
+        ).select_from(QuestionSuggestion).one()
+        pending, approved, rejected, questions, users = [int(v or 0) for v in row]
+        return {
+            "suggestions": {"pending": pending, "approved": approved, "rejected": rejected},
+            "total_questions": questions,
+            "total_users": users
+        }
+
+    return counters.get((SUGGESTIONS_VERSION, BANK_VERSION, USERS_VERSION), count)
+
+
+# Rolling windows of whole UTC hours, the current hour included
+ACTIVITY_WINDOWS = [('24h', 24), ('7d', 7 * 24), ('30d', 30 * 24)]
+
+
+def activity_metrics(now=None):
+    """New users, tests, attempts and flags per window, from the hourly rollup (one query)."""
+    current_hour = (now or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+    starts = {label: current_hour - timedelta(hours=hours - 1) for label, hours in ACTIVITY_WINDOWS}
+
+    columns = [
+        db.func.sum(case((SiteHourlyActivity.hour >= since, getattr(SiteHourlyActivity, counter)), else_=0))
+        for since in starts.values() for counter in SITE_COUNTERS
+    ]
+    row = db.session.query(*columns).filter(SiteHourlyActivity.hour >= min(starts.values())).one()
+
+    values = iter(row)
+    return {
+        label: {counter: int(next(values) or 0) for counter in SITE_COUNTERS}
+        for label in starts
+    }
+
+
+# --- Write-behind ingestion metrics ---
+@admin_bp.route('/ingestion-metrics', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_ingestion_metrics():
+    return jsonify(attempt_queue.metrics()), 200
 
+
+# --- Leaderboard and search cache metrics (hits / misses / coalesced) ---
+@admin_bp.route('/cache-metrics', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_cache_metrics():
+    return jsonify({"leaderboard": leaderboard_cache.stats(), "search": search_cache.stats()}), 200
+
+
+# --- Bulk Import Questions (background job) ---
 @admin_bp.route('/import-questions', methods=['POST'])
 @jwt_required()
 @admin_required
@@ -176,109 +300,151 @@ def import_questions():
     if not file.filename.endswith('.csv'):
         return jsonify({"message": "Only CSV files are allowed"}), 400
 
-    try:
-        # Read file
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_input = csv.DictReader(stream)
-        
-        # Verify headers
-        # Verify headers - now expects protocol_name (not ID)
-        required_headers = ['protocol_name', 'text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer']
-        if not csv_input.fieldnames or not all(h in csv_input.fieldnames for h in required_headers):
-             return jsonify({"message": f"Invalid CSV format. Required headers: {', '.join(required_headers)}"}), 400
-
-        valid_count = 0
-        error_count = 0
-        errors = []
-        
-        new_questions = []
-
-        # Pre-fetch protocols to minimize DB queries
-        # Pre-fetch protocols
-        protocols_by_id = {p.id: p for p in Protocol.query.all()}
-        protocols_by_title = {p.title.lower().strip(): p for p in protocols_by_id.values()}
-
-        for i, row in enumerate(csv_input):
-            try:
-                # 1. Validate Protocol (by Name or ID)
-                p_raw = row.get('protocol_name', '').strip()
-                p_id = None
-                
-                # Strategy A: Try as Integer ID (for backwards compat)
-                if p_raw.isdigit():
-                    pid_int = int(p_raw)
-                    if pid_int in protocols_by_id:
-                        p_id = pid_int
-
-                # Strategy B: Try as Title (primary method)
-                if not p_id:
-                     p_norm = p_raw.lower()
-                     if p_norm in protocols_by_title:
-                         p_id = protocols_by_title[p_norm].id
-                
-                # Failed both
-                if not p_id:
-                     raise ValueError(f"Protocol '{p_raw}' not found")
-                
-                # 2. Validate Correct Answer
-                correct = row.get('correct_answer', '').lower().strip()
-                if correct not in ['a', 'b', 'c', 'd']:
-                    raise ValueError(f"Invalid correct_answer: '{correct}'. Must be a, b, c, or d.")
-
-                # 3. Validate Difficulty Level (1-3)
-                difficulty_raw = row.get('difficulty_level', '1').strip()
-                if difficulty_raw.isdigit() and int(difficulty_raw) in [1, 2, 3]:
-                    difficulty_level = int(difficulty_raw)
-                else:
-                    difficulty_level = 1  # Default
-
-                # 4. Validate Required Fields
-                text = row.get('text', '').strip()
-                option_a = row.get('option_a', '').strip()
-                option_b = row.get('option_b', '').strip()
-                option_c = row.get('option_c', '').strip()
-                option_d = row.get('option_d', '').strip()
-
-                if not all([text, option_a, option_b, option_c, option_d]):
-                    raise ValueError("Missing required text/option fields")
-
-                # 5. Create Question Object (ORM - safe from SQL injection)
-                q = Question(
-                    protocol_id=p_id,
-                    text=text,
-                    option_a=option_a,
-                    option_b=option_b,
-                    option_c=option_c,
-                    option_d=option_d,
-                    correct_answer=correct,
-                    explanation=row.get('explanation', '').strip() or None,
-                    source_reference=row.get('source_reference', '').strip() or None,
-                    difficulty_level=difficulty_level
-                )
-
-                new_questions.append(q)
-                valid_count += 1
-                
-            except Exception as e:
-                error_count += 1
-                if len(errors) < 10: # Limit error limits
-                    errors.append(f"Row {i+2}: {str(e)}")
-
-        # Bulk insert
-        if new_questions:
-            db.session.add_all(new_questions)
-            db.session.commit()
-
-        return jsonify({
-            "message": "Import process completed",
-            "imported_count": valid_count,
-            "failed_count": error_count,
-            "errors": errors
-        }), 200
+    dry_run = (request.form.get('dry_run') or request.args.get('dry_run', '')).lower() in ('1', 'true')
 
+    # Spool the upload to disk in chunks; the import job streams it from there
+    fd, path = tempfile.mkstemp(prefix='protokal-import-', suffix='.csv')
+    os.close(fd)
+    try:
+        file.save(path)
+
+        # Verify headers before queuing the job
+        headers = read_headers(path)
+        if not headers or not all(h in headers for h in REQUIRED_HEADERS):
+            os.remove(path)
+            return jsonify({"message": f"Invalid CSV format. Required headers: {', '.join(REQUIRED_HEADERS)}"}), 400
+
+        job = ImportJob(
+            created_by=int(get_jwt_identity()),
+            filename=file.filename[:255],
+            dry_run=dry_run,
+            total_bytes=os.path.getsize(path)
+        )
+        db.session.add(job)
+        db.session.commit()
     except Exception as e:
+        db.session.rollback()
+        if os.path.exists(path):
+            os.remove(path)
         return jsonify({"message": f"Server error during import: {str(e)}"}), 500
 
+    import_runner.submit(job.id, path)
+    return jsonify({"message": "Import started", **import_job_status(job)}), 202
+
+
+# --- Import job progress and row errors ---
+@admin_bp.route('/import-jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_import_job(job_id):
+    job = db.session.get(ImportJob, job_id)
+    if not job:
+        return jsonify({"message": "Import job not found"}), 404
+    return jsonify(import_job_status(job)), 200
+
+
+# --- Recent import jobs ---
+@admin_bp.route('/import-jobs', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_import_jobs():
+    jobs = ImportJob.query.order_by(ImportJob.created_at.desc(), ImportJob.id.desc()).limit(20).all()
+    return jsonify({"jobs": [import_job_status(job) for job in jobs]}), 200
+
+
+# --- Item analysis (difficulty, discrimination, distractors) ---
+ITEM_STATS_SORTS = {
+    'p_value': QuestionItemStats.p_value,
+    'point_biserial': QuestionItemStats.point_biserial,
+    'attempts': QuestionItemStats.attempts
+}
+
+
+@admin_bp.route('/item-stats', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_item_stats():
+    sort = request.args.get('sort', 'point_biserial')
+    if sort not in ITEM_STATS_SORTS:
+        return jsonify({"message": f"Invalid sort. Use one of: {', '.join(ITEM_STATS_SORTS)}"}), 400
+    descending = request.args.get('order', 'asc') == 'desc'
+    flag = request.args.get('flag')  # 'too_easy', 'too_hard', 'low_discrimination'
+    protocol_id = request.args.get('protocol_id', type=int)
+    min_attempts = max(request.args.get('min_attempts', MIN_ATTEMPTS, type=int), 1)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 200)
+
+    query = db.session.query(QuestionItemStats, Question, Protocol.title).join(
+        Question, Question.id == QuestionItemStats.question_id
+    ).join(
+        Protocol, Protocol.id == Question.protocol_id
+    ).filter(QuestionItemStats.attempts >= min_attempts)
+
+    if flag == 'too_easy':
+        query = query.filter(QuestionItemStats.p_value >= TOO_EASY_P)
+    elif flag == 'too_hard':
+        query = query.filter(QuestionItemStats.p_value <= TOO_HARD_P)
+    elif flag == 'low_discrimination':
+        query = query.filter(QuestionItemStats.point_biserial < LOW_DISCRIMINATION)
+    elif flag is not None:
+        return jsonify({"message": "Invalid flag. Use too_easy, too_hard or low_discrimination"}), 400
+    if protocol_id is not None:
+        query = query.filter(Question.protocol_id == protocol_id)
+
+    total = query.count()
+    attempts_total, scored_total = db.session.query(
+        db.func.coalesce(db.func.sum(QuestionItemStats.attempts), 0),
+        db.func.coalesce(db.func.sum(QuestionItemStats.scored_attempts), 0)
+    ).one()
+    sort_col = ITEM_STATS_SORTS[sort]
+    rows = query.order_by(
+        sort_col.is_(None),  # Undefined values last
+        sort_col.desc() if descending else sort_col.asc(),
+        QuestionItemStats.question_id
+    ).offset((page - 1) * per_page).limit(per_page).all()
+
+    output = []
+    for stats, q, protocol_title in rows:
+        output.append({
+            "question_id": q.id,
+            "question_text": q.text,
+            "protocol_title": protocol_title,
+            "correct_answer": q.correct_answer,
+            "attempts": stats.attempts,
+            "p_value": stats.p_value,
+            "point_biserial": stats.point_biserial,
+            "scored_attempts": stats.scored_attempts,
+            "unlinked_attempts": stats.attempts - stats.scored_attempts,  # Not tied to a test (no point_biserial)
+            "distractors": {
+                "a": stats.answers_a,
+                "b": stats.answers_b,
+                "c": stats.answers_c,
+                "d": stats.answers_d,
+                "none": stats.answers_none
+            },
+            "computed_at": stats.computed_at.isoformat() if stats.computed_at else None
+        })
+
+    return jsonify({
+        "items": output,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        # Across the whole bank: attempts that could not be tied to a test
+        "unlinked_attempts": int(attempts_total - scored_total),
+        "refresh_running": item_analysis_runner.running,
+        "last_error": item_analysis_runner.last_error
+    }), 200
+
+
+@admin_bp.route('/item-stats/refresh', methods=['POST'])
+@jwt_required()
+@admin_required
+def refresh_item_stats():
+    if not item_analysis_runner.start(current_app._get_current_object()):
+        return jsonify({"message": "Item analysis is already running"}), 409
+    return jsonify({"message": "Item analysis started"}), 202
+
 
 # --- View Flagged Questions (Admin QA) ---
 @admin_bp.route('/flagged-questions', methods=['GET'])
@@ -287,18 +453,21 @@ def import_questions():
 def get_flagged_questions():
     status_filter = request.args.get('status', 'pending')
     
-    query = QuestionFlag.query
+    # Flags with their question, protocol and reporter loaded in one joined query
+    query = db.session.query(QuestionFlag, Question, Protocol, User).outerjoin(
+        Question, Question.id == QuestionFlag.question_id
+    ).outerjoin(
+        Protocol, Protocol.id == Question.protocol_id
+    ).outerjoin(
+        User, User.id == QuestionFlag.user_id
+    )
     if status_filter != 'all':
-        query = query.filter_by(status=status_filter)
+        query = query.filter(QuestionFlag.status == status_filter)
     
-    flags = query.order_by(QuestionFlag.created_at.desc()).all()
+    rows = query.order_by(QuestionFlag.created_at.desc()).all()
     
     output = []
-    for f in flags:
-        question = Question.query.get(f.question_id)
-        user = User.query.get(f.user_id)
-        protocol = Protocol.query.get(question.protocol_id) if question else None
-        
+    for f, question, protocol, user in rows:
         output.append({
             "id": f.id,
             "question_id": f.question_id,
@@ -316,6 +485,127 @@ def get_flagged_questions():
     return jsonify({"flags": output, "count": len(output)}), 200
 
 
+# --- Flag review queue: flags grouped by question (Admin QA) ---
+@admin_bp.route('/flag-queue', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_flag_queue():
+    status_filter = request.args.get('status', 'pending')
+    if status_filter not in ['pending', 'reviewed', 'resolved', 'all']:
+        return jsonify({"message": "Invalid status filter"}), 400
+
+    # Keyset pages ordered by most recently flagged: ?limit=&before=<last flagged ISO>,<question_id>
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    before = request.args.get('before')
+    try:
+        cursor = parse_cursor(before) if before else None
+    except ValueError:
+        return jsonify({"message": "Invalid cursor. Expected format: <last flagged ISO>,<question_id>"}), 400
+
+    flag_filter = QuestionFlag.status == status_filter if status_filter != 'all' else db.true()
+    last_flagged = db.func.max(QuestionFlag.created_at)
+
+    # 1. One row per flagged question: counts, first/last flag time, question and protocol
+    query = db.session.query(
+        QuestionFlag.question_id,
+        db.func.count(QuestionFlag.id).label('flag_count'),
+        db.func.sum(case((QuestionFlag.status == 'pending', 1), else_=0)).label('pending_count'),
+        db.func.min(QuestionFlag.created_at).label('first_flagged_at'),
+        last_flagged.label('last_flagged_at'),
+        Question.text,
+        Question.correct_answer,
+        Protocol.title
+    ).outerjoin(
+        Question, Question.id == QuestionFlag.question_id
+    ).outerjoin(
+        Protocol, Protocol.id == Question.protocol_id
+    ).filter(flag_filter).group_by(
+        QuestionFlag.question_id, Question.text, Question.correct_answer, Protocol.title
+    )
+    if cursor:
+        cursor_date, cursor_id = cursor
+        query = query.having(db.or_(
+            last_flagged < cursor_date,
+            db.and_(last_flagged == cursor_date, QuestionFlag.question_id < cursor_id)
+        ))
+
+    page = query.order_by(last_flagged.desc(), QuestionFlag.question_id.desc()).limit(limit + 1).all()
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    # 2. Distinct reasons and reporters for the whole page in one query
+    details = {}
+    if page:
+        for question_id, reason, display_name, email in db.session.query(
+            QuestionFlag.question_id, QuestionFlag.reason, User.display_name, User.email
+        ).outerjoin(
+            User, User.id == QuestionFlag.user_id
+        ).filter(
+            flag_filter, QuestionFlag.question_id.in_([r.question_id for r in page])
+        ).order_by(QuestionFlag.created_at):
+            entry = details.setdefault(question_id, {"reasons": [], "reporters": []})
+            reason = (reason or '').strip()
+            if reason and reason not in entry["reasons"]:
+                entry["reasons"].append(reason)
+            reporter = {"display_name": display_name or "Unknown", "email": email}
+            if reporter not in entry["reporters"]:
+                entry["reporters"].append(reporter)
+
+    output = []
+    for r in page:
+        entry = details.get(r.question_id, {"reasons": [], "reporters": []})
+        output.append({
+            "question_id": r.question_id,
+            "question_text": r.text if r.text is not None else "Deleted",
+            "protocol_title": r.title or "Unknown",
+            "correct_answer": r.correct_answer,
+            "flag_count": r.flag_count,
+            "pending_count": int(r.pending_count or 0),
+            "first_flagged_at": r.first_flagged_at.isoformat() if r.first_flagged_at else None,
+            "last_flagged_at": r.last_flagged_at.isoformat() if r.last_flagged_at else None,
+            "reasons": entry["reasons"],
+            "reporters": entry["reporters"]
+        })
+
+    last = page[-1] if page else None
+    return jsonify({
+        "questions": output,
+        "status_filter": status_filter,
+        "next_cursor": make_cursor(last.last_flagged_at, last.question_id) if has_more else None,
+        "limit": limit
+    }), 200
+
+
+# --- Bulk resolve all flags of one or more questions (Admin QA) ---
+@admin_bp.route('/resolve-flags', methods=['POST'])
+@jwt_required()
+@admin_required
+def resolve_flags():
+    data = request.get_json() or {}
+    question_ids = data.get('question_ids')
+    new_status = data.get('status', 'resolved')
+    admin_notes = data.get('admin_notes', '')
+
+    if not isinstance(question_ids, list) or not question_ids \
+            or not all(isinstance(qid, int) and not isinstance(qid, bool) for qid in question_ids):
+        return jsonify({"message": "question_ids must be a non-empty list of integers"}), 400
+    if new_status not in ['reviewed', 'resolved']:
+        return jsonify({"message": "status must be 'reviewed' or 'resolved'"}), 400
+
+    # One UPDATE for every open flag of these questions, in a single transaction
+    updated = QuestionFlag.query.filter(
+        QuestionFlag.question_id.in_(question_ids),
+        QuestionFlag.status != 'resolved'
+    ).update({
+        'status': new_status,
+        'admin_notes': admin_notes,
+        'reviewed_at': datetime.utcnow()
+    }, synchronize_session=False)
+    db.session.commit()
+
+    return jsonify({"message": f"{updated} flags marked as {new_status}", "updated": updated}), 200
+
+
 # --- Resolve a Flag (Admin) ---
 @admin_bp.route('/resolve-flag/<int:flag_id>', methods=['POST'])
 @jwt_required()
@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify
 from models import User
 from database import db
+from utils.cache import bump_versions, USERS_VERSION
+from utils.projections import record_site_activity
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from datetime import datetime
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -49,6 +52,8 @@ def register():
 
     try:
         db.session.add(new_user)
+        record_site_activity(datetime.utcnow(), new_users=1)
+        bump_versions(USERS_VERSION)  # Invalidate cached user counts
         db.session.commit()
         return jsonify({"message": "User created successfully"}), 201
     except Exception as e:
@@ -74,7 +79,8 @@ def login():
     user = User.query.filter_by(username=username).first()
 
     if user and check_password_hash(user.password_hash, password):
-        access_token = create_access_token(identity=str(user.id))
+        # The admin flag travels in the token so admin_required needs no DB lookup
+        access_token = create_access_token(identity=str(user.id), additional_claims={"is_admin": user.is_admin})
         
         return jsonify({
             "access_token": access_token,
@@ -1,38 +1,68 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import Protocol, Question, TestResult, User, QuestionAttempt, QuestionFlag
+from flask import Blueprint, Response, jsonify, request
+from flask_jwt_extended import jwt_required
+from models import Protocol, Question, TestResult, QuestionAttempt, QuestionFlag, UserProtocolBest, UserQuestionStats
 from database import db
-import random
-from datetime import datetime, timedelta
+from utils.projections import record_test_result, record_attempt_projections, record_site_activity
+from utils.cache import get_version, protocol_version_key, protocol_payloads, serialize_question, leaderboard_cache
+from utils.question_bank import get_question_bank
+from utils.sampling import sample_question_ids, parse_difficulty_mix
+from utils.attempts import AnswerValidationError, parse_answers, verify_question_ids, insert_attempts
+from utils.attempt_queue import attempt_queue
+from utils.leaderboard import resolve_period, group_standings
+from utils.ranking import build_ranking
+from utils.identity import current_identity
+from utils.pagination import parse_cursor, make_cursor, after_cursor
+from utils.search import search_questions
+from sqlalchemy import case
+from datetime import datetime
 
 
 content_bp = Blueprint('content', __name__)
 
+# Upper bound on generated general tests (including per-category blueprints)
+MAX_GENERAL_TEST_QUESTIONS = 300
+
+# History filters accepted by /stats?type=
+HISTORY_TYPES = ('all', 'protocol', 'general')
+
 # --- Function 1: Get list of protocols (including scores) ---
 @content_bp.route('/protocols', methods=['GET'])
 @jwt_required()
 def get_protocols():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
 
     if not user:
         return jsonify({"message": "User not found"}), 404
 
-    protocols = Protocol.query.all()
-    
+    # Per-protocol question counts, aggregated once for the whole library
+    question_counts = db.session.query(
+        Question.protocol_id,
+        db.func.count(Question.id).label('question_count')
+    ).group_by(Question.protocol_id).subquery()
+
+    # Single query: every protocol + this user's rollup row + its question count
+    rows = db.session.query(
+        Protocol,
+        UserProtocolBest.best_score,
+        UserProtocolBest.last_attempt_at,
+        db.func.coalesce(question_counts.c.question_count, 0).label('question_count')
+    ).outerjoin(
+        UserProtocolBest,
+        db.and_(UserProtocolBest.protocol_id == Protocol.id, UserProtocolBest.user_id == user.id)
+    ).outerjoin(
+        question_counts, question_counts.c.protocol_id == Protocol.id
+    ).all()
+
     output = []
-    for p in protocols:
-        # Get the highest score for this user and protocol
-        best_result = TestResult.query.filter_by(user_id=user.id, protocol_id=p.id)\
-                                      .order_by(TestResult.score.desc())\
-                                      .first()
-        
+    for p, best_score, last_attempt_at, question_count in rows:
         output.append({
             'id': p.id,
             'title': p.title,
             'category': p.category, # Added category
             'description': p.description,
-            'best_score': best_result.score if best_result else None
+            'best_score': best_score,
+            'question_count': question_count,
+            'last_attempt': last_attempt_at.strftime("%d/%m/%Y %H:%M") if last_attempt_at else None
         })
     
     return jsonify(output), 200
@@ -41,78 +71,88 @@ def get_protocols():
 @content_bp.route('/protocol/<int:protocol_id>', methods=['GET'])
 @jwt_required()
 def get_protocol_data(protocol_id):
-    protocol = Protocol.query.get(protocol_id)
-    
-    if not protocol:
+    if db.session.query(Protocol.id).filter_by(id=protocol_id).first() is None:
         return jsonify({"message": "Protocol not found"}), 404
 
-    questions = Question.query.filter_by(protocol_id=protocol_id).all()
-    
-    # Randomize question order for each test session
-    random.shuffle(questions)
-
-    questions_output = []
-    for q in questions:
-        questions_output.append({
-            "id": q.id,
-            "text": q.text,
-            "options": {
-                "a": q.option_a,
-                "b": q.option_b,
-                "c": q.option_c,
-                "d": q.option_d
-            },
-            "correct_answer": q.correct_answer,
-            "explanation": q.explanation,
-            "source_reference": q.source_reference,
-            "difficulty_level": q.difficulty_level
-        })
+    # The payload is cached per protocol and rebuilt only when its bank version changes
+    version = get_version(protocol_version_key(protocol_id))
+
+    # Without a seed the questions come in bank order and the client shuffles
+    # them, so the ETag only changes with the bank and revalidation hits 304.
+    # ?seed= returns a seeded shuffle, so a client can replay the same session.
+    seed = request.args.get('seed', type=int)
+    etag = f"p{protocol_id}-v{version}" if seed is None else f"p{protocol_id}-v{version}-s{seed}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    payload = protocol_payloads.get(protocol_id, version)
+    if payload is None:
+        return jsonify({"message": "Protocol not found"}), 404
 
-    return jsonify({
-        "id": protocol.id,
-        "title": protocol.title,
-        "questions": questions_output
-    }), 200
+    response = Response(payload.render(seed), status=200, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 # --- Function 3: Save test score and individual attempts ---
 @content_bp.route('/submit-test', methods=['POST'])
 @jwt_required()
 def submit_test():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
 
-    data = request.get_json()
+    data = request.get_json() or {}
     protocol_id = data.get('protocol_id')  # Can be null for general tests
     score = data.get('score')
-    answers = data.get('answers', [])  # Optional: list of {question_id, user_answer, is_correct}
+
+    if isinstance(score, bool) or not isinstance(score, int):
+        return jsonify({"message": "score must be an integer"}), 400
+
+    # Validate the answer list once and verify its question IDs in one query
+    # (optional: list of {question_id, user_answer, is_correct})
+    try:
+        answers = parse_answers(data.get('answers'))
+        verify_question_ids(answers)
+    except AnswerValidationError as e:
+        return jsonify({"message": str(e)}), 400
 
     # Save the overall test result
+    taken_at = datetime.utcnow()
     new_result = TestResult(
         user_id=user.id,
         protocol_id=protocol_id,  # null = general test
-        score=score
+        score=score,
+        date_taken=taken_at
     )
     db.session.add(new_result)
+    db.session.flush()  # Attempts reference the result's ID
 
-    # Save individual question attempts (for weakness tracking)
-    for answer in answers:
-        question_id = answer.get('question_id')
-        user_answer = answer.get('user_answer')
-        is_correct = answer.get('is_correct', False)
-        
-        attempt = QuestionAttempt(
-            user_id=user.id,
-            question_id=question_id,
-            user_answer=user_answer,
-            is_correct=is_correct
-        )
-        db.session.add(attempt)
+    # Keep the result rollups current (protocols library, daily activity) - same transaction
+    record_test_result(user.id, protocol_id, score, taken_at)
+
+    # Save individual question attempts (for weakness tracking) - one multi-row INSERT,
+    # plus the projections derived from them (mastery stats)
+    write_behind = attempt_queue.enabled and bool(answers)
+    if not write_behind:
+        insert_attempts(user.id, answers, taken_at, new_result.id)
+        record_attempt_projections(user.id, answers, taken_at)
 
     db.session.commit()
 
+    # Write-behind mode: the TestResult is committed, the attempts go to the background writer
+    if write_behind and not attempt_queue.submit(user.id, answers, taken_at, new_result.id):
+        # Queue is full (backpressure) - write them synchronously instead
+        insert_attempts(user.id, answers, taken_at, new_result.id)
+        record_attempt_projections(user.id, answers, taken_at)
+        db.session.commit()
+
+    # Leaderboards changed - drop this worker's cached results
+    leaderboard_cache.invalidate()
+
     return jsonify({"message": "Score saved successfully!", "score": score}), 201
 
 
@@ -120,33 +160,42 @@ def submit_test():
 @content_bp.route('/general-test', methods=['GET'])
 @jwt_required()
 def get_general_test():
-    # 1. Get all questions from the system
-    all_questions = Question.query.all()
+    # Optional blueprint parameters:
+    #   count          - total questions (default 100)
+    #   per_category   - questions from each protocol category (overrides count)
+    #   difficulty_mix - weights per difficulty level, e.g. "1:50,2:30,3:20"
+    count = request.args.get('count', 100, type=int)
+    per_category = request.args.get('per_category', type=int)
+    try:
+        difficulty_mix = parse_difficulty_mix(request.args.get('difficulty_mix'))
+    except ValueError:
+        return jsonify({"message": "Invalid difficulty_mix. Expected format: 1:50,2:30,3:20"}), 400
+
+    if count < 1 or count > MAX_GENERAL_TEST_QUESTIONS or (per_category is not None and per_category < 1):
+        return jsonify({"message": f"Question count must be between 1 and {MAX_GENERAL_TEST_QUESTIONS}"}), 400
+
+    # 1. Sample question IDs only, from the in-memory bank indexes
+    bank = get_question_bank()
+    if per_category is not None and per_category * len(bank.by_category) > MAX_GENERAL_TEST_QUESTIONS:
+        max_per_category = MAX_GENERAL_TEST_QUESTIONS // max(len(bank.by_category), 1)
+        return jsonify({
+            "message": f"per_category can be at most {max_per_category} "
+                       f"({len(bank.by_category)} categories, {MAX_GENERAL_TEST_QUESTIONS} questions max)",
+            "max_per_category": max_per_category
+        }), 400
+    question_ids = sample_question_ids(bank, count, per_category, difficulty_mix)
 
-    # 2. Randomly select questions
-    # Select 100 questions, or all questions if less than 100 exist
-    num_questions = min(len(all_questions), 100)
-    selected_questions = random.sample(all_questions, num_questions)
+    # 2. Resolve exactly the sampled IDs (records already carry the protocol title)
+    selected_questions = bank.get(question_ids)
+    num_questions = len(selected_questions)
 
     # 3. Format the data for response
     questions_output = []
     for q in selected_questions:
-        questions_output.append({
-            "id": q.id,
-            "text": q.text,
-            # Bonus: include protocol title so user knows which topic the question is from
-            "protocol_title": q.protocol.title, 
-            "options": {
-                "a": q.option_a,
-                "b": q.option_b,
-                "c": q.option_c,
-                "d": q.option_d
-            },
-            "correct_answer": q.correct_answer,
-            "explanation": q.explanation,
-            "source_reference": q.source_reference,
-            "difficulty_level": q.difficulty_level
-        })
+        question_data = serialize_question(q)
+        # Bonus: include protocol title so user knows which topic the question is from
+        question_data["protocol_title"] = q.protocol_title
+        questions_output.append(question_data)
 
     return jsonify({
         "title": "מבחן מסכם רב-תחומי 🚑",
@@ -159,39 +208,27 @@ def get_general_test():
 @content_bp.route('/weakness-test', methods=['GET'])
 @jwt_required()
 def get_weakness_test():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
 
-    # 1. Calculate NET weakness score: failures - successes for each question
-    # Using CASE statement to count correct vs incorrect separately
-    from sqlalchemy import case
-    
-    weakness_scores = db.session.query(
-        QuestionAttempt.question_id,
-        db.func.sum(case((QuestionAttempt.is_correct == False, 1), else_=0)).label('fail_count'),
-        db.func.sum(case((QuestionAttempt.is_correct == True, 1), else_=0)).label('pass_count')
-    ).filter(
-        QuestionAttempt.user_id == user.id
-    ).group_by(QuestionAttempt.question_id).all()
-
-    # 2. Filter to questions where failures > successes (net score > 0)
-    weak_questions = []
-    for score in weakness_scores:
-        net_score = score.fail_count - score.pass_count
-        if net_score > 0:  # Only include if still weak
-            weak_questions.append({
-                'question_id': score.question_id,
-                'fail_count': score.fail_count,
-                'pass_count': score.pass_count,
-                'net_score': net_score
-            })
-
-    # Sort by net score (highest weakness first)
-    weak_questions.sort(key=lambda x: x['net_score'], reverse=True)
-    weak_questions = weak_questions[:30]  # Limit to top 30
+    # 1. Top-N read from the mastery projection (indexed on user_id, net_score)
+    #    Only questions where failures > successes (net score > 0) are still weak
+    weakness_scores = UserQuestionStats.query.filter(
+        UserQuestionStats.user_id == user.id,
+        UserQuestionStats.net_score > 0
+    ).order_by(
+        UserQuestionStats.net_score.desc(),
+        UserQuestionStats.last_seen_at.desc()
+    ).limit(30).all()
+
+    weak_questions = [{
+        'question_id': score.question_id,
+        'fail_count': score.fail_count,
+        'pass_count': score.pass_count,
+        'net_score': score.net_score
+    } for score in weakness_scores]
 
     if not weak_questions:
         return jsonify({
@@ -201,37 +238,27 @@ def get_weakness_test():
             "no_weaknesses": True
         }), 200
 
-    # 3. Get the actual Question objects
+    # 2. Resolve the questions against the in-memory bank
     question_ids = [wq['question_id'] for wq in weak_questions]
-    questions = Question.query.filter(Question.id.in_(question_ids)).all()
+    questions = get_question_bank().get(question_ids)
     
     # Create lookups for scores
     score_map = {wq['question_id']: wq for wq in weak_questions}
 
-    # 4. Format output (sorted by net_score)
+    # 3. Format output (already sorted by net_score)
     questions_output = []
-    for q in sorted(questions, key=lambda x: score_map.get(x.id, {}).get('net_score', 0), reverse=True):
-        wq = score_map.get(q.id, {})
-        questions_output.append({
-            "id": q.id,
-            "text": q.text,
-            "protocol_title": q.protocol.title,
-            "fail_count": wq.get('fail_count', 0),
-            "pass_count": wq.get('pass_count', 0),
-            "net_score": wq.get('net_score', 0),
-            "options": {
-                "a": q.option_a,
-                "b": q.option_b,
-                "c": q.option_c,
-                "d": q.option_d
-            },
-            "correct_answer": q.correct_answer,
-            "explanation": q.explanation,
-            "source_reference": q.source_reference,
-            "difficulty_level": q.difficulty_level
+    for q in questions:
+        wq = score_map[q.id]
+        question_data = serialize_question(q)
+        question_data.update({
+            "protocol_title": q.protocol_title,
+            "fail_count": wq['fail_count'],
+            "pass_count": wq['pass_count'],
+            "net_score": wq['net_score']
         })
+        questions_output.append(question_data)
 
-    # 5. Limit to 20 questions for the test
+    # 4. Limit to 20 questions for the test
     questions_output = questions_output[:20]
 
     return jsonify({
@@ -245,74 +272,88 @@ def get_weakness_test():
 @content_bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_stats():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
 
-    # 1. Get all results for the user (newest first)
-    all_results = TestResult.query.filter_by(user_id=user.id).order_by(TestResult.date_taken.desc()).all()
-
-    # 2. Separate results by type (protocol tests vs general tests)
-    protocol_results = [r for r in all_results if r.protocol_id is not None]
-    general_results = [r for r in all_results if r.protocol_id is None]
-
-    # 3. Calculate statistics for protocol tests
-    protocol_total = len(protocol_results)
-    protocol_avg = 0
-    if protocol_total > 0:
-        protocol_avg = round(sum(r.score for r in protocol_results) / protocol_total)
-
-    # 4. Calculate statistics for general tests
-    general_total = len(general_results)
-    general_avg = 0
-    if general_total > 0:
-        general_avg = round(sum(r.score for r in general_results) / general_total)
-
-    # 5. Format protocol test history
-    protocol_history = []
-    for r in protocol_results:
-        protocol_title = "פרוטוקול נמחק"
-        p = Protocol.query.get(r.protocol_id)
-        if p:
-            protocol_title = p.title
-
-        protocol_history.append({
-            "id": r.id,
-            "date": r.date_taken.strftime("%d/%m/%Y %H:%M"),
-            "protocol": protocol_title,
-            "score": r.score
-        })
-
-    # 6. Format general test history
-    general_history = []
-    for r in general_results:
-        general_history.append({
-            "id": r.id,
-            "date": r.date_taken.strftime("%d/%m/%Y %H:%M"),
-            "protocol": "מבחן מסכם רב-תחומי",
-            "score": r.score
-        })
+    # History is served in keyset pages of one test type:
+    # ?type=all|protocol|general&limit=&before=<date_taken ISO>,<id>
+    history_type = request.args.get('type', 'all')
+    if history_type not in HISTORY_TYPES:
+        return jsonify({"message": f"type must be one of: {', '.join(HISTORY_TYPES)}"}), 400
+
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    before = request.args.get('before')
+    try:
+        cursor = parse_cursor(before) if before else None
+    except ValueError:
+        return jsonify({"message": "Invalid cursor. Expected format: <date_taken ISO>,<id>"}), 400
+
+    # 1. Totals and averages per test type, computed in one aggregate query
+    is_protocol_test = TestResult.protocol_id.isnot(None)
+    totals = db.session.query(
+        db.func.count(TestResult.id).label('total'),
+        db.func.avg(TestResult.score).label('average'),
+        db.func.count(TestResult.protocol_id).label('protocol_total'),
+        db.func.avg(case((is_protocol_test, TestResult.score))).label('protocol_average'),
+        db.func.avg(case((TestResult.protocol_id.is_(None), TestResult.score))).label('general_average')
+    ).filter(TestResult.user_id == user.id).one()
+
+    protocol_total = totals.protocol_total
+    general_total = totals.total - protocol_total
+
+    # 2. One page of the requested history (newest first) with protocol titles joined in
+    page_query = db.session.query(
+        TestResult.id, TestResult.protocol_id, TestResult.score, TestResult.date_taken, Protocol.title
+    ).outerjoin(
+        Protocol, Protocol.id == TestResult.protocol_id
+    ).filter(TestResult.user_id == user.id)
+
+    if history_type == 'protocol':
+        page_query = page_query.filter(is_protocol_test)
+    elif history_type == 'general':
+        page_query = page_query.filter(TestResult.protocol_id.is_(None))
+
+    if cursor:
+        page_query = after_cursor(page_query, TestResult.date_taken, TestResult.id, cursor)
+
+    page = page_query.order_by(TestResult.date_taken.desc(), TestResult.id.desc()).limit(limit + 1).all()
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    history = [{
+        "id": r.id,
+        "date": r.date_taken.strftime("%d/%m/%Y %H:%M"),
+        "score": r.score,
+        "type": "protocol" if r.protocol_id is not None else "general",
+        "protocol": (r.title or "פרוטוקול נמחק") if r.protocol_id is not None else "מבחן מסכם רב-תחומי"
+    } for r in page]
+
+    next_cursor = make_cursor(page[-1].date_taken, page[-1].id) if has_more else None
 
     return jsonify({
         # Overall stats
-        "total_tests": len(all_results),
-        "average_score": round(sum(r.score for r in all_results) / len(all_results)) if all_results else 0,
+        "total_tests": totals.total,
+        "average_score": round(totals.average) if totals.average is not None else 0,
         
         # Protocol tests stats
         "protocol_stats": {
             "total": protocol_total,
-            "average": protocol_avg,
-            "history": protocol_history
+            "average": round(totals.protocol_average) if totals.protocol_average is not None else 0
         },
         
         # General tests stats
         "general_stats": {
             "total": general_total,
-            "average": general_avg,
-            "history": general_history
-        }
+            "average": round(totals.general_average) if totals.general_average is not None else 0
+        },
+
+        # One page of history of the requested type (pass next_cursor as ?before= with the same type)
+        "type": history_type,
+        "history": history,
+        "next_cursor": next_cursor,
+        "limit": limit
     }), 200
 
 
@@ -320,137 +361,76 @@ def get_stats():
 @content_bp.route('/leaderboard', methods=['GET'])
 @jwt_required()
 def get_leaderboard():
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(int(current_user_id))
+    current_user = current_identity()
     
     if not current_user:
         return jsonify({"message": "User not found"}), 404
 
     # Get time period filter (default: weekly)
-    period = request.args.get('period', 'weekly')  # weekly, monthly, all
-    
-    # Calculate date filter
-    now = datetime.utcnow()
-    if period == 'weekly':
-        date_filter = now - timedelta(days=7)
-        period_name = "שבועי"
-    elif period == 'monthly':
-        date_filter = now - timedelta(days=30)
-        period_name = "חודשי"
-    else:  # all time
-        date_filter = None
-        period_name = "כל הזמנים"
+    period, first_day, period_name = resolve_period(request.args.get('period', 'weekly'))  # weekly, monthly, all
 
     # Get ranking mode from query param (default: avg_score)
     rank_by = request.args.get('rank_by', 'avg_score')  # 'avg_score' or 'correct_answers'
+    if rank_by not in ('avg_score', 'correct_answers'):
+        rank_by = 'avg_score'
 
     # Optional group filter
-    group_id = request.args.get('group_id')
-    group_member_ids = None
+    group_id = request.args.get('group_id', type=int)
     group_name = None
     
     if group_id:
-        from models import GroupMember, Group
-        group = Group.query.get(int(group_id))
+        from models import Group
+        group = Group.query.get(group_id)
         if group:
             group_name = group.name
-            group_member_ids = [m.user_id for m in GroupMember.query.filter_by(group_id=int(group_id)).all()]
-
-    # Get correct answers per user from QuestionAttempt
-    correct_answers_subquery = db.session.query(
-        QuestionAttempt.user_id,
-        db.func.count(QuestionAttempt.id).label('correct_answers')
-    ).filter(QuestionAttempt.is_correct == True)
-    
-    if date_filter:
-        correct_answers_subquery = correct_answers_subquery.filter(QuestionAttempt.created_at >= date_filter)
-    
-    correct_answers_subquery = correct_answers_subquery.group_by(QuestionAttempt.user_id).subquery()
-
-    # Build query for aggregated stats per user
-    query = db.session.query(
-        User.id,
-        User.display_name,
-        db.func.count(TestResult.id).label('tests_taken'),
-        db.func.avg(TestResult.score).label('avg_score'),
-        db.func.sum(TestResult.score).label('total_points'),
-        db.func.coalesce(correct_answers_subquery.c.correct_answers, 0).label('correct_answers')
-    ).join(TestResult, User.id == TestResult.user_id
-    ).outerjoin(correct_answers_subquery, User.id == correct_answers_subquery.c.user_id)
-    
-    # Apply date filter if not all-time
-    if date_filter:
-        query = query.filter(TestResult.date_taken >= date_filter)
+        else:
+            group_id = None
+
+    # Pagination (browse beyond the top 20) and "users around me" window size
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    around = min(max(request.args.get('around', 3, type=int), 0), 25)
+
+    # Exact ranking over the daily activity rollup (cached snapshot, O(log n) lookups)
+    snapshot = leaderboard_cache.get_or_compute(
+        ('leaderboard', period, first_day, rank_by, group_id),
+        lambda: build_ranking(first_day, rank_by, group_id)
+    )
 
-    # Apply group filter if specified
-    if group_member_ids:
-        query = query.filter(User.id.in_(group_member_ids))
-    
-    # Order by selected ranking mode
-    if rank_by == 'correct_answers':
-        results = query.group_by(User.id, correct_answers_subquery.c.correct_answers).order_by(
-            db.func.coalesce(correct_answers_subquery.c.correct_answers, 0).desc(),
-            db.func.avg(TestResult.score).desc()
-        ).limit(20).all()
-    else:  # avg_score (default)
-        results = query.group_by(User.id, correct_answers_subquery.c.correct_answers).order_by(
-            db.func.avg(TestResult.score).desc(),
-            db.func.count(TestResult.id).desc()
-        ).limit(20).all()
+    def format_entry(rank, entry):
+        return {
+            "rank": rank,
+            **entry,
+            "is_current_user": entry['user_id'] == current_user.id
+        }
 
     # Build leaderboard output
-    leaderboard = []
-    for i, r in enumerate(results):
-        leaderboard.append({
-            "rank": i + 1,
-            "user_id": r.id,
-            "display_name": r.display_name,
-            "tests_taken": r.tests_taken,
-            "avg_score": round(r.avg_score, 1) if r.avg_score else 0,
-            "total_points": r.total_points or 0,
-            "correct_answers": r.correct_answers or 0,
-            "is_current_user": r.id == current_user.id
-        })
+    leaderboard = [format_entry(rank, e) for rank, e in snapshot.page((page - 1) * per_page, per_page)]
 
-    # Find current user's rank if not in top 20
-    current_user_rank = None
+    # Current user's true rank, percentile and neighbours
+    current_user_rank = snapshot.rank_of(current_user.id)
+    my_rank = None
+    around_me = []
     current_user_stats = None
-    is_in_top_20 = any(entry['is_current_user'] for entry in leaderboard)
-    
-    if not is_in_top_20:
-        # Get current user's stats
-        user_query = db.session.query(
-            db.func.count(TestResult.id).label('tests_taken'),
-            db.func.avg(TestResult.score).label('avg_score'),
-            db.func.sum(TestResult.score).label('total_points')
-        ).filter(TestResult.user_id == current_user.id)
-        
-        if date_filter:
-            user_query = user_query.filter(TestResult.date_taken >= date_filter)
-        
-        user_stats = user_query.first()
-        
-        if user_stats and user_stats.tests_taken > 0:
-            # Count how many users are ahead
-            rank_query = db.session.query(
-                db.func.count(db.distinct(User.id))
-            ).join(TestResult, User.id == TestResult.user_id)
-            
-            if date_filter:
-                rank_query = rank_query.filter(TestResult.date_taken >= date_filter)
-            
-            rank_query = rank_query.filter(
-                db.func.coalesce(db.func.avg(TestResult.score), 0) > (user_stats.avg_score or 0)
-            )
-            # This is a simplified rank calculation
-            current_user_rank = len(results) + 1 if user_stats.avg_score else None
-            
+
+    if current_user_rank:
+        my_rank = {
+            "rank": current_user_rank,
+            "percentile": snapshot.percentile(current_user_rank),
+            "total": len(snapshot)
+        }
+        around_me = [format_entry(rank, e) for rank, e in snapshot.around(current_user.id, around)]
+
+        # Shown separately when the user is not on the current page
+        if not any(entry['is_current_user'] for entry in leaderboard):
+            _, me = snapshot.page(current_user_rank - 1, 1)[0]
             current_user_stats = {
                 "rank": current_user_rank,
+                "percentile": my_rank["percentile"],
                 "display_name": current_user.display_name,
-                "tests_taken": user_stats.tests_taken,
-                "avg_score": round(user_stats.avg_score, 1) if user_stats.avg_score else 0,
-                "total_points": user_stats.total_points or 0
+                "tests_taken": me['tests_taken'],
+                "avg_score": me['avg_score'],
+                "total_points": me['total_points']
             }
 
     return jsonify({
@@ -458,8 +438,13 @@ def get_leaderboard():
         "period_name": period_name,
         "leaderboard": leaderboard,
         "current_user": current_user_stats,
-        "total_participants": len(results),
-        "group_id": int(group_id) if group_id else None,
+        "my_rank": my_rank,
+        "around_me": around_me,
+        "total_participants": len(snapshot),
+        "page": page,
+        "per_page": per_page,
+        "total_pages": (len(snapshot) + per_page - 1) // per_page,
+        "group_id": group_id,
         "group_name": group_name
     }), 200
 
@@ -468,83 +453,22 @@ def get_leaderboard():
 @content_bp.route('/groups-leaderboard', methods=['GET'])
 @jwt_required()
 def get_groups_leaderboard():
-    from models import Group, GroupMember
-    
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(int(current_user_id))
+    current_user = current_identity()
     
     if not current_user:
         return jsonify({"message": "User not found"}), 404
 
     # Get time period filter
-    period = request.args.get('period', 'weekly')
-    now = datetime.utcnow()
-    
-    if period == 'weekly':
-        date_filter = now - timedelta(days=7)
-        period_name = "שבועי"
-    elif period == 'monthly':
-        date_filter = now - timedelta(days=30)
-        period_name = "חודשי"
-    else:
-        date_filter = None
-        period_name = "כל הזמנים"
-
-    # Get all groups
-    all_groups = Group.query.all()
-    
-    results = []
-    for group in all_groups:
-        # Get member IDs for this group
-        member_ids = [m.user_id for m in GroupMember.query.filter_by(group_id=group.id).all()]
-        
-        if not member_ids:
-            continue
-            
-        # Calculate total correct answers for all members
-        correct_query = QuestionAttempt.query.filter(
-            QuestionAttempt.user_id.in_(member_ids),
-            QuestionAttempt.is_correct == True
-        )
-        if date_filter:
-            correct_query = correct_query.filter(QuestionAttempt.created_at >= date_filter)
-        
-        total_correct = correct_query.count()
-        
-        # Find top contributor in this group
-        top_contributor = None
-        top_count = 0
-        for member_id in member_ids:
-            member_query = QuestionAttempt.query.filter(
-                QuestionAttempt.user_id == member_id,
-                QuestionAttempt.is_correct == True
-            )
-            if date_filter:
-                member_query = member_query.filter(QuestionAttempt.created_at >= date_filter)
-            count = member_query.count()
-            if count > top_count:
-                top_count = count
-                member = User.query.get(member_id)
-                top_contributor = member.display_name if member else "Unknown"
-        
-        results.append({
-            "group_id": group.id,
-            "group_name": group.name,
-            "total_correct_answers": total_correct,
-            "member_count": len(member_ids),
-            "top_contributor": top_contributor,
-            "top_contributor_score": top_count
-        })
-    
-    # Sort by total correct answers
-    results.sort(key=lambda x: x["total_correct_answers"], reverse=True)
-    
-    # Add ranks
-    for i, r in enumerate(results):
-        r["rank"] = i + 1
+    period, first_day, period_name = resolve_period(request.args.get('period', 'weekly'))
+
+    # Totals, member counts and top contributors for every group in one grouped query
+    results, memberships = leaderboard_cache.get_or_compute(
+        ('groups-leaderboard', period, first_day, None, None),
+        lambda: group_standings(first_day)
+    )
     
     # Find current user's group rank (if they're in any group)
-    user_group_ids = [m.group_id for m in GroupMember.query.filter_by(user_id=current_user.id).all()]
+    user_group_ids = set(memberships.get(current_user.id, []))
     user_groups_ranked = [r for r in results if r["group_id"] in user_group_ids]
 
     return jsonify({
@@ -555,12 +479,78 @@ def get_groups_leaderboard():
     }), 200
 
 
+# --- Search the question bank ---
+@content_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search():
+    user = current_identity()
+
+    if not user:
+        return jsonify({"message": "User not found"}), 404
+
+    query_text = request.args.get('q', '').strip()
+    if not query_text:
+        return jsonify({"message": "q is required"}), 400
+    if len(query_text) > 200:
+        return jsonify({"message": "Query too long"}), 400
+
+    protocol_id = request.args.get('protocol_id', type=int)
+    difficulty = request.args.get('difficulty', type=int)
+    if difficulty is not None and difficulty not in [1, 2, 3]:
+        return jsonify({"message": "difficulty must be 1, 2 or 3"}), 400
+
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+
+    total, hits = search_questions(
+        query_text, protocol_id=protocol_id, difficulty=difficulty,
+        offset=(page - 1) * per_page, limit=per_page
+    )
+
+    # Load the page's questions with their protocol in one query
+    rows = {}
+    if hits:
+        rows = {q.id: (q, title) for q, title in db.session.query(Question, Protocol.title).join(
+            Protocol, Protocol.id == Question.protocol_id
+        ).filter(Question.id.in_([qid for qid, _ in hits]))}
+
+    results = []
+    for question_id, score in hits:
+        if question_id not in rows:
+            continue  # Deleted since it was indexed
+        q, protocol_title = rows[question_id]
+        result = {
+            "id": q.id,
+            "protocol_id": q.protocol_id,
+            "protocol_title": protocol_title,
+            "text": q.text,
+            "options": {"a": q.option_a, "b": q.option_b, "c": q.option_c, "d": q.option_d},
+            "difficulty_level": q.difficulty_level,
+            "score": score
+        }
+        if user.is_admin:
+            result.update({
+                "correct_answer": q.correct_answer,
+                "explanation": q.explanation,
+                "source_reference": q.source_reference
+            })
+        results.append(result)
+
+    return jsonify({
+        "query": query_text,
+        "results": results,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "has_more": page * per_page < total
+    }), 200
+
+
 # --- Flag a question for QA review ---
 @content_bp.route('/flag-question', methods=['POST'])
 @jwt_required()
 def flag_question():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -594,6 +584,7 @@ def flag_question():
         reason=reason if reason else "No reason provided"
     )
     db.session.add(new_flag)
+    record_site_activity(datetime.utcnow(), flags=1)
     db.session.commit()
 
     return jsonify({
@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import QuestionComment, Question, User
+from models import QuestionComment, Question
 from database import db
+from utils.identity import current_identity
 
 discussion_bp = Blueprint('discussion', __name__)
 
@@ -10,8 +11,7 @@ discussion_bp = Blueprint('discussion', __name__)
 @discussion_bp.route('/comments', methods=['POST'])
 @jwt_required()
 def add_comment():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -1,8 +1,17 @@
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import Group, GroupMember, User, TestResult, GroupPost, GroupPostComment, GroupGoal
+from flask_jwt_extended import jwt_required
+from models import (
+    Group, GroupMember, User, GroupPost, GroupPostComment, GroupGoal, GoalProgress, GoalContribution,
+    UserDailyActivity
+)
 from database import db
-from datetime import datetime, timedelta
+from utils.cache import leaderboard_cache
+from utils.identity import current_identity, invalidate_identity
+from utils.leaderboard import resolve_period, group_member_stats
+from utils.projections import rebuild_goal_progress, add_member_goal_progress, remove_member_goal_progress
+from utils.goal_lifecycle import goal_value, close_goal
+from sqlalchemy.orm import joinedload
+from datetime import datetime
 import random
 import string
 
@@ -19,12 +28,15 @@ def generate_invite_code(length=6):
             return code
 
 
+# Goal types whose team view lists the top contributors
+CONTRIBUTOR_TYPES = ('tests_count', 'correct_answers')
+
+
 # --- Create a new group ---
 @groups_bp.route('/create', methods=['POST'])
 @jwt_required()
 def create_group():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -53,6 +65,7 @@ def create_group():
         role='admin'
     )
     db.session.add(admin_member)
+    invalidate_identity(user.id)
     db.session.commit()
 
     return jsonify({
@@ -69,8 +82,7 @@ def create_group():
 @groups_bp.route('/join', methods=['POST'])
 @jwt_required()
 def join_group():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -102,6 +114,9 @@ def join_group():
         role='member'
     )
     db.session.add(new_member)
+    db.session.flush()
+    add_member_goal_progress(group.id, user.id)
+    invalidate_identity(user.id)
     db.session.commit()
 
     return jsonify({
@@ -117,24 +132,66 @@ def join_group():
 @groups_bp.route('/my-groups', methods=['GET'])
 @jwt_required()
 def get_my_groups():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
 
-    memberships = GroupMember.query.filter_by(user_id=user.id).all()
+    _, week_start, _ = resolve_period('weekly')
+    my_group_ids = db.session.query(GroupMember.group_id).filter(GroupMember.user_id == user.id)
+
+    # Per-group aggregates, each grouped by group_id and limited to the user's groups
+    member_counts = db.session.query(
+        GroupMember.group_id, db.func.count(GroupMember.id).label('member_count')
+    ).filter(GroupMember.group_id.in_(my_group_ids)).group_by(GroupMember.group_id).subquery()
+
+    weekly_correct = db.session.query(
+        GroupMember.group_id, db.func.sum(UserDailyActivity.correct_answers).label('correct_answers')
+    ).join(
+        UserDailyActivity, db.and_(
+            UserDailyActivity.user_id == GroupMember.user_id,
+            UserDailyActivity.day >= week_start
+        )
+    ).filter(GroupMember.group_id.in_(my_group_ids)).group_by(GroupMember.group_id).subquery()
+
+    # Posts by others since the user last opened the feed (or joined)
+    reader = db.aliased(GroupMember)
+    unread_posts = db.session.query(
+        GroupPost.group_id, db.func.count(GroupPost.id).label('unread_posts')
+    ).join(
+        reader, db.and_(reader.group_id == GroupPost.group_id, reader.user_id == user.id)
+    ).filter(
+        GroupPost.user_id != user.id,
+        GroupPost.created_at > db.func.coalesce(reader.last_read_at, reader.joined_at)
+    ).group_by(GroupPost.group_id).subquery()
+
+    # The whole listing in one joined query
+    rows = db.session.query(
+        GroupMember,
+        Group,
+        db.func.coalesce(member_counts.c.member_count, 0),
+        db.func.coalesce(unread_posts.c.unread_posts, 0),
+        db.func.coalesce(weekly_correct.c.correct_answers, 0)
+    ).join(
+        Group, Group.id == GroupMember.group_id
+    ).outerjoin(
+        member_counts, member_counts.c.group_id == Group.id
+    ).outerjoin(
+        unread_posts, unread_posts.c.group_id == Group.id
+    ).outerjoin(
+        weekly_correct, weekly_correct.c.group_id == Group.id
+    ).filter(GroupMember.user_id == user.id).order_by(GroupMember.joined_at).all()
 
     groups = []
-    for m in memberships:
-        group = m.group
-        member_count = GroupMember.query.filter_by(group_id=group.id).count()
+    for m, group, member_count, unread_count, week_correct in rows:
         groups.append({
             "id": group.id,
             "name": group.name,
             "description": group.description,
             "role": m.role,
-            "member_count": member_count,
+            "member_count": int(member_count),
+            "unread_posts": int(unread_count),
+            "weekly_correct_answers": int(week_correct),
             "joined_at": m.joined_at.strftime("%d/%m/%Y")
         })
 
@@ -145,43 +202,29 @@ def get_my_groups():
 @groups_bp.route('/<int:group_id>', methods=['GET'])
 @jwt_required()
 def get_group_details(group_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
 
     # Check if user is a member
-    membership = GroupMember.query.filter_by(
-        group_id=group_id, 
-        user_id=user.id
-    ).first()
-    
-    if not membership:
+    role = user.role_in(group_id)
+    if not role:
         return jsonify({"message": "You are not a member of this group"}), 403
 
     group = Group.query.get(group_id)
     if not group:
         return jsonify({"message": "Group not found"}), 404
 
-    # Get all members with their stats
-    members = []
-    for m in group.members:
-        member_user = m.user
-        # Get member's test stats
-        test_count = TestResult.query.filter_by(user_id=member_user.id).count()
-        avg_score_result = db.session.query(
-            db.func.avg(TestResult.score)
-        ).filter(TestResult.user_id == member_user.id).scalar()
-        
-        members.append({
-            "user_id": member_user.id,
-            "display_name": member_user.display_name,
-            "role": m.role,
-            "tests_taken": test_count,
-            "avg_score": round(avg_score_result, 1) if avg_score_result else 0,
-            "joined_at": m.joined_at.strftime("%d/%m/%Y")
-        })
+    # Get all members with their stats (one grouped query over the activity rollup)
+    members = [{
+        "user_id": m["user_id"],
+        "display_name": m["display_name"],
+        "role": m["role"],
+        "tests_taken": m["tests_taken"],
+        "avg_score": m["avg_score"],
+        "joined_at": m["joined_at"].strftime("%d/%m/%Y")
+    } for m in group_member_stats(group_id)]
 
     # Sort by avg_score descending
     members.sort(key=lambda x: x['avg_score'], reverse=True)
@@ -191,9 +234,9 @@ def get_group_details(group_id):
             "id": group.id,
             "name": group.name,
             "description": group.description,
-            "invite_code": group.invite_code if membership.role == 'admin' else None,
+            "invite_code": group.invite_code if role == 'admin' else None,
             "created_at": group.created_at.strftime("%d/%m/%Y"),
-            "is_admin": membership.role == 'admin'
+            "is_admin": role == 'admin'
         },
         "members": members,
         "member_count": len(members)
@@ -204,93 +247,46 @@ def get_group_details(group_id):
 @groups_bp.route('/<int:group_id>/leaderboard', methods=['GET'])
 @jwt_required()
 def get_group_leaderboard(group_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
 
     # Check if user is a member
-    membership = GroupMember.query.filter_by(
-        group_id=group_id, 
-        user_id=user.id
-    ).first()
-    
-    if not membership:
+    role = user.role_in(group_id)
+    if not role:
         return jsonify({"message": "You are not a member of this group"}), 403
 
     group = Group.query.get(group_id)
     
     # Get period filter
-    period = request.args.get('period', 'weekly')
-    now = datetime.utcnow()
-    
-    if period == 'weekly':
-        date_filter = now - timedelta(days=7)
-        period_name = "שבועי"
-    elif period == 'monthly':
-        date_filter = now - timedelta(days=30)
-        period_name = "חודשי"
-    else:
-        date_filter = None
-        period_name = "כל הזמנים"
-
-    # Get member IDs
-    member_ids = [m.user_id for m in group.members]
-
-    # New Ranking Logic:
-    # 1. Total Correct Answers (Quality/Effort)
-    # 2. Average Score (Skill)
-    
-    from models import QuestionAttempt
-    
-    # Base query for stats
-    results = []
-    
-    for member_id in member_ids:
-        # Get member info
-        member_user = User.query.get(member_id)
-        
-        # Helper to apply date filter to queries
-        def apply_date(q, date_col):
-            if date_filter:
-                return q.filter(date_col >= date_filter)
-            return q
-
-        # Calculate Correct Answers
-        correct_q = QuestionAttempt.query.filter(
-            QuestionAttempt.user_id == member_id, 
-            QuestionAttempt.is_correct == True
-        )
-        correct_count = apply_date(correct_q, QuestionAttempt.created_at).count()
+    period, first_day, period_name = resolve_period(request.args.get('period', 'weekly'))
+
+    # Member stats don't depend on the caller - cache them per (period, group)
+    def compute_standings():
+        # New Ranking Logic:
+        # 1. Total Correct Answers (Quality/Effort)
+        # 2. Average Score (Skill)
+        results = [
+            {key: m[key] for key in ("user_id", "display_name", "tests_taken", "avg_score", "correct_answers")}
+            for m in group_member_stats(group_id, first_day)
+            # Only include if they have activity in this period
+            if m["tests_taken"] > 0 or m["correct_answers"] > 0
+        ]
+
+        # Sort by Correct Answers (primary) and Avg Score (secondary)
+        results.sort(key=lambda x: (x['correct_answers'], x['avg_score']), reverse=True)
+        return results
+
+    standings = leaderboard_cache.get_or_compute(
+        ('group-leaderboard', period, first_day, None, group_id),
+        compute_standings
+    )
 
-        # Calculate Tests Taken & Avg Score
-        test_q = TestResult.query.filter(TestResult.user_id == member_id)
-        test_q = apply_date(test_q, TestResult.date_taken)
-        
-        tests_taken = test_q.count()
-        avg_score = test_q.with_entities(db.func.avg(TestResult.score)).scalar()
-        avg_score = round(avg_score, 1) if avg_score else 0
-
-        # Only include if they have activity in this period (optional, but cleaner)
-        if tests_taken > 0 or correct_count > 0:
-            results.append({
-                "user_id": member_id,
-                "display_name": member_user.display_name,
-                "tests_taken": tests_taken,
-                "avg_score": avg_score,
-                "correct_answers": correct_count,
-                "is_current_user": member_id == user.id
-            })
-
-    # Sort by Correct Answers (primary) and Avg Score (secondary)
-    results.sort(key=lambda x: (x['correct_answers'], x['avg_score']), reverse=True)
-
-    # Assign ranks
+    # Assign ranks (copies - the cached entries are shared between requests)
     leaderboard = []
-    for i, r in enumerate(results):
-        r['rank'] = i + 1
-        leaderboard.append(r)
+    for i, r in enumerate(standings):
+        leaderboard.append({**r, "rank": i + 1, "is_current_user": r["user_id"] == user.id})
 
     return jsonify({
         "group_name": group.name,
@@ -304,8 +300,7 @@ def get_group_leaderboard(group_id):
 @groups_bp.route('/<int:group_id>/leave', methods=['POST'])
 @jwt_required()
 def leave_group(group_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -331,6 +326,8 @@ def leave_group(group_id):
             }), 400
 
     db.session.delete(membership)
+    remove_member_goal_progress(group_id, user.id)
+    invalidate_identity(user.id)
     db.session.commit()
 
     return jsonify({"message": "Left group successfully"}), 200
@@ -340,20 +337,13 @@ def leave_group(group_id):
 @groups_bp.route('/<int:group_id>/remove/<int:user_id>', methods=['POST'])
 @jwt_required()
 def remove_member(group_id, user_id):
-    current_user_id = get_jwt_identity()
-    admin_user = User.query.get(int(current_user_id))
+    admin_user = current_identity()
     
     if not admin_user:
         return jsonify({"message": "User not found"}), 404
 
     # Check if requester is admin
-    admin_membership = GroupMember.query.filter_by(
-        group_id=group_id, 
-        user_id=admin_user.id,
-        role='admin'
-    ).first()
-    
-    if not admin_membership:
+    if admin_user.role_in(group_id) != 'admin':
         return jsonify({"message": "Admin access required"}), 403
 
     # Find member to remove
@@ -369,6 +359,8 @@ def remove_member(group_id, user_id):
         return jsonify({"message": "Cannot remove yourself"}), 400
 
     db.session.delete(member)
+    remove_member_goal_progress(group_id, user_id)
+    invalidate_identity(user_id)
     db.session.commit()
 
     return jsonify({"message": "Member removed successfully"}), 200
@@ -378,27 +370,22 @@ def remove_member(group_id, user_id):
 @groups_bp.route('/<int:group_id>/delete', methods=['DELETE'])
 @jwt_required()
 def delete_group(group_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
 
     # Check if admin
-    admin_membership = GroupMember.query.filter_by(
-        group_id=group_id, 
-        user_id=user.id,
-        role='admin'
-    ).first()
-    
-    if not admin_membership:
+    if user.role_in(group_id) != 'admin':
         return jsonify({"message": "Admin access required"}), 403
 
     group = Group.query.get(group_id)
     if not group:
         return jsonify({"message": "Group not found"}), 404
 
+    member_ids = [m.user_id for m in group.members]
     db.session.delete(group)
+    invalidate_identity(*member_ids)
     db.session.commit()
 
     return jsonify({"message": "Group deleted successfully"}), 200
@@ -412,25 +399,66 @@ def delete_group(group_id):
 @groups_bp.route('/<int:group_id>/posts', methods=['GET'])
 @jwt_required()
 def get_group_posts(group_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
 
     # Check membership
-    membership = GroupMember.query.filter_by(group_id=group_id, user_id=user.id).first()
-    if not membership:
+    role = user.role_in(group_id)
+    if not role:
         return jsonify({"message": "Not a member"}), 403
 
     # Get posts (pinned first, then by date)
-    posts = GroupPost.query.filter_by(group_id=group_id).order_by(
+    # Feed is served in keyset pages: ?limit=&cursor=<pinned 0|1>,<created_at ISO>,<id>
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    raw_cursor = request.args.get('cursor')
+    try:
+        cursor = parse_feed_cursor(raw_cursor) if raw_cursor else None
+    except ValueError:
+        return jsonify({"message": "Invalid cursor. Expected format: <pinned 0|1>,<created_at ISO>,<id>"}), 400
+
+    # Comment counts for the group's posts, as a grouped subquery
+    comment_counts = db.session.query(
+        GroupPostComment.post_id, db.func.count(GroupPostComment.id).label('comment_count')
+    ).join(
+        GroupPost, GroupPost.id == GroupPostComment.post_id
+    ).filter(GroupPost.group_id == group_id).group_by(GroupPostComment.post_id).subquery()
+
+    # Get posts (pinned first, then by date) with authors and comment counts in one query
+    page_query = db.session.query(
+        GroupPost, db.func.coalesce(comment_counts.c.comment_count, 0)
+    ).options(
+        joinedload(GroupPost.author)
+    ).outerjoin(
+        comment_counts, comment_counts.c.post_id == GroupPost.id
+    ).filter(GroupPost.group_id == group_id)
+
+    if cursor:
+        cursor_pinned, cursor_date, cursor_id = cursor
+        older = db.or_(
+            GroupPost.created_at < cursor_date,
+            db.and_(GroupPost.created_at == cursor_date, GroupPost.id < cursor_id)
+        )
+        if cursor_pinned:
+            # Rest of the pinned posts, then every unpinned post
+            page_query = page_query.filter(db.or_(
+                GroupPost.is_pinned == False,
+                db.and_(GroupPost.is_pinned == True, older)
+            ))
+        else:
+            page_query = page_query.filter(GroupPost.is_pinned == False, older)
+
+    page = page_query.order_by(
         GroupPost.is_pinned.desc(),
-        GroupPost.created_at.desc()
-    ).all()
+        GroupPost.created_at.desc(),
+        GroupPost.id.desc()
+    ).limit(limit + 1).all()
+    has_more = len(page) > limit
+    page = page[:limit]
 
     output = []
-    for p in posts:
+    for p, comment_count in page:
         output.append({
             "id": p.id,
             "title": p.title,
@@ -439,27 +467,75 @@ def get_group_posts(group_id):
             "author_id": p.user_id,
             "is_pinned": p.is_pinned,
             "created_at": p.created_at.strftime("%d/%m/%Y %H:%M"),
-            "comment_count": len(p.comments)
+            "comment_count": int(comment_count)
         })
 
-    return jsonify({"posts": output}), 200
+    next_cursor = None
+    if has_more:
+        last = page[-1][0]
+        next_cursor = f"{int(bool(last.is_pinned))},{last.created_at.isoformat()},{last.id}"
+
+    # Newest post shown, for POST /posts/read once the client has displayed the page
+    latest_at = max((p.created_at for p, _ in page), default=None)
+
+    return jsonify({
+        "posts": output,
+        "next_cursor": next_cursor,
+        "limit": limit,
+        "latest_at": latest_at.isoformat() if latest_at else None
+    }), 200
+
+
+# --- Mark the group feed as read ---
+@groups_bp.route('/<int:group_id>/posts/read', methods=['POST'])
+@jwt_required()
+def mark_posts_read(group_id):
+    user = current_identity()
+
+    if not user:
+        return jsonify({"message": "User not found"}), 404
+
+    if not user.role_in(group_id):
+        return jsonify({"message": "Not a member"}), 403
+
+    # Posts up to `until` (the feed's latest_at) count as read; default: everything so far
+    now = datetime.utcnow()
+    data = request.get_json(silent=True) or {}
+    try:
+        until = min(datetime.fromisoformat(data['until']), now) if data.get('until') else now
+    except (TypeError, ValueError):
+        return jsonify({"message": "until must be an ISO timestamp"}), 400
+
+    # Never move the read marker backwards (e.g. a stale tab)
+    GroupMember.query.filter(
+        GroupMember.group_id == group_id,
+        GroupMember.user_id == user.id,
+        db.or_(GroupMember.last_read_at.is_(None), GroupMember.last_read_at < until)
+    ).update({'last_read_at': until}, synchronize_session=False)
+    db.session.commit()
+
+    return jsonify({"message": "Feed marked as read"}), 200
+
+
+def parse_feed_cursor(raw):
+    """Parse a '<pinned 0|1>,<created_at ISO>,<id>' feed cursor. Raises ValueError if malformed."""
+    pinned, date_part, id_part = raw.split(',')
+    if pinned not in ('0', '1'):
+        raise ValueError(raw)
+    return pinned == '1', datetime.fromisoformat(date_part), int(id_part)
 
 
 # --- Create a post (admin only) ---
 @groups_bp.route('/<int:group_id>/posts', methods=['POST'])
 @jwt_required()
 def create_post(group_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
 
     # Check admin
-    membership = GroupMember.query.filter_by(
-        group_id=group_id, user_id=user.id, role='admin'
-    ).first()
-    if not membership:
+    if user.role_in(group_id) != 'admin':
         return jsonify({"message": "Admin access required"}), 403
 
     data = request.get_json()
@@ -487,14 +563,13 @@ def create_post(group_id):
 @groups_bp.route('/<int:group_id>/posts/<int:post_id>', methods=['GET'])
 @jwt_required()
 def get_post_details(group_id, post_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
 
-    membership = GroupMember.query.filter_by(group_id=group_id, user_id=user.id).first()
-    if not membership:
+    role = user.role_in(group_id)
+    if not role:
         return jsonify({"message": "Not a member"}), 403
 
     post = GroupPost.query.filter_by(id=post_id, group_id=group_id).first()
@@ -522,7 +597,7 @@ def get_post_details(group_id, post_id):
             "created_at": post.created_at.strftime("%d/%m/%Y %H:%M")
         },
         "comments": comments,
-        "is_admin": membership.role == 'admin'
+        "is_admin": role == 'admin'
     }), 200
 
 
@@ -530,14 +605,13 @@ def get_post_details(group_id, post_id):
 @groups_bp.route('/<int:group_id>/posts/<int:post_id>/comment', methods=['POST'])
 @jwt_required()
 def add_comment(group_id, post_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
 
-    membership = GroupMember.query.filter_by(group_id=group_id, user_id=user.id).first()
-    if not membership:
+    role = user.role_in(group_id)
+    if not role:
         return jsonify({"message": "Not a member"}), 403
 
     post = GroupPost.query.filter_by(id=post_id, group_id=group_id).first()
@@ -565,13 +639,9 @@ def add_comment(group_id, post_id):
 @groups_bp.route('/<int:group_id>/posts/<int:post_id>', methods=['DELETE'])
 @jwt_required()
 def delete_post(group_id, post_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
-    membership = GroupMember.query.filter_by(
-        group_id=group_id, user_id=user.id, role='admin'
-    ).first()
-    if not membership:
+    if user.role_in(group_id) != 'admin':
         return jsonify({"message": "Admin access required"}), 403
 
     post = GroupPost.query.filter_by(id=post_id, group_id=group_id).first()
@@ -592,90 +662,59 @@ def delete_post(group_id, post_id):
 @groups_bp.route('/<int:group_id>/goals', methods=['GET'])
 @jwt_required()
 def get_group_goals(group_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
 
-    membership = GroupMember.query.filter_by(group_id=group_id, user_id=user.id).first()
-    if not membership:
+    role = user.role_in(group_id)
+    if not role:
         return jsonify({"message": "Not a member"}), 403
 
-    group = Group.query.get(group_id)
-    member_ids = [m.user_id for m in group.members]
-
-    goals = GroupGoal.query.filter_by(group_id=group_id).order_by(
+    goals = GroupGoal.query.options(joinedload(GroupGoal.creator)).filter_by(group_id=group_id).order_by(
         GroupGoal.status.asc(),  # active first
         GroupGoal.created_at.desc()
     ).all()
+    goal_ids = [g.id for g in goals]
+
+    # Progress comes from the goal projection (kept current by submit_test)
+    totals = {
+        p.goal_id: p for p in GoalProgress.query.filter(GoalProgress.goal_id.in_(goal_ids))
+    } if goal_ids else {}
+    mine = {
+        c.goal_id: c for c in GoalContribution.query.filter(
+            GoalContribution.goal_id.in_(goal_ids), GoalContribution.user_id == user.id
+        )
+    } if goal_ids else {}
+
+    # Contributions of every team goal that ranks contributors, with names, in one query
+    contributors = {}
+    ranked_goals = [g.id for g in goals if g.scope != 'individual' and g.target_type in CONTRIBUTOR_TYPES]
+    if ranked_goals:
+        for c, display_name in db.session.query(GoalContribution, User.display_name).join(
+            User, User.id == GoalContribution.user_id
+        ).filter(GoalContribution.goal_id.in_(ranked_goals)):
+            contributors.setdefault(c.goal_id, []).append((c, display_name))
 
     output = []
-    
-    # Pre-fetch correct answers for calculation efficiency
-    # This query gets (user_id, count) for all members
-    # In a real app we'd filter by date per goal, but this is a simplified approach
-    
     for g in goals:
-        current_value = 0
-        top_contributors = []
         is_individual = g.scope == 'individual'
-        
-        # Determine relevant users for calculation
-        target_users = [user.id] if is_individual else member_ids
-        
-        if g.target_type == 'tests_count':
-            # Count total tests
-            current_value = TestResult.query.filter(
-                TestResult.user_id.in_(target_users),
-                TestResult.date_taken >= g.start_date
-            ).count()
-            
-            # For team goals, find contributors
-            if not is_individual:
-                contribs = db.session.query(
-                    TestResult.user_id, db.func.count(TestResult.id)
-                ).filter(
-                    TestResult.user_id.in_(member_ids),
-                    TestResult.date_taken >= g.start_date
-                ).group_by(TestResult.user_id).order_by(db.func.count(TestResult.id).desc()).limit(3).all()
-                
-                for uid, count in contribs:
-                    u = User.query.get(uid)
-                    top_contributors.append({"name": u.display_name, "value": count})
-
-        elif g.target_type == 'avg_score':
-            # Average score
-            avg = db.session.query(db.func.avg(TestResult.score)).filter(
-                TestResult.user_id.in_(target_users),
-                TestResult.date_taken >= g.start_date
-            ).scalar()
-            current_value = round(avg) if avg else 0
-
-        elif g.target_type == 'correct_answers':
-            # NEW: Count correct answers from QuestionAttempt
-            # Join with QuestionAttempt
-            from models import QuestionAttempt
-            
-            current_value = QuestionAttempt.query.filter(
-                QuestionAttempt.user_id.in_(target_users),
-                QuestionAttempt.is_correct == True,
-                QuestionAttempt.created_at >= g.start_date
-            ).count()
-
-            # For team goals, find contributors
-            if not is_individual:
-                contribs = db.session.query(
-                    QuestionAttempt.user_id, db.func.count(QuestionAttempt.id)
-                ).filter(
-                    QuestionAttempt.user_id.in_(member_ids),
-                    QuestionAttempt.is_correct == True,
-                    QuestionAttempt.created_at >= g.start_date
-                ).group_by(QuestionAttempt.user_id).order_by(db.func.count(QuestionAttempt.id).desc()).limit(3).all()
-
-                for uid, count in contribs:
-                    u = User.query.get(uid)
-                    top_contributors.append({"name": u.display_name, "value": count})
+
+        # Individual goals show the viewer's own progress, team goals the group's
+        # (frozen into final_value once the goal is closed)
+        if not is_individual and g.final_value is not None:
+            current_value = g.final_value
+        else:
+            progress = mine.get(g.id) if is_individual else totals.get(g.id)
+            current_value = goal_value(g.target_type, progress)
+
+        top_contributors = []
+        if g.id in contributors:
+            ranked = sorted(contributors[g.id], key=lambda pair: getattr(pair[0], g.target_type), reverse=True)
+            top_contributors = [
+                {"name": name, "value": getattr(c, g.target_type)}
+                for c, name in ranked[:3] if getattr(c, g.target_type) > 0
+            ]
 
         progress_pct = min(100, round((current_value / g.target_value) * 100)) if g.target_value > 0 else 0
 
@@ -691,27 +730,24 @@ def get_group_goals(group_id):
             "status": g.status,
             "start_date": g.start_date.strftime("%d/%m/%Y"),
             "end_date": g.end_date.strftime("%d/%m/%Y") if g.end_date else None,
+            "closed_at": g.closed_at.strftime("%d/%m/%Y") if g.closed_at else None,
             "created_by": g.creator.display_name,
             "top_contributors": top_contributors
         })
 
-    return jsonify({"goals": output, "is_admin": membership.role == 'admin'}), 200
+    return jsonify({"goals": output, "is_admin": role == 'admin'}), 200
 
 
 # --- Create goal (admin only) ---
 @groups_bp.route('/<int:group_id>/goals', methods=['POST'])
 @jwt_required()
 def create_goal(group_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
 
-    membership = GroupMember.query.filter_by(
-        group_id=group_id, user_id=user.id, role='admin'
-    ).first()
-    if not membership:
+    if user.role_in(group_id) != 'admin':
         return jsonify({"message": "Admin access required"}), 403
 
     data = request.get_json()
@@ -721,6 +757,7 @@ def create_goal(group_id):
     target_value = data.get('target_value')
     scope = data.get('scope', 'team')
     end_date_str = data.get('end_date')
+    start_date_str = data.get('start_date')  # Optional - may be backdated
 
     if not title or not target_type or not target_value:
         return jsonify({"message": "Title, target_type and target_value are required"}), 400
@@ -735,6 +772,13 @@ def create_goal(group_id):
         except:
             pass
 
+    start_date = datetime.utcnow()
+    if start_date_str:
+        try:
+            start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
+        except ValueError:
+            return jsonify({"message": "start_date must be YYYY-MM-DD"}), 400
+
     new_goal = GroupGoal(
         group_id=group_id,
         created_by=user.id,
@@ -743,11 +787,15 @@ def create_goal(group_id):
         scope=scope,
         target_type=target_type,
         target_value=int(target_value),
+        start_date=start_date,
         end_date=end_date
     )
     db.session.add(new_goal)
     db.session.commit()
 
+    # Count the members' history since start_date (non-empty when backdated)
+    rebuild_goal_progress([new_goal.id])
+
     return jsonify({"message": "Goal created!", "goal_id": new_goal.id}), 201
 
 
@@ -755,20 +803,16 @@ def create_goal(group_id):
 @groups_bp.route('/<int:group_id>/goals/<int:goal_id>/complete', methods=['POST'])
 @jwt_required()
 def complete_goal(group_id, goal_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
-    membership = GroupMember.query.filter_by(
-        group_id=group_id, user_id=user.id, role='admin'
-    ).first()
-    if not membership:
+    if user.role_in(group_id) != 'admin':
         return jsonify({"message": "Admin access required"}), 403
 
     goal = GroupGoal.query.filter_by(id=goal_id, group_id=group_id).first()
     if not goal:
         return jsonify({"message": "Goal not found"}), 404
 
-    goal.status = 'completed'
+    close_goal(goal, 'completed')
     db.session.commit()
 
     return jsonify({"message": "Goal marked as completed!"}), 200
@@ -778,13 +822,9 @@ def complete_goal(group_id, goal_id):
 @groups_bp.route('/<int:group_id>/goals/<int:goal_id>', methods=['DELETE'])
 @jwt_required()
 def delete_goal(group_id, goal_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
-    membership = GroupMember.query.filter_by(
-        group_id=group_id, user_id=user.id, role='admin'
-    ).first()
-    if not membership:
+    if user.role_in(group_id) != 'admin':
         return jsonify({"message": "Admin access required"}), 403
 
     goal = GroupGoal.query.filter_by(id=goal_id, group_id=group_id).first()
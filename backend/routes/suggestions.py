@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import QuestionSuggestion, Protocol, User
+from flask_jwt_extended import jwt_required
+from models import QuestionSuggestion, Protocol
 from database import db
+from utils.identity import current_identity
+from utils.cache import bump_versions, SUGGESTIONS_VERSION
+from utils.similarity import find_near_duplicates, question_fingerprint
 
 suggestions_bp = Blueprint('suggestions', __name__)
 
@@ -10,8 +13,7 @@ suggestions_bp = Blueprint('suggestions', __name__)
 @suggestions_bp.route('/propose-question', methods=['POST'])
 @jwt_required()
 def propose_question():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -62,12 +64,22 @@ def propose_question():
         status='pending'
     )
 
+    # Flag paraphrases of questions already in the bank for the reviewing admin
+    duplicate = find_near_duplicates([question_fingerprint(new_suggestion)])[0]
+    if duplicate:
+        new_suggestion.duplicate_of_id, new_suggestion.duplicate_score = duplicate
+
     db.session.add(new_suggestion)
+    bump_versions(SUGGESTIONS_VERSION)  # Invalidate cached suggestion counts
     db.session.commit()
 
     return jsonify({
         "message": "Question suggestion submitted successfully!",
-        "suggestion_id": new_suggestion.id
+        "suggestion_id": new_suggestion.id,
+        "possible_duplicate": {
+            "question_id": duplicate[0],
+            "similarity": duplicate[1]
+        } if duplicate else None
     }), 201
 
 
@@ -75,8 +87,7 @@ def propose_question():
 @suggestions_bp.route('/my-suggestions', methods=['GET'])
 @jwt_required()
 def get_my_suggestions():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(int(current_user_id))
+    user = current_identity()
     
     if not user:
         return jsonify({"message": "User not found"}), 404
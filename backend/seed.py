@@ -1,6 +1,7 @@
 from app import app
 from database import db
 from models import Protocol
+from utils.cache import bump_bank_version
 
 # רשימת הפרוטוקולים המלאה שחילצנו מאוגדן ALS 2024
 protocols_data = [
@@ -118,6 +119,8 @@ def seed_protocols():
             db.session.add(new_protocol)
             count += 1
     
+    # Protocol titles/categories are cached with the question bank
+    bump_bank_version()
     db.session.commit()
     print(f"✅ Successfully added {count} protocols to the database!")
 
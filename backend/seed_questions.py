@@ -9,6 +9,8 @@ Key Security & Robustness Features:
 3. Smart Protocol Linking: Maps protocol_name (string) to protocol.id via DB lookup.
 4. Data Validation: Validates correct_answer, difficulty_level, and required fields.
 5. Per-Row Error Handling: One bad row doesn't crash the batch; errors are logged.
+6. Near-Duplicate Skipping: Rows too similar to a bank question (or to an earlier
+   row) are skipped with a warning (see utils/similarity.py).
 """
 
 import csv
@@ -16,6 +18,10 @@ import sys
 from app import app
 from database import db
 from models import Question, Protocol
+from utils.cache import bump_bank_version
+from utils.similarity import BatchIndex, find_near_duplicates, question_fingerprint, index_questions
+from utils.search import index_question_terms
+from clear_questions import delete_all_questions
 
 
 def seed_questions_from_csv(filepath: str, clear_existing: bool = False):
@@ -29,7 +35,7 @@ def seed_questions_from_csv(filepath: str, clear_existing: bool = False):
     with app.app_context():
         # --- Step 1: Optionally Clear Existing Questions ---
         if clear_existing:
-            deleted_count = Question.query.delete()
+            deleted_count = delete_all_questions()['questions']
             db.session.commit()
             print(f"🗑️  Cleared {deleted_count} existing questions.")
 
@@ -46,6 +52,7 @@ def seed_questions_from_csv(filepath: str, clear_existing: bool = False):
         valid_count = 0
         error_count = 0
         questions_to_add = []
+        row_numbers = []
 
         try:
             with open(filepath, 'r', encoding='utf-8-sig') as csvfile:
@@ -108,6 +115,7 @@ def seed_questions_from_csv(filepath: str, clear_existing: bool = False):
                             difficulty_level=difficulty_level
                         )
                         questions_to_add.append(question)
+                        row_numbers.append(row_num)
                         valid_count += 1
 
                     except Exception as e:
@@ -121,14 +129,41 @@ def seed_questions_from_csv(filepath: str, clear_existing: bool = False):
             print(f"❌ FATAL: Could not read CSV file. Error: {e}")
             return
 
-        # --- Step 4: Bulk Insert ---
+        # --- Step 4: Skip Near-Duplicates (of the bank or of earlier rows) ---
+        duplicate_count = 0
+        if questions_to_add:
+            fingerprints = [question_fingerprint(q) for q in questions_to_add]
+            bank_matches = find_near_duplicates(fingerprints)
+            batch_index = BatchIndex()
+            unique_questions = []
+
+            for question, row_num, fp, bank_match in zip(questions_to_add, row_numbers, fingerprints, bank_matches):
+                match = bank_match or batch_index.best_match(fp)
+                if match:
+                    duplicate_count += 1
+                    valid_count -= 1
+                    target = f"question #{match[0]}" if bank_match else f"row {match[0]}"
+                    print(f"   ⚠️  Row {row_num}: near-duplicate of {target} ({round(match[1] * 100)}% similar), skipped")
+                else:
+                    batch_index.add(row_num, fp)
+                    unique_questions.append(question)
+            questions_to_add = unique_questions
+
+        # --- Step 5: Bulk Insert ---
         if questions_to_add:
             db.session.add_all(questions_to_add)
+            bump_bank_version({q.protocol_id for q in questions_to_add})
+            db.session.flush()  # Assign IDs for the similarity and search indexes
+            index_questions(questions_to_add)
+            index_question_terms(questions_to_add)
             db.session.commit()
             print(f"\n✅ Successfully imported {valid_count} questions.")
         else:
             print("\n⚠️  No valid questions were found to import.")
 
+        if duplicate_count > 0:
+            print(f"🔁 Skipped {duplicate_count} near-duplicate questions (see warnings above).")
+
         if error_count > 0:
             print(f"❌ Encountered {error_count} errors (see warnings above).")
 
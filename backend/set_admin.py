@@ -0,0 +1,32 @@
+"""
+Script to grant or revoke admin rights.
+Admin checks read the user's current flag (utils/decorators.py), so the
+change applies to existing tokens on their next request in every worker.
+
+Usage:
+    python set_admin.py <username>             # grant
+    python set_admin.py <username> --revoke    # revoke
+"""
+import sys
+from app import app
+from database import db
+from models import User
+from utils.identity import invalidate_identity
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if len(args) != 1:
+        print(__doc__)
+        sys.exit(1)
+    make_admin = "--revoke" not in sys.argv[1:]
+
+    with app.app_context():
+        user = User.query.filter_by(username=args[0]).first()
+        if not user:
+            print(f"❌ User '{args[0]}' not found.")
+            sys.exit(1)
+
+        user.is_admin = make_admin
+        invalidate_identity(user.id)  # Same transaction as the flag change
+        db.session.commit()
+        print(f"✅ {user.username} is {'now' if make_admin else 'no longer'} an admin.")
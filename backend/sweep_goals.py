@@ -0,0 +1,19 @@
+"""
+Script to close group goals whose end_date has passed (see utils/goal_lifecycle.py).
+This is the default way to sweep; the in-process sweeper (GOAL_SWEEP_ENABLED) is opt-in.
+
+Usage:
+    python sweep_goals.py
+
+Example crontab entry (every 10 minutes):
+    */10 * * * * cd /path/to/backend && python sweep_goals.py
+"""
+from app import app
+from utils.goal_lifecycle import sweep_goals
+
+if __name__ == "__main__":
+    with app.app_context():
+        print("🔄 Sweeping goals past their end date...")
+        closed = sweep_goals()
+        print(f"   ✅ {closed['completed']} completed, {closed['expired']} expired")
+    print("🏁 Done.")
@@ -0,0 +1,181 @@
+"""
+Optional write-behind ingestion of question attempts.
+
+When ATTEMPT_WRITE_BEHIND is enabled, submit_test commits the TestResult
+synchronously and hands the (already validated) attempts to a bounded
+in-process queue. A background thread drains the queue in batches - when
+ATTEMPT_FLUSH_BATCH_SIZE attempts are waiting or ATTEMPT_FLUSH_INTERVAL
+seconds have passed - writing each batch (attempts + attempt projections)
+in a single transaction.
+
+Backpressure: if the queue stays full for ATTEMPT_QUEUE_PUT_TIMEOUT seconds,
+submit() returns False and the caller writes the attempts synchronously.
+Failed batches are retried with backoff, then dropped and counted.
+On interpreter shutdown the queue is drained before exit.
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from database import db
+from utils.attempts import insert_attempt_rows
+from utils.cache import leaderboard_cache
+from utils.projections import record_attempt_projections
+
+
+class AttemptQueue:
+
+    def __init__(self):
+        self.enabled = False
+        self._app = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._metrics = {
+            'pending_attempts': 0,
+            'batches_flushed': 0,
+            'attempts_flushed': 0,
+            'retried_batches': 0,
+            'dropped_batches': 0,
+            'dropped_attempts': 0,
+            'sync_fallbacks': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0
+        }
+
+    def init_app(self, app):
+        self._app = app
+        self.enabled = app.config.get('ATTEMPT_WRITE_BEHIND', False)
+        self.batch_size = app.config.get('ATTEMPT_FLUSH_BATCH_SIZE', 500)
+        self.flush_interval = app.config.get('ATTEMPT_FLUSH_INTERVAL', 1.0)
+        self.put_timeout = app.config.get('ATTEMPT_QUEUE_PUT_TIMEOUT', 0.5)
+        self.max_retries = app.config.get('ATTEMPT_FLUSH_RETRIES', 3)
+        self._queue = queue.Queue(maxsize=app.config.get('ATTEMPT_QUEUE_MAXSIZE', 2000))
+
+        if self.enabled:
+            atexit.register(self.shutdown)
+
+    # --- Producer side (request threads) ---
+    def submit(self, user_id, rows, created_at, test_result_id=None):
+        """
+        Enqueue one submission's attempts.
+        Returns False if the queue is full (the caller must write synchronously).
+        """
+        self._ensure_started()
+        self._count('pending_attempts', len(rows))
+        try:
+            self._queue.put((user_id, rows, created_at, test_result_id), timeout=self.put_timeout)
+        except queue.Full:
+            self._count('pending_attempts', -len(rows))
+            self._count('sync_fallbacks')
+            return False
+        return True
+
+    def metrics(self):
+        """Snapshot of queue depth, flush latency and failure counters."""
+        with self._lock:
+            snapshot = dict(self._metrics)
+
+        total_ms = snapshot.pop('total_flush_ms')
+        batches = snapshot['batches_flushed']
+        snapshot.update({
+            'enabled': self.enabled,
+            'queue_depth': self._queue.qsize() if self._queue else 0,
+            'queue_capacity': self._queue.maxsize if self._queue else 0,
+            'avg_flush_ms': round(total_ms / batches, 2) if batches else 0.0,
+            'flusher_alive': bool(self._thread and self._thread.is_alive())
+        })
+        return snapshot
+
+    def shutdown(self, timeout=30):
+        """Stop the flusher once everything still queued has been written."""
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+
+    # --- Consumer side (background flusher) ---
+    def _ensure_started(self):
+        # Start lazily, and again in a forked worker (threads don't survive fork)
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._stop.clear()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='attempt-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+
+    def _collect(self):
+        """Gather submissions until the batch is full or the flush interval elapses."""
+        batch, size = [], 0
+        deadline = time.monotonic() + self.flush_interval
+
+        while size < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if self._stop.is_set() or remaining <= 0:
+                    item = self._queue.get_nowait()
+                else:
+                    item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[1])
+
+        return batch
+
+    def _flush(self, batch):
+        attempts = sum(len(rows) for _, rows, _, _ in batch)
+        started = time.perf_counter()
+
+        for attempt in range(1, self.max_retries + 1):
+            with self._app.app_context():
+                try:
+                    insert_attempt_rows([
+                        {**row, 'user_id': user_id, 'created_at': created_at, 'test_result_id': test_result_id}
+                        for user_id, rows, created_at, test_result_id in batch for row in rows
+                    ])
+                    for user_id, rows, created_at, _ in batch:
+                        record_attempt_projections(user_id, rows, created_at)
+                    db.session.commit()
+                    break
+                except Exception:
+                    db.session.rollback()
+                    if attempt == self.max_retries:
+                        self._app.logger.exception(f"Dropping attempt batch ({attempts} attempts) after {attempt} tries")
+                        self._count('dropped_batches')
+                        self._count('dropped_attempts', attempts)
+                        self._count('pending_attempts', -attempts)
+                        return
+                    self._count('retried_batches')
+            time.sleep(0.2 * 2 ** attempt)  # Back off before retrying
+
+        # Correct-answer counts moved - drop this worker's cached leaderboards
+        leaderboard_cache.invalidate()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            m = self._metrics
+            m['batches_flushed'] += 1
+            m['attempts_flushed'] += attempts
+            m['pending_attempts'] -= attempts
+            m['last_flush_ms'] = round(elapsed_ms, 2)
+            m['max_flush_ms'] = round(max(m['max_flush_ms'], elapsed_ms), 2)
+            m['total_flush_ms'] += elapsed_ms
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._metrics[name] += amount
+
+
+attempt_queue = AttemptQueue()
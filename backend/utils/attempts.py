@@ -0,0 +1,84 @@
+"""
+Set-based ingestion of question attempts for submit_test.
+
+The answer list is validated once, its question IDs are verified with a
+single query, and the attempts are written with one multi-row INSERT in the
+caller's transaction (no ORM object per answer).
+"""
+from database import db
+from models import Question, QuestionAttempt
+
+VALID_ANSWERS = ('a', 'b', 'c', 'd')
+
+
+class AnswerValidationError(ValueError):
+    """The submitted answer list is malformed or references unknown questions."""
+
+
+def parse_answers(raw_answers):
+    """
+    Validate the `answers` payload of submit_test.
+
+    Returns:
+        List of {question_id, user_answer, is_correct} dicts ready for insertion.
+    Raises:
+        AnswerValidationError on the first malformed entry.
+    """
+    if raw_answers is None:
+        return []
+    if not isinstance(raw_answers, list):
+        raise AnswerValidationError("answers must be a list")
+
+    rows = []
+    for i, answer in enumerate(raw_answers):
+        if not isinstance(answer, dict):
+            raise AnswerValidationError(f"answers[{i}] must be an object")
+
+        question_id = answer.get('question_id')
+        if isinstance(question_id, bool) or not isinstance(question_id, int):
+            raise AnswerValidationError(f"answers[{i}]: question_id must be an integer")
+
+        user_answer = answer.get('user_answer')
+        if user_answer is not None:
+            user_answer = str(user_answer).lower()
+            if user_answer not in VALID_ANSWERS:
+                raise AnswerValidationError(f"answers[{i}]: user_answer must be a, b, c or d")
+
+        rows.append({
+            'question_id': question_id,
+            'user_answer': user_answer,
+            'is_correct': bool(answer.get('is_correct', False))
+        })
+    return rows
+
+
+def verify_question_ids(rows):
+    """Check that every referenced question exists, using a single query."""
+    question_ids = {row['question_id'] for row in rows}
+    if not question_ids:
+        return
+
+    found = {qid for (qid,) in db.session.query(Question.id).filter(Question.id.in_(question_ids))}
+    missing = sorted(question_ids - found)
+    if missing:
+        raise AnswerValidationError(f"Unknown question_id(s): {', '.join(map(str, missing))}")
+
+
+def insert_attempts(user_id, rows, created_at, test_result_id=None):
+    """Write all attempts with one multi-row INSERT (committed by the caller)."""
+    if not rows:
+        return
+
+    insert_attempt_rows([
+        {**row, 'user_id': user_id, 'created_at': created_at, 'test_result_id': test_result_id} for row in rows
+    ])
+
+
+def insert_attempt_rows(values):
+    """Write fully-populated attempt rows (may span several users/submissions)."""
+    if not values:
+        return
+
+    # executemany on a Core insert: SQLAlchemy batches it into multi-row
+    # INSERT ... VALUES (...), (...) statements with a cached compiled form
+    db.session.execute(QuestionAttempt.__table__.insert(), values)
@@ -0,0 +1,274 @@
+"""
+Process-local caches with cross-worker invalidation.
+
+Every gunicorn worker keeps its own copy of the cached data. Writers bump a
+named counter in the CacheVersion table (inside their own transaction), and
+readers compare the stored version against the one their local copy was
+built from, so all workers notice changes without a restart.
+"""
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from database import db
+from models import CacheVersion, Protocol
+from utils.projections import upsert
+
+BANK_VERSION = 'question_bank'
+SUGGESTIONS_VERSION = 'suggestions'
+USERS_VERSION = 'users'
+
+
+def protocol_version_key(protocol_id):
+    return f'protocol:{protocol_id}'
+
+
+def get_version(name):
+    """Current value of a version counter (0 if it was never bumped)."""
+    version = db.session.query(CacheVersion.version).filter_by(name=name).scalar()
+    return version or 0
+
+
+def get_versions(names):
+    """Current values of several version counters, in one query."""
+    stored = dict(db.session.query(CacheVersion.name, CacheVersion.version).filter(CacheVersion.name.in_(names)))
+    return tuple(stored.get(name, 0) for name in names)
+
+
+def bump_versions(*names):
+    """Increment version counters. Must be committed by the caller's transaction."""
+    upsert(
+        CacheVersion,
+        [{'name': name, 'version': 1} for name in set(names)],
+        keys=('name',),
+        increments=('version',)
+    )
+
+
+def bump_bank_version(protocol_ids=None):
+    """
+    Invalidate cached question bank data.
+    Call this whenever questions are added, edited or removed.
+
+    Args:
+        protocol_ids: Protocols whose questions changed. None = all protocols.
+    """
+    if protocol_ids is None:
+        protocol_ids = [pid for (pid,) in db.session.query(Protocol.id).all()]
+
+    bump_versions(BANK_VERSION, *[protocol_version_key(pid) for pid in protocol_ids])
+
+
+def serialize_question(q):
+    """The question dict sent to test pages (accepts a Question or a QuestionRecord)."""
+    return {
+        "id": q.id,
+        "text": q.text,
+        "options": {
+            "a": q.option_a,
+            "b": q.option_b,
+            "c": q.option_c,
+            "d": q.option_d
+        },
+        "correct_answer": q.correct_answer,
+        "explanation": q.explanation,
+        "source_reference": q.source_reference,
+        "difficulty_level": q.difficulty_level
+    }
+
+
+class ProtocolPayload:
+    """A protocol's question list, serialized once into per-question JSON fragments."""
+    __slots__ = ('protocol_id', 'version', 'title', 'fragments')
+
+    def __init__(self, protocol_id, version, title, fragments):
+        self.protocol_id = protocol_id
+        self.version = version
+        self.title = title
+        self.fragments = fragments
+
+    def render(self, seed):
+        """
+        Build the JSON response body with the questions in a seeded random order
+        (bank order when seed is None). The same (version, seed) always yields
+        the same bytes, so it can carry a strong ETag.
+        """
+        order = list(range(len(self.fragments)))
+        if seed is not None:
+            random.Random(seed).shuffle(order)
+
+        header = json.dumps({
+            "id": self.protocol_id,
+            "title": self.title,
+            "version": self.version,
+            "seed": seed
+        })
+        questions = ','.join(self.fragments[i] for i in order)
+        return header[:-1] + ', "questions": [' + questions + ']}'
+
+
+class ProtocolPayloadCache:
+    """Serialized protocol test payloads, keyed by protocol and its bank version."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, protocol_id, version):
+        """Return the payload for this version, loading it on a miss. None if the protocol doesn't exist."""
+        entry = self._entries.get(protocol_id)
+        if entry is not None and entry.version == version:
+            return entry
+
+        from utils.question_bank import get_question_bank
+        bank = get_question_bank()
+        if protocol_id not in bank.protocols:
+            return None
+
+        title, _category = bank.protocols[protocol_id]
+        questions = bank.get(bank.by_protocol[protocol_id])
+        entry = ProtocolPayload(
+            protocol_id,
+            version,
+            title,
+            [json.dumps(serialize_question(q)) for q in questions]
+        )
+
+        with self._lock:
+            current = self._entries.get(protocol_id)
+            if current is None or current.version <= version:
+                self._entries[protocol_id] = entry
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+protocol_payloads = ProtocolPayloadCache()
+
+
+class VersionedCache:
+    """
+    Small results (counters, summaries) cached per worker until their
+    CacheVersion counter is bumped. A read costs one primary-key lookup.
+
+    `name` may also be a tuple of counter names: the result is recomputed
+    when any of them is bumped (still one lookup).
+    """
+
+    def __init__(self):
+        self._entries = {}  # (version name, key) -> (version, value)
+        self._lock = threading.Lock()
+
+    def get(self, name, compute, key=None):
+        version = get_versions(name) if isinstance(name, tuple) else get_version(name)
+        entry = self._entries.get((name, key))
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        value = compute()
+        with self._lock:
+            self._entries[(name, key)] = (version, value)
+        return value
+
+
+counters = VersionedCache()
+
+
+class _Flight:
+    """A computation in progress that concurrent callers wait on."""
+    __slots__ = ('done', 'value', 'error', 'discarded')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.discarded = False  # Key was discarded mid-flight; don't store the result
+
+
+class TTLCache:
+    """
+    Small per-worker result cache with a TTL, explicit invalidation and
+    single-flight coalescing: while one request computes a missing key,
+    identical requests wait for its result instead of computing it again.
+
+    Cached values must be plain data (not ORM objects bound to a session).
+    """
+
+    def __init__(self, ttl, max_entries=512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}
+        self._generation = 0           # Bumped by invalidate(); stale computations are not stored
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'invalidations': 0}
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1]
+
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self._stats['coalesced'] += 1
+                leader = False
+            else:
+                self._stats['misses'] += 1
+                flight = self._inflight[key] = _Flight()
+                generation = self._generation
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                if flight.error is None and generation == self._generation and not flight.discarded:
+                    self._entries[key] = (time.monotonic() + self.ttl, flight.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+
+    def discard(self, key):
+        """Drop one cached result (a computation already running for it won't be stored)."""
+        with self._lock:
+            self._entries.pop(key, None)
+            flight = self._inflight.pop(key, None)
+            if flight is not None:
+                flight.discarded = True
+
+    def invalidate(self):
+        """Drop every cached result (computations already running won't be stored)."""
+        with self._lock:
+            self._entries.clear()
+            self._inflight.clear()  # Later callers start a fresh computation
+            self._generation += 1
+            self._stats['invalidations'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'entries': len(self._entries), 'ttl_seconds': self.ttl}
+
+
+# Leaderboard results, keyed by (endpoint, period, first_day, rank_by, group_id).
+# submit_test invalidates this worker's copy; other workers converge within the TTL.
+LEADERBOARD_CACHE_TTL = 30
+leaderboard_cache = TTLCache(LEADERBOARD_CACHE_TTL)
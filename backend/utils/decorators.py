@@ -1,18 +1,18 @@
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import get_jwt_identity
-from models import User
+from utils.identity import current_identity
 
 def admin_required(fn):
     """
     Decorator to protect routes that require admin privileges.
     Must be used AFTER @jwt_required() decorator.
+    Checks the user's current admin flag (cached identity, invalidated when
+    it changes), not the token's is_admin claim, so a demoted or deleted
+    admin loses access without waiting for the token to expire.
     """
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(int(current_user_id))
-        
+        user = current_identity()
         if not user:
             return jsonify({"message": "User not found"}), 404
         
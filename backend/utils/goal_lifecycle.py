@@ -0,0 +1,143 @@
+"""
+Goal lifecycle: closing group goals once their end_date has passed.
+
+A sweep freezes each due goal's progress (read from the goal projection,
+never from the attempt tables) into GroupGoal.final_value and marks it
+'completed' if the target was reached, otherwise 'expired'. Closed goals
+are no longer updated by submit_test or rebuilt, so reading them is a
+lookup.
+
+Sweeps run from cron with `python sweep_goals.py`, or in-process in exactly
+one process that opts in with GOAL_SWEEP_ENABLED (a daemon thread every
+GOAL_SWEEP_INTERVAL seconds; off by default so web workers don't each start
+one). Sweeping is idempotent, so an overlapping run is still safe.
+"""
+import os
+import threading
+from datetime import datetime, time, timedelta
+from database import db
+from models import GroupGoal, GroupMember, GoalProgress, GoalContribution
+
+
+# --- Goal window end ---
+# end_date is stored as a midnight (create_goal parses YYYY-MM-DD) and covers
+# its whole day: a goal counts activity strictly before goal_window_end() and
+# is closed by the sweeper from that moment on. Every boundary check - live
+# updates, rebuilds, membership backfills and the sweep - goes through these.
+
+def goal_window_end(end_date):
+    """Exclusive end of a goal's window: midnight after its end_date's day."""
+    return datetime.combine(end_date.date(), time()) + timedelta(days=1)
+
+
+def goal_open_at(when, end_date_col=GroupGoal.end_date):
+    """SQL condition: the goal's window has not ended at `when` (no end_date = open)."""
+    # when < goal_window_end(end_date)  <=>  end_date >= midnight of when's day
+    return db.or_(end_date_col.is_(None), end_date_col >= datetime.combine(when.date(), time()))
+
+
+def before_goal_end(time_col, end_date_col):
+    """SQL condition: `time_col` is before the goal's window end (no end_date = always)."""
+    # time_col < goal_window_end(end_date)  <=>  time_col's day <= end_date's day
+    return db.or_(end_date_col.is_(None), db.func.date(time_col) <= db.func.date(end_date_col))
+
+
+def goal_value(target_type, progress):
+    """Current value of a goal from its GoalProgress / GoalContribution counters."""
+    if progress is None:
+        return 0
+    if target_type == 'avg_score':
+        return round(progress.score_sum / progress.tests_count) if progress.tests_count else 0
+    return getattr(progress, target_type, 0)
+
+
+def close_goal(goal, status, now=None):
+    """Freeze the goal's group progress and mark it closed (committed by the caller)."""
+    goal.final_value = goal_value(goal.target_type, goal.progress)
+    goal.status = status
+    goal.closed_at = now or datetime.utcnow()
+
+
+def reached_target(goal):
+    """Team goals: the group total. Individual goals: every current member reached it."""
+    if goal.scope != 'individual':
+        return goal_value(goal.target_type, goal.progress) >= goal.target_value
+
+    contributions = {c.user_id: c for c in goal.contributions}
+    member_ids = [uid for (uid,) in db.session.query(GroupMember.user_id).filter_by(group_id=goal.group_id)]
+    return bool(member_ids) and all(
+        goal_value(goal.target_type, contributions.get(uid)) >= goal.target_value for uid in member_ids
+    )
+
+
+def sweep_goals(now=None):
+    """
+    Close every active goal whose end_date (inclusive, whole day) has passed.
+
+    Returns:
+        {'completed': n, 'expired': n}
+    """
+    now = now or datetime.utcnow()
+    due = GroupGoal.query.filter(
+        GroupGoal.status == 'active',
+        GroupGoal.end_date.isnot(None),
+        db.not_(goal_open_at(now))  # Same boundary the projection stops counting at
+    ).all()
+
+    closed = {'completed': 0, 'expired': 0}
+    for goal in due:
+        status = 'completed' if reached_target(goal) else 'expired'
+        close_goal(goal, status, now)
+        closed[status] += 1
+
+    db.session.commit()
+    return closed
+
+
+class GoalSweeper:
+    """Runs sweep_goals() periodically in a daemon thread (only where GOAL_SWEEP_ENABLED is set)."""
+
+    def __init__(self):
+        self.enabled = False
+        self._app = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self._app = app
+        self.enabled = app.config.get('GOAL_SWEEP_ENABLED', False)
+        self.interval = app.config.get('GOAL_SWEEP_INTERVAL', 300)
+
+        if self.enabled:
+            # Start lazily on the first request, so forked workers get their own thread
+            app.before_request(self._ensure_started)
+
+    def shutdown(self):
+        self._stop.set()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._stop.clear()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='goal-sweeper', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._app.app_context():
+                try:
+                    closed = sweep_goals()
+                    if closed['completed'] or closed['expired']:
+                        self._app.logger.info(f"Goal sweep closed {closed}")
+                except Exception:
+                    db.session.rollback()
+                    self._app.logger.exception("Goal sweep failed")
+            self._stop.wait(self.interval)
+
+
+goal_sweeper = GoalSweeper()
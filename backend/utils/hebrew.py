@@ -0,0 +1,23 @@
+"""
+Hebrew-aware text normalization for matching and search.
+
+normalize_hebrew() folds the spelling variants that should compare equal:
+niqqud and cantillation marks are dropped, final letters become their
+regular forms (ם -> מ), geresh/gershayim and quotes are removed so
+acronyms match with or without them (מד"א -> מדא), Latin text is
+lowercased, and any other punctuation becomes a single space.
+"""
+import re
+
+NIQQUD = re.compile('[\u0591-\u05BD\u05BF-\u05C7]')             # Points and cantillation (maqaf excluded)
+QUOTES = re.compile('[\'"`\u05F3\u05F4\u2018\u2019\u201C\u201D]')  # Geresh, gershayim and quote marks
+NON_WORD = re.compile(r'[\W_]+')
+FINAL_LETTERS = str.maketrans('ךםןףץ', 'כמנפצ')
+
+
+def normalize_hebrew(text):
+    """Normalized form of `text`: words separated by single spaces."""
+    text = NIQQUD.sub('', text or '')
+    text = QUOTES.sub('', text)
+    text = text.lower().translate(FINAL_LETTERS)
+    return NON_WORD.sub(' ', text).strip()
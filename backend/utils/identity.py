@@ -0,0 +1,75 @@
+"""
+Request-scoped identity of the authenticated user.
+
+current_identity() resolves the JWT user once per request (kept on flask.g)
+as a plain Identity - id, names, admin flag and group roles - so handlers,
+decorators and membership checks share one lookup. Identities are cached
+across requests in a small per-worker LRU (utils.cache.TTLCache) keyed by
+the user's CacheVersion counter: routes that change a user's memberships or
+roles call invalidate_identity() inside their transaction, which bumps the
+counter, so every worker reloads the identity on its next request. The
+same applies to changing is_admin (see set_admin.py) or deleting a user;
+edits made directly in the database are picked up within IDENTITY_CACHE_TTL.
+"""
+from flask import g, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from database import db
+from models import User, GroupMember
+from utils.cache import TTLCache, get_version, bump_versions
+
+# Entries are keyed by version; the TTL bounds memory held by old versions and
+# how long an out-of-band database edit (no version bump) can go unnoticed
+IDENTITY_CACHE_TTL = 60
+identity_cache = TTLCache(IDENTITY_CACHE_TTL, max_entries=4096)
+
+
+class Identity:
+    """The authenticated user as plain data (safe to share between requests)."""
+    __slots__ = ('id', 'username', 'display_name', 'is_admin', 'group_roles')
+
+    def __init__(self, id, username, display_name, is_admin, group_roles):
+        self.id = id
+        self.username = username
+        self.display_name = display_name
+        self.is_admin = bool(is_admin)
+        self.group_roles = group_roles  # group_id -> 'admin' / 'member'
+
+    def role_in(self, group_id):
+        """The user's role in a group, or None if not a member."""
+        return self.group_roles.get(group_id)
+
+
+def identity_version_key(user_id):
+    return f'identity:{user_id}'
+
+
+def load_identity(user_id):
+    """Read a user's identity and group roles from the database (None if the user is gone)."""
+    user = db.session.query(
+        User.id, User.username, User.display_name, User.is_admin
+    ).filter(User.id == user_id).first()
+    if user is None:
+        return None
+
+    roles = dict(db.session.query(GroupMember.group_id, GroupMember.role).filter(GroupMember.user_id == user_id))
+    return Identity(user.id, user.username, user.display_name, user.is_admin, roles)
+
+
+def current_identity():
+    """Identity of the JWT user for this request, or None if the user no longer exists."""
+    if 'identity' not in g:
+        user_id = int(get_jwt_identity())
+        version = get_version(identity_version_key(user_id))
+        g.identity = identity_cache.get_or_compute((user_id, version), lambda: load_identity(user_id))
+    return g.identity
+
+
+def invalidate_identity(*user_ids):
+    """
+    Invalidate cached identities after their roles or memberships changed,
+    in every worker. Must be committed by the caller's transaction.
+    """
+    if user_ids:
+        bump_versions(*[identity_version_key(int(user_id)) for user_id in user_ids])
+    if has_request_context():
+        g.pop('identity', None)
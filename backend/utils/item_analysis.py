@@ -0,0 +1,237 @@
+"""
+Classical item analysis of the question bank.
+
+For every question with attempts:
+- p_value: share of attempts answered correctly (low = hard, high = easy)
+- point_biserial: correlation between answering it correctly and the score
+  of the test it was answered in (low or negative = the question does not
+  separate strong from weak examinees, often a wrong key or a misleading
+  distractor)
+- answers_a..d / answers_none: how often each option was chosen
+
+Attempts are joined to their test through QuestionAttempt.test_result_id,
+set by submit_test. Attempts without it count towards p_value and the
+distractors but not point_biserial (scored_attempts excludes them);
+link_attempts_to_tests() backfills the key for attempts recorded before it
+existed (`python analyze_items.py --link-tests`).
+
+QuestionAttempt is read in primary-key ranges of ITEM_ANALYSIS_CHUNK rows as
+plain tuples, never ORM objects, and each chunk is folded into per-question
+sums with NumPy bincounts, so memory stays flat at millions of attempts.
+The results replace the QuestionItemStats table in one transaction.
+"""
+import bisect
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+from database import db
+from models import QuestionAttempt, QuestionItemStats, TestResult
+
+ITEM_ANALYSIS_CHUNK = 100000
+LINK_TOLERANCE = timedelta(seconds=10)  # Max gap between a legacy attempt and its test
+OPTIONS = 'abcd'
+
+# Review thresholds used by GET /api/admin/item-stats?flag=
+MIN_ATTEMPTS = 20              # Fewer attempts are too noisy to flag
+TOO_EASY_P = 0.9
+TOO_HARD_P = 0.3
+LOW_DISCRIMINATION = 0.2
+
+# Sums kept per question (index = question_id)
+_SUMS = ('attempts', 'correct', 'answers_a', 'answers_b', 'answers_c', 'answers_d', 'answers_none',
+         'scored', 'scored_correct', 'score_sum', 'score_sq_sum', 'correct_score_sum')
+
+
+def _chunk_arrays(rows):
+    """(question_ids, is_correct, answer index 0-4, score or NaN) for one chunk of rows."""
+    question_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    correct = np.fromiter((bool(r[1]) for r in rows), dtype=np.float64, count=len(rows))
+    answers = np.fromiter(
+        (OPTIONS.find((r[2] or '').lower()) if r[2] else -1 for r in rows), dtype=np.int64, count=len(rows)
+    )
+    answers[answers < 0] = len(OPTIONS)  # answers_none
+    scores = np.fromiter((np.nan if r[3] is None else r[3] for r in rows), dtype=np.float64, count=len(rows))
+    return question_ids, correct, answers, scores
+
+
+def _accumulate(sums, rows):
+    question_ids, correct, answers, scores = _chunk_arrays(rows)
+    size = int(question_ids.max()) + 1
+    if size > len(sums['attempts']):
+        for name in _SUMS:
+            sums[name] = np.pad(sums[name], (0, size - len(sums[name])))
+
+    def add(name, weights=None, ids=question_ids):
+        counts = np.bincount(ids, weights=weights, minlength=len(sums[name]))
+        sums[name] += counts
+
+    add('attempts')
+    add('correct', correct)
+    for i, option in enumerate(OPTIONS):
+        add(f'answers_{option}', (answers == i).astype(np.float64))
+    add('answers_none', (answers == len(OPTIONS)).astype(np.float64))
+
+    scored = ~np.isnan(scores)
+    ids, c, s = question_ids[scored], correct[scored], scores[scored]
+    add('scored', ids=ids)
+    add('scored_correct', c, ids)
+    add('score_sum', s, ids)
+    add('score_sq_sum', s * s, ids)
+    add('correct_score_sum', c * s, ids)
+
+
+def point_biserial(n, n_correct, score_sum, score_sq_sum, correct_score_sum):
+    """
+    r_pb = (M1 - M0) / s * sqrt(p * q) per question, from sums (arrays).
+    NaN where it is undefined (everyone right, everyone wrong, or equal scores).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = n_correct / n
+        mean = score_sum / n
+        std = np.sqrt(np.maximum(score_sq_sum / n - mean * mean, 0))
+        mean_correct = correct_score_sum / n_correct
+        mean_wrong = (score_sum - correct_score_sum) / (n - n_correct)
+        r = (mean_correct - mean_wrong) / std * np.sqrt(p * (1 - p))
+    r[(n_correct == 0) | (n_correct == n) | (std == 0)] = np.nan
+    return r
+
+
+def compute_item_stats(chunk_size=ITEM_ANALYSIS_CHUNK):
+    """Recompute QuestionItemStats from every attempt. Returns the number of questions analysed."""
+    sums = {name: np.zeros(0) for name in _SUMS}
+
+    # One query per primary-key range; the test score comes from the attempt's TestResult
+    max_id = db.session.query(db.func.max(QuestionAttempt.id)).scalar() or 0
+    for start in range(0, max_id, chunk_size):
+        rows = db.session.query(
+            QuestionAttempt.question_id,
+            QuestionAttempt.is_correct,
+            QuestionAttempt.user_answer,
+            TestResult.score
+        ).outerjoin(
+            TestResult, TestResult.id == QuestionAttempt.test_result_id
+        ).filter(
+            QuestionAttempt.id > start,
+            QuestionAttempt.id <= start + chunk_size
+        ).all()
+        if rows:
+            _accumulate(sums, rows)
+
+    attempts = sums['attempts']
+    question_ids = np.nonzero(attempts)[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p_values = sums['correct'] / attempts
+    r_pb = point_biserial(
+        sums['scored'], sums['scored_correct'], sums['score_sum'], sums['score_sq_sum'], sums['correct_score_sum']
+    )
+
+    now = datetime.utcnow()
+    rows = [{
+        'question_id': int(qid),
+        'attempts': int(attempts[qid]),
+        'p_value': round(float(p_values[qid]), 4),
+        'point_biserial': None if np.isnan(r_pb[qid]) else round(float(r_pb[qid]), 4),
+        'scored_attempts': int(sums['scored'][qid]),
+        **{f'answers_{o}': int(sums[f'answers_{o}'][qid]) for o in OPTIONS},
+        'answers_none': int(sums['answers_none'][qid]),
+        'computed_at': now
+    } for qid in question_ids]
+
+    QuestionItemStats.query.delete()
+    db.session.bulk_insert_mappings(QuestionItemStats, rows)
+    db.session.commit()
+    return len(rows)
+
+
+def link_attempts_to_tests(chunk_size=ITEM_ANALYSIS_CHUNK, tolerance=LINK_TOLERANCE):
+    """
+    Backfill test_result_id for attempts recorded before it existed: each one
+    is linked to the same user's test taken closest to it, if that test is
+    within `tolerance` and no other test of the user is as close.
+
+    Returns:
+        (attempts linked, attempts left unlinked)
+    """
+    linked = unlinked = 0
+    max_id = db.session.query(db.func.max(QuestionAttempt.id)).scalar() or 0
+    for start in range(0, max_id, chunk_size):
+        attempts = db.session.query(
+            QuestionAttempt.id, QuestionAttempt.user_id, QuestionAttempt.created_at
+        ).filter(
+            QuestionAttempt.id > start,
+            QuestionAttempt.id <= start + chunk_size,
+            QuestionAttempt.test_result_id.is_(None),
+            QuestionAttempt.created_at.isnot(None)
+        ).all()
+        if not attempts:
+            continue
+
+        # The chunk's users' tests around the chunk's time span, sorted per user
+        tests = {}
+        for test_id, user_id, taken_at in db.session.query(
+            TestResult.id, TestResult.user_id, TestResult.date_taken
+        ).filter(
+            TestResult.user_id.in_({a.user_id for a in attempts}),
+            TestResult.date_taken >= min(a.created_at for a in attempts) - tolerance,
+            TestResult.date_taken <= max(a.created_at for a in attempts) + tolerance
+        ).order_by(TestResult.user_id, TestResult.date_taken):
+            times, ids = tests.setdefault(user_id, ([], []))
+            times.append(taken_at)
+            ids.append(test_id)
+
+        links = []
+        for attempt_id, user_id, created_at in attempts:
+            times, ids = tests.get(user_id, ((), ()))
+            i = bisect.bisect_left(times, created_at)
+            gaps = sorted((abs(times[j] - created_at), ids[j]) for j in (i - 1, i) if 0 <= j < len(times))
+            if gaps and gaps[0][0] <= tolerance and (len(gaps) == 1 or gaps[1][0] != gaps[0][0]):
+                links.append({'attempt_id': attempt_id, 'test_id': gaps[0][1]})
+        unlinked += len(attempts) - len(links)
+
+        if links:
+            table = QuestionAttempt.__table__
+            db.session.execute(
+                table.update().where(table.c.id == db.bindparam('attempt_id')).values(
+                    test_result_id=db.bindparam('test_id')
+                ),
+                links
+            )
+            db.session.commit()
+            linked += len(links)
+    return linked, unlinked
+
+
+class ItemAnalysisRunner:
+    """Runs compute_item_stats() in a background thread, one run at a time per worker."""
+
+    def __init__(self):
+        self._thread = None
+        self._lock = threading.Lock()
+        self.last_error = None
+
+    @property
+    def running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self, app):
+        """Start a run. Returns False if one is already running in this worker."""
+        with self._lock:
+            if self.running:
+                return False
+            self._thread = threading.Thread(target=self._run, args=(app,), name='item-analysis', daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self, app):
+        with app.app_context():
+            try:
+                count = compute_item_stats()
+                self.last_error = None
+                app.logger.info(f"Item analysis updated {count} questions")
+            except Exception as e:
+                db.session.rollback()
+                self.last_error = str(e)
+                app.logger.exception("Item analysis failed")
+
+
+item_analysis_runner = ItemAnalysisRunner()
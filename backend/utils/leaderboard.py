@@ -0,0 +1,154 @@
+"""
+Leaderboard queries served from the UserDailyActivity rollup.
+
+Periods are whole UTC days: 'weekly' covers today and the previous 6 days,
+'monthly' today and the previous 29, 'all' everything.
+"""
+from datetime import datetime, timedelta
+from database import db
+from models import User, UserDailyActivity, Group, GroupMember
+
+PERIODS = {
+    'weekly': (7, "שבועי"),
+    'monthly': (30, "חודשי"),
+    'all': (None, "כל הזמנים")
+}
+
+
+def resolve_period(period):
+    """Returns (period, first_day or None, Hebrew period name). Unknown periods mean all-time."""
+    if period not in PERIODS:
+        period = 'all'
+    days, period_name = PERIODS[period]
+    first_day = datetime.utcnow().date() - timedelta(days=days - 1) if days else None
+    return period, first_day, period_name
+
+
+def user_activity_query(first_day=None, group_id=None):
+    """
+    Per-user totals over the period, one row per active user:
+    (id, display_name, tests_taken, avg_score, total_points, correct_answers, attempts)
+    """
+    tests_taken = db.func.sum(UserDailyActivity.tests_taken)
+    score_sum = db.func.sum(UserDailyActivity.score_sum)
+
+    query = db.session.query(
+        User.id,
+        User.display_name,
+        tests_taken.label('tests_taken'),
+        (score_sum * 1.0 / db.func.nullif(tests_taken, 0)).label('avg_score'),
+        score_sum.label('total_points'),
+        db.func.sum(UserDailyActivity.correct_answers).label('correct_answers'),
+        db.func.sum(UserDailyActivity.attempts).label('attempts')
+    ).join(UserDailyActivity, UserDailyActivity.user_id == User.id)
+
+    if first_day:
+        query = query.filter(UserDailyActivity.day >= first_day)
+
+    if group_id is not None:
+        members = db.session.query(GroupMember.user_id).filter(GroupMember.group_id == group_id)
+        query = query.filter(User.id.in_(members))
+
+    return query.group_by(User.id, User.display_name)
+
+
+def group_member_stats(group_id, first_day=None):
+    """
+    Stats for every member of one group (active in the period or not), in a single query.
+
+    Returns:
+        List of dicts: user_id, display_name, role, joined_at, tests_taken,
+        avg_score, correct_answers.
+    """
+    tests_taken = db.func.coalesce(db.func.sum(UserDailyActivity.tests_taken), 0)
+
+    activity_join = UserDailyActivity.user_id == GroupMember.user_id
+    if first_day:
+        activity_join = db.and_(activity_join, UserDailyActivity.day >= first_day)
+
+    rows = db.session.query(
+        GroupMember.user_id,
+        User.display_name,
+        GroupMember.role,
+        GroupMember.joined_at,
+        tests_taken.label('tests_taken'),
+        db.func.coalesce(db.func.sum(UserDailyActivity.score_sum), 0).label('score_sum'),
+        db.func.coalesce(db.func.sum(UserDailyActivity.correct_answers), 0).label('correct_answers')
+    ).join(
+        User, User.id == GroupMember.user_id
+    ).outerjoin(
+        UserDailyActivity, activity_join
+    ).filter(
+        GroupMember.group_id == group_id
+    ).group_by(
+        GroupMember.user_id, User.display_name, GroupMember.role, GroupMember.joined_at
+    ).all()
+
+    return [{
+        "user_id": r.user_id,
+        "display_name": r.display_name,
+        "role": r.role,
+        "joined_at": r.joined_at,
+        "tests_taken": int(r.tests_taken),
+        "avg_score": round(int(r.score_sum) / int(r.tests_taken), 1) if r.tests_taken else 0,
+        "correct_answers": int(r.correct_answers)
+    } for r in rows]
+
+
+def group_standings(first_day=None):
+    """
+    Group competition standings in a single query over the rollup.
+
+    Returns:
+        (standings, memberships) - standings is a list of group dicts sorted by
+        total correct answers (rank assigned); memberships maps user_id -> [group_id].
+    """
+    correct = db.func.coalesce(db.func.sum(UserDailyActivity.correct_answers), 0)
+
+    activity_join = UserDailyActivity.user_id == GroupMember.user_id
+    if first_day:
+        activity_join = db.and_(activity_join, UserDailyActivity.day >= first_day)
+
+    # One row per (group, member) with that member's correct answers in the period
+    rows = db.session.query(
+        Group.id,
+        Group.name,
+        GroupMember.user_id,
+        User.display_name,
+        correct.label('correct_answers')
+    ).join(
+        GroupMember, GroupMember.group_id == Group.id
+    ).join(
+        User, User.id == GroupMember.user_id
+    ).outerjoin(
+        UserDailyActivity, activity_join
+    ).group_by(
+        Group.id, Group.name, GroupMember.user_id, User.display_name
+    ).order_by(Group.id, GroupMember.user_id).all()
+
+    groups = {}
+    memberships = {}
+    for group_id, group_name, user_id, display_name, member_correct in rows:
+        member_correct = int(member_correct)
+        g = groups.get(group_id)
+        if g is None:
+            g = groups[group_id] = {
+                "group_id": group_id,
+                "group_name": group_name,
+                "total_correct_answers": 0,
+                "member_count": 0,
+                "top_contributor": None,
+                "top_contributor_score": 0
+            }
+        g["total_correct_answers"] += member_correct
+        g["member_count"] += 1
+        if member_correct > g["top_contributor_score"]:
+            g["top_contributor"] = display_name
+            g["top_contributor_score"] = member_correct
+        memberships.setdefault(user_id, []).append(group_id)
+
+    # Sort by total correct answers (stable: ties keep group order)
+    standings = sorted(groups.values(), key=lambda g: g["total_correct_answers"], reverse=True)
+    for i, g in enumerate(standings):
+        g["rank"] = i + 1
+    return standings, memberships
@@ -0,0 +1,28 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Cursors are '<timestamp ISO>,<id>' strings pointing at the last row of the
+previous page; the next page continues strictly after it in
+(timestamp desc, id desc) order.
+"""
+from datetime import datetime
+from database import db
+
+
+def parse_cursor(raw):
+    """Parse a '<timestamp ISO>,<id>' cursor. Raises ValueError if malformed."""
+    date_part, _, id_part = raw.rpartition(',')
+    return datetime.fromisoformat(date_part), int(id_part)
+
+
+def make_cursor(timestamp, row_id):
+    return f"{timestamp.isoformat()},{row_id}"
+
+
+def after_cursor(query, timestamp_col, id_col, cursor):
+    """Restrict a (timestamp desc, id desc) ordered query to rows after the cursor."""
+    cursor_date, cursor_id = cursor
+    return query.filter(db.or_(
+        timestamp_col < cursor_date,
+        db.and_(timestamp_col == cursor_date, id_col < cursor_id)
+    ))
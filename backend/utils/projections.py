@@ -0,0 +1,451 @@
+"""
+Read-side projections (rollup tables) kept current by submit_test.
+
+Each projection is updated incrementally with an upsert when a test is
+submitted, and can be rebuilt from the raw event tables with the
+rebuild_* functions (see rebuild_projections.py).
+"""
+from database import db
+from sqlalchemy import case
+from datetime import date, datetime, time
+from models import (
+    QuestionAttempt, TestResult, UserDailyActivity, UserProtocolBest, UserQuestionStats,
+    GroupGoal, GroupMember, GoalProgress, GoalContribution, User, QuestionFlag, SiteHourlyActivity
+)
+from utils.goal_lifecycle import goal_open_at, before_goal_end
+
+
+def upsert(model, rows, keys, increments=(), maximums=(), replacements=()):
+    """
+    Insert rows into a projection table, merging into existing rows on key conflict.
+
+    Args:
+        model: The projection model (must have a unique constraint on `keys`).
+        rows: List of dicts with values for every column being written.
+        keys: Column names forming the unique key.
+        increments: Columns added to the existing value (counters).
+        maximums: Columns that keep the larger of the existing and new value.
+        replacements: Columns overwritten with the new value.
+    """
+    if not rows:
+        return
+
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:  # postgresql
+        from sqlalchemy.dialects.postgresql import insert
+
+    stmt = insert(table)
+    new = stmt.inserted if dialect == 'mysql' else stmt.excluded
+
+    # SQLite spells GREATEST as a multi-argument MAX
+    greatest = db.func.max if dialect == 'sqlite' else db.func.greatest
+
+    updates = {}
+    for col in increments:
+        updates[col] = table.c[col] + new[col]
+    for col in maximums:
+        updates[col] = greatest(table.c[col], new[col])
+    for col in replacements:
+        updates[col] = new[col]
+
+    if dialect == 'mysql':
+        stmt = stmt.on_duplicate_key_update(**updates)
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_=updates)
+
+    # executemany: batched into multi-row statements with a cached compiled form
+    db.session.execute(stmt, rows)
+
+
+# --- Test-result projections ---
+def record_test_result(user_id, protocol_id, score, taken_at):
+    """Apply one submitted TestResult to every projection derived from TestResult."""
+    record_protocol_result(user_id, protocol_id, score, taken_at)
+    record_daily_activity(user_id, taken_at, tests_taken=1, score_sum=score)
+    record_goal_progress(user_id, taken_at, tests_count=1, score_sum=score)
+    record_site_activity(taken_at, tests_taken=1)
+
+
+# --- Protocol best scores (protocols library) ---
+def record_protocol_result(user_id, protocol_id, score, taken_at):
+    """Fold one protocol test result into the user's best-score rollup."""
+    if protocol_id is None:
+        return  # General tests are not part of the protocols library
+
+    upsert(
+        UserProtocolBest,
+        [{
+            'user_id': user_id,
+            'protocol_id': protocol_id,
+            'best_score': score,
+            'tests_taken': 1,
+            'last_attempt_at': taken_at
+        }],
+        keys=('user_id', 'protocol_id'),
+        increments=('tests_taken',),
+        maximums=('best_score', 'last_attempt_at')
+    )
+
+
+def rebuild_protocol_bests():
+    """Regenerate UserProtocolBest from the TestResult history. Returns row count."""
+    UserProtocolBest.query.delete()
+
+    rows = db.session.query(
+        TestResult.user_id,
+        TestResult.protocol_id,
+        db.func.max(TestResult.score).label('best_score'),
+        db.func.count(TestResult.id).label('tests_taken'),
+        db.func.max(TestResult.date_taken).label('last_attempt_at')
+    ).filter(
+        TestResult.protocol_id.isnot(None)
+    ).group_by(TestResult.user_id, TestResult.protocol_id).all()
+
+    db.session.bulk_insert_mappings(UserProtocolBest, [r._asdict() for r in rows])
+    db.session.commit()
+    return len(rows)
+
+
+# --- Attempt-derived projections ---
+def record_attempt_projections(user_id, answers, attempted_at):
+    """
+    Apply one submission's answers to every projection derived from QuestionAttempt.
+    Called by submit_test, or by the write-behind flusher (utils.attempt_queue).
+
+    Args:
+        answers: List of {question_id, user_answer, is_correct} rows.
+    """
+    record_question_stats(user_id, [(a['question_id'], a['is_correct']) for a in answers], attempted_at)
+    correct_answers = sum(1 for a in answers if a['is_correct'])
+    record_daily_activity(user_id, attempted_at, correct_answers=correct_answers, attempts=len(answers))
+    record_goal_progress(user_id, attempted_at, correct_answers=correct_answers)
+    record_site_activity(attempted_at, attempts=len(answers))
+
+
+# --- Per-question mastery (weakness test) ---
+def record_question_stats(user_id, answers, attempted_at):
+    """
+    Fold answered questions into the user's mastery projection.
+
+    Args:
+        answers: Iterable of (question_id, is_correct) pairs.
+    """
+    # Aggregate first - the same question may appear twice in one submission
+    totals = {}
+    for question_id, is_correct in answers:
+        passed, failed = totals.get(question_id, (0, 0))
+        totals[question_id] = (passed + 1, failed) if is_correct else (passed, failed + 1)
+
+    upsert(
+        UserQuestionStats,
+        [{
+            'user_id': user_id,
+            'question_id': question_id,
+            'pass_count': passed,
+            'fail_count': failed,
+            'net_score': failed - passed,
+            'last_seen_at': attempted_at
+        } for question_id, (passed, failed) in totals.items()],
+        keys=('user_id', 'question_id'),
+        increments=('pass_count', 'fail_count', 'net_score'),
+        maximums=('last_seen_at',)
+    )
+
+
+def rebuild_question_stats():
+    """Regenerate UserQuestionStats from the QuestionAttempt history. Returns row count."""
+    UserQuestionStats.query.delete()
+
+    pass_count = db.func.sum(case((QuestionAttempt.is_correct == True, 1), else_=0))
+    fail_count = db.func.sum(case((QuestionAttempt.is_correct == False, 1), else_=0))
+    rows = db.session.query(
+        QuestionAttempt.user_id,
+        QuestionAttempt.question_id,
+        pass_count.label('pass_count'),
+        fail_count.label('fail_count'),
+        (fail_count - pass_count).label('net_score'),
+        db.func.max(QuestionAttempt.created_at).label('last_seen_at')
+    ).group_by(QuestionAttempt.user_id, QuestionAttempt.question_id).all()
+
+    db.session.bulk_insert_mappings(UserQuestionStats, [r._asdict() for r in rows])
+    db.session.commit()
+    return len(rows)
+
+
+# --- Daily activity (leaderboards) ---
+def record_daily_activity(user_id, when, tests_taken=0, score_sum=0, correct_answers=0, attempts=0):
+    """Add to the user's activity counters for the UTC day of `when`."""
+    if not (tests_taken or correct_answers or attempts):
+        return
+
+    upsert(
+        UserDailyActivity,
+        [{
+            'user_id': user_id,
+            'day': when.date(),
+            'tests_taken': tests_taken,
+            'score_sum': score_sum,
+            'correct_answers': correct_answers,
+            'attempts': attempts
+        }],
+        keys=('user_id', 'day'),
+        increments=('tests_taken', 'score_sum', 'correct_answers', 'attempts')
+    )
+
+
+def _as_date(value):
+    # SQLite returns DATE() as an ISO string, MySQL as a date
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def rebuild_daily_activity():
+    """Regenerate UserDailyActivity from TestResult and QuestionAttempt. Returns row count."""
+    UserDailyActivity.query.delete()
+
+    days = {}
+
+    def bucket(user_id, day):
+        key = (user_id, _as_date(day))
+        if key not in days:
+            days[key] = {'user_id': key[0], 'day': key[1], 'tests_taken': 0,
+                         'score_sum': 0, 'correct_answers': 0, 'attempts': 0}
+        return days[key]
+
+    test_day = db.func.date(TestResult.date_taken)
+    for user_id, day, tests_taken, score_sum in db.session.query(
+        TestResult.user_id, test_day, db.func.count(TestResult.id), db.func.sum(TestResult.score)
+    ).group_by(TestResult.user_id, test_day):
+        row = bucket(user_id, day)
+        row['tests_taken'] = tests_taken
+        row['score_sum'] = int(score_sum or 0)
+
+    attempt_day = db.func.date(QuestionAttempt.created_at)
+    for user_id, day, correct_answers, attempts in db.session.query(
+        QuestionAttempt.user_id,
+        attempt_day,
+        db.func.sum(case((QuestionAttempt.is_correct == True, 1), else_=0)),
+        db.func.count(QuestionAttempt.id)
+    ).group_by(QuestionAttempt.user_id, attempt_day):
+        row = bucket(user_id, day)
+        row['correct_answers'] = int(correct_answers or 0)
+        row['attempts'] = attempts
+
+    db.session.bulk_insert_mappings(UserDailyActivity, list(days.values()))
+    db.session.commit()
+    return len(days)
+
+
+# --- Group goal progress ---
+GOAL_COUNTERS = ('tests_count', 'score_sum', 'correct_answers')
+
+
+def record_goal_progress(user_id, when, tests_count=0, score_sum=0, correct_answers=0):
+    """Add to the totals and the user's contribution for every active goal of the user's groups."""
+    if not (tests_count or correct_answers):
+        return
+
+    goal_ids = [gid for (gid,) in db.session.query(GroupGoal.id).join(
+        GroupMember, GroupMember.group_id == GroupGoal.group_id
+    ).filter(
+        GroupMember.user_id == user_id,
+        GroupGoal.status == 'active',
+        GroupGoal.start_date <= when,
+        goal_open_at(when)
+    )]
+    if not goal_ids:
+        return
+
+    counters = {'tests_count': tests_count, 'score_sum': score_sum, 'correct_answers': correct_answers}
+    upsert(GoalProgress, [{'goal_id': gid, **counters} for gid in goal_ids],
+           keys=('goal_id',), increments=GOAL_COUNTERS)
+    upsert(GoalContribution, [{'goal_id': gid, 'user_id': user_id, **counters} for gid in goal_ids],
+           keys=('goal_id', 'user_id'), increments=GOAL_COUNTERS)
+
+
+def _in_goal_window(time_col, members):
+    """Events from the goal's start_date until the end of its end_date's day (if any)."""
+    return db.and_(
+        time_col >= members.c.start_date,
+        before_goal_end(time_col, members.c.end_date)
+    )
+
+
+def _goal_history(members):
+    """
+    (goal_id, user_id, tests_count, score_sum, correct_answers) per pair of a
+    `members` subquery (id, start_date, end_date, user_id), counting each
+    member's history inside the goal's window. Each history table is scanned once.
+    """
+    history = {}
+
+    for goal_id, user_id, tests_count, score_sum in db.session.query(
+        members.c.id, members.c.user_id, db.func.count(TestResult.id), db.func.sum(TestResult.score)
+    ).join(
+        TestResult, db.and_(TestResult.user_id == members.c.user_id, _in_goal_window(TestResult.date_taken, members))
+    ).group_by(members.c.id, members.c.user_id):
+        history[(goal_id, user_id)] = [tests_count, int(score_sum or 0), 0]
+
+    for goal_id, user_id, correct_answers in db.session.query(
+        members.c.id, members.c.user_id, db.func.count(QuestionAttempt.id)
+    ).join(
+        QuestionAttempt, db.and_(
+            QuestionAttempt.user_id == members.c.user_id,
+            QuestionAttempt.is_correct == True,
+            _in_goal_window(QuestionAttempt.created_at, members)
+        )
+    ).group_by(members.c.id, members.c.user_id):
+        history.setdefault((goal_id, user_id), [0, 0, 0])[2] = correct_answers
+
+    return [(goal_id, user_id, *counters) for (goal_id, user_id), counters in history.items()]
+
+
+def add_member_goal_progress(group_id, user_id):
+    """
+    Count a new member's history towards the group's active goals: adds their
+    GoalContribution rows and the same amounts to GoalProgress. Reads only
+    this user's history. Must be committed by the caller.
+    """
+    members = db.session.query(GroupGoal.id, GroupGoal.start_date, GroupGoal.end_date, GroupMember.user_id).join(
+        GroupMember, GroupMember.group_id == GroupGoal.group_id
+    ).filter(
+        GroupGoal.group_id == group_id,
+        GroupGoal.status == 'active',
+        GroupMember.user_id == user_id
+    ).subquery()
+
+    rows = [
+        {'goal_id': goal_id, 'user_id': user_id,
+         'tests_count': tests_count, 'score_sum': score_sum, 'correct_answers': correct_answers}
+        for goal_id, user_id, tests_count, score_sum, correct_answers in _goal_history(members)
+    ]
+    upsert(GoalContribution, rows, keys=('goal_id', 'user_id'), increments=GOAL_COUNTERS)
+    upsert(GoalProgress, [{k: row[k] for k in ('goal_id',) + GOAL_COUNTERS} for row in rows],
+           keys=('goal_id',), increments=GOAL_COUNTERS)
+
+
+def remove_member_goal_progress(group_id, user_id):
+    """
+    Take a departing member's contribution out of the group's active goals:
+    subtracts it from GoalProgress and deletes their GoalContribution rows.
+    Must be committed by the caller.
+    """
+    contributions = db.session.query(
+        GoalContribution.id, GoalContribution.goal_id,
+        GoalContribution.tests_count, GoalContribution.score_sum, GoalContribution.correct_answers
+    ).join(GroupGoal, GroupGoal.id == GoalContribution.goal_id).filter(
+        GroupGoal.group_id == group_id,
+        GroupGoal.status == 'active',
+        GoalContribution.user_id == user_id
+    ).all()
+    if not contributions:
+        return
+
+    upsert(GoalProgress, [{
+        'goal_id': c.goal_id,
+        'tests_count': -c.tests_count,
+        'score_sum': -c.score_sum,
+        'correct_answers': -c.correct_answers
+    } for c in contributions], keys=('goal_id',), increments=GOAL_COUNTERS)
+    GoalContribution.query.filter(
+        GoalContribution.id.in_([c.id for c in contributions])
+    ).delete(synchronize_session=False)
+
+
+def rebuild_goal_progress(goal_ids=None):
+    """
+    Recompute goal progress from the history, counting the goal group's
+    current members from the goal's start_date through its end_date. Run after a
+    goal is created or backdated; membership changes are applied incrementally
+    by add_member_goal_progress() / remove_member_goal_progress().
+
+    Args:
+        goal_ids: Goals to rebuild (default: every active goal).
+    Returns:
+        Number of contribution rows written.
+    """
+    if goal_ids is None:
+        goal_ids = [gid for (gid,) in db.session.query(GroupGoal.id).filter(GroupGoal.status == 'active')]
+    goal_ids = list(goal_ids)
+    if not goal_ids:
+        return 0
+
+    GoalContribution.query.filter(GoalContribution.goal_id.in_(goal_ids)).delete(synchronize_session=False)
+    GoalProgress.query.filter(GoalProgress.goal_id.in_(goal_ids)).delete(synchronize_session=False)
+
+    # (goal, member) pairs for all requested goals
+    members = db.session.query(GroupGoal.id, GroupGoal.start_date, GroupGoal.end_date, GroupMember.user_id).join(
+        GroupMember, GroupMember.group_id == GroupGoal.group_id
+    ).filter(GroupGoal.id.in_(goal_ids)).subquery()
+
+    contributions = [
+        {'goal_id': goal_id, 'user_id': user_id,
+         'tests_count': tests_count, 'score_sum': score_sum, 'correct_answers': correct_answers}
+        for goal_id, user_id, tests_count, score_sum, correct_answers in _goal_history(members)
+    ]
+
+    totals = {gid: {'goal_id': gid, 'tests_count': 0, 'score_sum': 0, 'correct_answers': 0} for gid in goal_ids}
+    for row in contributions:
+        for col in GOAL_COUNTERS:
+            totals[row['goal_id']][col] += row[col]
+
+    db.session.bulk_insert_mappings(GoalContribution, contributions)
+    db.session.bulk_insert_mappings(GoalProgress, list(totals.values()))
+    db.session.commit()
+    return len(contributions)
+
+
+# --- Site-wide hourly activity (admin dashboard) ---
+SITE_COUNTERS = ('new_users', 'tests_taken', 'attempts', 'flags')
+
+
+def record_site_activity(when, new_users=0, tests_taken=0, attempts=0, flags=0):
+    """Add to the site-wide counters for the UTC hour of `when`."""
+    if not (new_users or tests_taken or attempts or flags):
+        return
+
+    upsert(
+        SiteHourlyActivity,
+        [{
+            'hour': when.replace(minute=0, second=0, microsecond=0),
+            'new_users': new_users,
+            'tests_taken': tests_taken,
+            'attempts': attempts,
+            'flags': flags
+        }],
+        keys=('hour',),
+        increments=SITE_COUNTERS
+    )
+
+
+def rebuild_site_activity():
+    """Regenerate SiteHourlyActivity from the users, tests, attempts and flags. Returns row count."""
+    SiteHourlyActivity.query.delete()
+
+    hours = {}
+    sources = [
+        ('new_users', User.id, User.created_at),
+        ('tests_taken', TestResult.id, TestResult.date_taken),
+        ('attempts', QuestionAttempt.id, QuestionAttempt.created_at),
+        ('flags', QuestionFlag.id, QuestionFlag.created_at)
+    ]
+    for counter, id_col, time_col in sources:
+        day = db.func.date(time_col)
+        hour = db.func.extract('hour', time_col)
+        for day_value, hour_value, count in db.session.query(
+            day, hour, db.func.count(id_col)
+        ).filter(time_col.isnot(None)).group_by(day, hour):
+            key = datetime.combine(_as_date(day_value), time(int(hour_value)))
+            if key not in hours:
+                hours[key] = {'hour': key, **{name: 0 for name in SITE_COUNTERS}}
+            hours[key][counter] = count
+
+    db.session.bulk_insert_mappings(SiteHourlyActivity, list(hours.values()))
+    db.session.commit()
+    return len(hours)
+
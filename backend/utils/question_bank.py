@@ -0,0 +1,112 @@
+"""
+Process-local, read-only registry of the whole question bank.
+
+The bank is loaded once per worker with a single joined column query (no ORM
+objects) into compact __slots__ records, with prebuilt indexes by protocol,
+difficulty level and protocol category. Test generators resolve question IDs
+against it instead of hitting the question table.
+
+The registry is rebuilt whenever the 'question_bank' version counter in
+CacheVersion changes (see utils.cache.bump_bank_version), so every worker
+picks up imports/approvals without a restart.
+"""
+import threading
+from database import db
+from models import Protocol, Question
+from utils.cache import BANK_VERSION, get_version
+
+
+class QuestionRecord:
+    """One question, with its protocol title/category already joined in."""
+    __slots__ = (
+        'id', 'protocol_id', 'protocol_title', 'category', 'text',
+        'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer',
+        'explanation', 'source_reference', 'difficulty_level'
+    )
+
+    def __init__(self, row):
+        for name, value in zip(self.__slots__, row):
+            setattr(self, name, value)
+
+
+class QuestionBank:
+    """An immutable snapshot of the bank at one version, with lookup indexes."""
+
+    def __init__(self, version, protocols, records):
+        self.version = version
+        self.protocols = protocols  # protocol_id -> (title, category)
+        self.by_id = {}
+        self.by_protocol = {pid: [] for pid in protocols}
+        self.by_difficulty = {}
+        self.by_category = {}
+
+        for r in records:
+            self.by_id[r.id] = r
+            self.by_protocol.setdefault(r.protocol_id, []).append(r.id)
+            self.by_difficulty.setdefault(r.difficulty_level, []).append(r.id)
+            self.by_category.setdefault(r.category, []).append(r.id)
+
+        self.all_ids = list(self.by_id)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def get(self, question_ids):
+        """Resolve IDs to records, preserving order and skipping unknown IDs."""
+        return [self.by_id[qid] for qid in question_ids if qid in self.by_id]
+
+    def ids(self, protocol_id=None, difficulty_level=None, category=None):
+        """IDs matching every given filter (None = no filter on that field)."""
+        pools = []
+        if protocol_id is not None:
+            pools.append(self.by_protocol.get(protocol_id, []))
+        if difficulty_level is not None:
+            pools.append(self.by_difficulty.get(difficulty_level, []))
+        if category is not None:
+            pools.append(self.by_category.get(category, []))
+
+        if not pools:
+            return self.all_ids
+
+        pools.sort(key=len)
+        result = pools[0]
+        for pool in pools[1:]:
+            members = set(pool)
+            result = [qid for qid in result if qid in members]
+        return result
+
+
+def load_question_bank(version):
+    """Load every question (with protocol title/category) as compact records."""
+    protocols = {
+        pid: (title, category)
+        for pid, title, category in db.session.query(Protocol.id, Protocol.title, Protocol.category)
+    }
+
+    rows = db.session.query(
+        Question.id, Question.protocol_id, Protocol.title, Protocol.category, Question.text,
+        Question.option_a, Question.option_b, Question.option_c, Question.option_d,
+        Question.correct_answer, Question.explanation, Question.source_reference,
+        Question.difficulty_level
+    ).join(Protocol, Question.protocol_id == Protocol.id).order_by(Question.id)
+
+    return QuestionBank(version, protocols, [QuestionRecord(row) for row in rows])
+
+
+_bank = None
+_lock = threading.Lock()
+
+
+def get_question_bank():
+    """Return this worker's bank snapshot, reloading it if the bank version moved."""
+    global _bank
+    version = get_version(BANK_VERSION)
+
+    bank = _bank
+    if bank is not None and bank.version == version:
+        return bank
+
+    with _lock:
+        if _bank is None or _bank.version != version:
+            _bank = load_question_bank(version)
+        return _bank
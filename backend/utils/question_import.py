@@ -0,0 +1,301 @@
+"""
+Background CSV question imports.
+
+POST /api/admin/import-questions spools the upload to a temporary file,
+creates an ImportJob and returns at once. A daemon thread in the same
+worker then streams the file through csv.DictReader one line at a time
+(the upload is never held in memory), validates every row and writes the
+valid ones in transactions of IMPORT_CHUNK_SIZE questions. Each chunk
+commits the job's progress counters and the first IMPORT_MAX_ERRORS row
+errors along with its questions, so GET /api/admin/import-jobs/<id> can
+report progress from any worker.
+
+Rows that are near-duplicates of a bank question, or of an earlier row of
+the same file, are skipped and reported (utils/similarity.py).
+
+Dry-run jobs validate the whole file the same way but write nothing except
+the job row.
+
+A chunk that fails to insert is rolled back and its rows are counted as
+failed; chunks committed before it stay in the bank. Jobs run one at a time
+per worker. A job whose worker dies stays 'queued' or 'running'.
+"""
+import csv
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+from flask import current_app
+from database import db
+from models import ImportJob, Protocol, Question
+from utils.cache import bump_bank_version
+from utils.similarity import BatchIndex, find_near_duplicates, fingerprint, index_questions
+from utils.search import index_question_terms
+
+REQUIRED_HEADERS = ['protocol_name', 'text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer']
+
+# Column limits of the Question table (MySQL rejects longer values)
+OPTION_MAX_LENGTH = 200
+SOURCE_REFERENCE_MAX_LENGTH = 255
+
+
+def read_headers(path):
+    """Header row of a CSV file (None if it has none)."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        return next(csv.reader(f), None)
+
+
+def load_protocol_lookup():
+    """(protocols_by_id, protocols_by_title) for resolving the protocol_name column."""
+    protocols_by_id = {p.id: p for p in Protocol.query.all()}
+    protocols_by_title = {p.title.lower().strip(): p for p in protocols_by_id.values()}
+    return protocols_by_id, protocols_by_title
+
+
+def parse_question_row(row, protocols_by_id, protocols_by_title):
+    """
+    Validate one CSV row.
+
+    Returns:
+        Dict of Question column values. Raises ValueError if the row is invalid.
+    """
+    # 1. Protocol, by title (primary) or by integer ID (backwards compat)
+    p_raw = (row.get('protocol_name') or '').strip()
+    p_id = None
+    if p_raw.isdigit() and int(p_raw) in protocols_by_id:
+        p_id = int(p_raw)
+    if not p_id and p_raw.lower() in protocols_by_title:
+        p_id = protocols_by_title[p_raw.lower()].id
+    if not p_id:
+        raise ValueError(f"Protocol '{p_raw}' not found")
+
+    # 2. Correct answer
+    correct = (row.get('correct_answer') or '').lower().strip()
+    if correct not in ['a', 'b', 'c', 'd']:
+        raise ValueError(f"Invalid correct_answer: '{correct}'. Must be a, b, c, or d.")
+
+    # 3. Difficulty level (1-3, default 1)
+    difficulty_raw = (row.get('difficulty_level') or '1').strip()
+    if difficulty_raw.isdigit() and int(difficulty_raw) in [1, 2, 3]:
+        difficulty_level = int(difficulty_raw)
+    else:
+        difficulty_level = 1
+
+    # 4. Required text fields
+    values = {field: (row.get(field) or '').strip() for field in ('text', 'option_a', 'option_b', 'option_c', 'option_d')}
+    if not all(values.values()):
+        raise ValueError("Missing required text/option fields")
+
+    for field in ('option_a', 'option_b', 'option_c', 'option_d'):
+        if len(values[field]) > OPTION_MAX_LENGTH:
+            raise ValueError(f"{field} is longer than {OPTION_MAX_LENGTH} characters")
+
+    source_reference = (row.get('source_reference') or '').strip() or None
+    if source_reference and len(source_reference) > SOURCE_REFERENCE_MAX_LENGTH:
+        raise ValueError(f"source_reference is longer than {SOURCE_REFERENCE_MAX_LENGTH} characters")
+
+    return {
+        'protocol_id': p_id,
+        **values,
+        'correct_answer': correct,
+        'explanation': (row.get('explanation') or '').strip() or None,
+        'source_reference': source_reference,
+        'difficulty_level': difficulty_level
+    }
+
+
+def import_job_status(job):
+    """The job dict returned by the import endpoints."""
+    return {
+        "job_id": job.id,
+        "filename": job.filename,
+        "dry_run": bool(job.dry_run),
+        "status": job.status,
+        "progress": round(job.bytes_read / job.total_bytes * 100, 1) if job.total_bytes else 0.0,
+        "processed_rows": job.processed_rows,
+        "valid_count": job.valid_count,
+        "imported_count": job.imported_count,
+        "failed_count": job.failed_count,
+        "duplicate_count": job.duplicate_count,
+        "errors": json.loads(job.errors) if job.errors else [],
+        "message": job.message,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+class _CountingLines:
+    """Decodes a binary file line by line for csv, counting the bytes consumed."""
+
+    def __init__(self, f):
+        self._f = f
+        self.bytes_read = 0
+
+    def __iter__(self):
+        for i, raw in enumerate(self._f):
+            self.bytes_read += len(raw)
+            yield raw.decode('utf-8-sig' if i == 0 else 'utf-8')
+
+
+class ImportRunner:
+    """Runs queued ImportJobs one at a time in a daemon thread of each worker."""
+
+    def __init__(self):
+        self._app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.chunk_size = 500
+        self.max_errors = 100
+
+    def init_app(self, app):
+        self._app = app
+        self.chunk_size = app.config.get('IMPORT_CHUNK_SIZE', 500)
+        self.max_errors = app.config.get('IMPORT_MAX_ERRORS', 100)
+
+    def submit(self, job_id, path):
+        """Queue a committed ImportJob; the runner deletes `path` when the job ends."""
+        if self._app is None:
+            self._app = current_app._get_current_object()
+        self._ensure_started()
+        self._queue.put((job_id, path))
+
+    def _ensure_started(self):
+        # Start lazily, and again in a forked worker (threads don't survive fork)
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='question-importer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            job_id, path = self._queue.get()
+            try:
+                with self._app.app_context():
+                    self._run_job(job_id, path)
+            except Exception:
+                self._app.logger.exception(f"Import job {job_id} crashed")
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _run_job(self, job_id, path):
+        job = db.session.get(ImportJob, job_id)
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        try:
+            self._import(job, path)
+            job.status = 'completed'
+        except Exception as e:
+            db.session.rollback()
+            job.status = 'failed'
+            job.message = str(e)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    def _import(self, job, path):
+        protocols_by_id, protocols_by_title = load_protocol_lookup()
+        progress = {'processed_rows': 0, 'valid_count': 0, 'imported_count': 0, 'failed_count': 0, 'duplicate_count': 0}
+        errors = []
+        chunk = []  # (row number, Question values)
+        # Earlier rows of this file: only the current chunk is needed once previous
+        # chunks are in the bank, a dry run has to remember the whole file
+        batch_index = BatchIndex()
+
+        with open(path, 'rb') as f:
+            lines = _CountingLines(f)
+            for i, row in enumerate(csv.DictReader(lines)):
+                row_num = i + 2  # Row 1 is the header
+                try:
+                    chunk.append((row_num, parse_question_row(row, protocols_by_id, protocols_by_title)))
+                    progress['valid_count'] += 1
+                except Exception as e:
+                    progress['failed_count'] += 1
+                    if len(errors) < self.max_errors:
+                        errors.append(f"Row {row_num}: {str(e)}")
+                progress['processed_rows'] += 1
+
+                if len(chunk) >= self.chunk_size:
+                    self._write_chunk(job, chunk, progress, errors, lines.bytes_read, batch_index)
+                    chunk = []
+                    if not job.dry_run:
+                        batch_index = BatchIndex()
+
+            self._write_chunk(job, chunk, progress, errors, lines.bytes_read, batch_index)
+
+    def _skip_duplicates(self, chunk, progress, errors, batch_index):
+        """
+        Drop rows that are near-duplicates of the bank or of earlier rows.
+        Returns the kept (row number, values, fingerprint); the caller adds
+        them to batch_index once they are written.
+        """
+        fingerprints = [
+            fingerprint(values['text'], (values['option_a'], values['option_b'], values['option_c'], values['option_d']))
+            for _, values in chunk
+        ]
+        bank_matches = find_near_duplicates(fingerprints)
+
+        kept = []
+        chunk_index = BatchIndex()  # Earlier rows of this chunk
+        for (row_num, values), fp, bank_match in zip(chunk, fingerprints, bank_matches):
+            if bank_match:
+                reason = f"near-duplicate of question #{bank_match[0]} ({round(bank_match[1] * 100)}% similar)"
+            else:
+                row_match = max(
+                    filter(None, (batch_index.best_match(fp), chunk_index.best_match(fp))),
+                    key=lambda match: match[1], default=None
+                )
+                reason = f"near-duplicate of row {row_match[0]} ({round(row_match[1] * 100)}% similar)" if row_match else None
+
+            if reason:
+                progress['valid_count'] -= 1
+                progress['duplicate_count'] += 1
+                if len(errors) < self.max_errors:
+                    errors.append(f"Row {row_num}: {reason}")
+            else:
+                chunk_index.add(row_num, fp)
+                kept.append((row_num, values, fp))
+        return kept
+
+    def _write_chunk(self, job, chunk, progress, errors, bytes_read, batch_index):
+        """Insert one chunk and save the job's progress in the same transaction."""
+        kept = self._skip_duplicates(chunk, progress, errors, batch_index) if chunk else []
+
+        written = bool(kept)
+        if kept and not job.dry_run:
+            try:
+                questions = [Question(**values) for _, values, _ in kept]
+                db.session.add_all(questions)
+                bump_bank_version({values['protocol_id'] for _, values, _ in kept})
+                db.session.flush()
+                index_questions(questions)
+                index_question_terms(questions)
+                progress['imported_count'] += len(kept)
+            except Exception as e:
+                db.session.rollback()
+                written = False
+                progress['failed_count'] += len(kept)
+                if len(errors) < self.max_errors:
+                    errors.append(f"Rows {kept[0][0]}-{kept[-1][0]}: insert failed: {str(e)}")
+
+        # Only rows that made it (or would, in a dry run) can be duplicated by later rows
+        if written:
+            for row_num, _, fp in kept:
+                batch_index.add(row_num, fp)
+
+        for name, value in progress.items():
+            setattr(job, name, value)
+        job.bytes_read = bytes_read
+        job.errors = json.dumps(errors, ensure_ascii=False)
+        db.session.commit()
+
+
+import_runner = ImportRunner()
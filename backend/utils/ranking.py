@@ -0,0 +1,77 @@
+"""
+Exact leaderboard ranking over the daily activity rollup.
+
+A RankingSnapshot holds every participant of one (period, rank_by, group)
+leaderboard sorted by its ranking key. Rank lookups are a bisect over the
+sorted keys (O(log n)); pages and "users around me" windows are slices.
+
+Snapshots are built with one grouped rollup query and cached per worker in
+utils.cache.leaderboard_cache, so browsing pages or refreshing does not
+recompute the full ranking.
+"""
+from bisect import bisect_left
+from database import db
+from models import UserDailyActivity
+from utils.leaderboard import user_activity_query
+
+
+def ranking_key(entry, rank_by):
+    """Sort key: smaller is better. user_id breaks ties so ranks are deterministic."""
+    if rank_by == 'correct_answers':
+        return (-entry['correct_answers'], -entry['avg_score'], entry['user_id'])
+    return (-entry['avg_score'], -entry['tests_taken'], entry['user_id'])
+
+
+class RankingSnapshot:
+
+    def __init__(self, rows, rank_by):
+        entries = [{
+            'user_id': r.id,
+            'display_name': r.display_name,
+            'tests_taken': int(r.tests_taken),
+            'avg_score': round(float(r.avg_score), 1) if r.avg_score else 0,
+            'total_points': int(r.total_points or 0),
+            'correct_answers': int(r.correct_answers or 0)
+        } for r in rows]
+
+        keyed = sorted((ranking_key(e, rank_by), e) for e in entries)
+        self._keys = [key for key, _ in keyed]
+        self._entries = [entry for _, entry in keyed]
+        self._key_of = {entry['user_id']: key for key, entry in keyed}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rank_of(self, user_id):
+        """1-based rank of a user, or None if they have no activity in the period."""
+        key = self._key_of.get(user_id)
+        if key is None:
+            return None
+        return bisect_left(self._keys, key) + 1
+
+    def percentile(self, rank):
+        """Share of the other participants ranked below this rank (100 = first place)."""
+        total = len(self._entries)
+        if total <= 1:
+            return 100.0
+        return round((total - rank) / (total - 1) * 100, 1)
+
+    def page(self, offset, limit):
+        """(rank, entry) pairs for one page of the leaderboard."""
+        return [(offset + i + 1, e) for i, e in enumerate(self._entries[offset:offset + limit])]
+
+    def around(self, user_id, radius):
+        """(rank, entry) pairs for the user and up to `radius` neighbours on each side."""
+        rank = self.rank_of(user_id)
+        if rank is None:
+            return []
+        start = max(rank - 1 - radius, 0)
+        return self.page(start, rank + radius - start)
+
+
+def build_ranking(first_day, rank_by, group_id=None):
+    """Rank every participant of a leaderboard with one grouped rollup query."""
+    rows = user_activity_query(first_day, group_id).having(
+        db.func.sum(UserDailyActivity.tests_taken) > 0
+    ).all()
+    return RankingSnapshot(rows, rank_by)
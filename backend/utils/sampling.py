@@ -0,0 +1,94 @@
+"""
+ID-only sampling engine for generated tests.
+
+Tests are assembled by sampling question IDs from the QuestionBank indexes
+and only then resolving the chosen IDs to records, so the cost depends on
+the test size rather than on the size of the bank.
+
+A blueprint can stratify the sample:
+    per_category    - take this many questions from every protocol category
+    difficulty_mix  - relative weights per difficulty level, e.g. {1: 50, 2: 30, 3: 20}
+"""
+import random
+
+
+def allocate(total, weights):
+    """Split `total` across keys proportionally to `weights` (largest remainder method)."""
+    weight_sum = sum(weights.values())
+    if total <= 0 or weight_sum <= 0:
+        return {key: 0 for key in weights}
+
+    exact = {key: total * w / weight_sum for key, w in weights.items()}
+    shares = {key: int(value) for key, value in exact.items()}
+
+    leftover = total - sum(shares.values())
+    by_remainder = sorted(weights, key=lambda key: exact[key] - shares[key], reverse=True)
+    for key in by_remainder[:leftover]:
+        shares[key] += 1
+    return shares
+
+
+def sample_stratum(bank, quota, category=None, difficulty_mix=None, rng=random):
+    """Sample up to `quota` IDs from one category (None = whole bank), honouring the difficulty mix."""
+    if not difficulty_mix:
+        pool = bank.ids(category=category)
+        return rng.sample(pool, min(quota, len(pool)))
+
+    chosen = []
+    for level, count in allocate(quota, difficulty_mix).items():
+        pool = bank.ids(category=category, difficulty_level=level)
+        chosen.extend(rng.sample(pool, min(count, len(pool))))
+
+    # A difficulty level ran short - top up from the rest of the stratum
+    shortfall = quota - len(chosen)
+    if shortfall > 0:
+        taken = set(chosen)
+        rest = [qid for qid in bank.ids(category=category) if qid not in taken]
+        chosen.extend(rng.sample(rest, min(shortfall, len(rest))))
+
+    return chosen
+
+
+def sample_question_ids(bank, count=100, per_category=None, difficulty_mix=None, rng=random):
+    """
+    Pick question IDs for a generated test.
+
+    Args:
+        bank: A QuestionBank snapshot.
+        count: Total questions when not stratifying by category.
+        per_category: If set, questions per protocol category (overrides count).
+        difficulty_mix: Optional {difficulty_level: weight} mapping.
+
+    Returns:
+        A shuffled list of distinct question IDs.
+    """
+    if per_category:
+        selected = []
+        for category in bank.by_category:
+            selected.extend(sample_stratum(bank, per_category, category, difficulty_mix, rng))
+    else:
+        selected = sample_stratum(bank, count, None, difficulty_mix, rng)
+
+    rng.shuffle(selected)
+    return selected
+
+
+def parse_difficulty_mix(raw):
+    """
+    Parse a difficulty mix query param such as "1:50,2:30,3:20".
+    Raises ValueError on malformed input.
+    """
+    if not raw:
+        return None
+
+    mix = {}
+    for part in raw.split(','):
+        level, _, weight = part.partition(':')
+        level, weight = int(level), int(weight)
+        if level not in (1, 2, 3) or weight < 0:
+            raise ValueError(f"Invalid difficulty_mix entry: '{part}'")
+        mix[level] = weight
+
+    if sum(mix.values()) == 0:
+        raise ValueError("difficulty_mix weights must not all be zero")
+    return mix
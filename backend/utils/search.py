@@ -0,0 +1,170 @@
+"""
+Question search over an inverted index.
+
+Each question is tokenized into Hebrew-normalized words (utils.hebrew) from
+its text, options, explanation and source_reference. The QuestionSearchTerm
+table holds one posting per (term, question) with a field-weighted count,
+so a search is an indexed `term IN (...)` lookup rather than a LIKE scan.
+
+Hebrew attaches prefixes (ו, ה, ב, ל, מ, ש, כ) to words, so a word that
+starts with them is also indexed with up to two of them stripped
+(בהחייאה -> החייאה, חייאה): a search for החייאה finds בהחייאה.
+
+Every word of the query must match (AND). Hits are ranked by the sum of
+weight * idf over the query terms, where idf = log(1 + N / df). The ranked
+list is computed once per query and cached per worker, keyed by the bank
+version, so further pages are slices.
+
+Every code path that adds questions calls index_question_terms() in its
+transaction, and `python rebuild_projections.py search_index` rebuilds it.
+"""
+import math
+from collections import Counter
+from database import db
+from models import Question, QuestionSearchTerm
+from utils.cache import counters, get_version, TTLCache, BANK_VERSION
+from utils.hebrew import normalize_hebrew
+
+TERM_MAX_LENGTH = 64
+MIN_TERM_LENGTH = 2
+MAX_QUERY_TERMS = 10
+HEBREW_PREFIXES = 'והבלמשכ'
+
+# Ranked hit lists keyed by (bank version, terms, filters); the TTL bounds memory
+# held by one-off searches
+SEARCH_CACHE_TTL = 300
+search_cache = TTLCache(SEARCH_CACHE_TTL, max_entries=256)
+
+# Field -> weight of one occurrence
+FIELD_WEIGHTS = {
+    'text': 4,
+    'source_reference': 3,
+    'option_a': 2,
+    'option_b': 2,
+    'option_c': 2,
+    'option_d': 2,
+    'explanation': 1
+}
+
+STOP_WORDS = {'של', 'את', 'על', 'עם', 'או', 'אם', 'כי', 'לא', 'הוא', 'היא', 'זה', 'זו', 'יש', 'אל', 'גם', 'כל'}
+
+
+def tokenize(text):
+    """Normalized words of `text`, without stop words and single letters (digits are kept)."""
+    return [
+        word[:TERM_MAX_LENGTH] for word in normalize_hebrew(text).split()
+        if (len(word) >= MIN_TERM_LENGTH or word.isdigit()) and word not in STOP_WORDS
+    ]
+
+
+def term_variants(word):
+    """The word and its forms with one or two Hebrew prefix letters stripped."""
+    variants = [word]
+    for _ in range(2):
+        if len(word) > 3 and word[0] in HEBREW_PREFIXES:
+            word = word[1:]
+            variants.append(word)
+        else:
+            break
+    return variants
+
+
+def question_terms(q):
+    """term -> weight for one question."""
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for word in tokenize(getattr(q, field)):
+            for term in term_variants(word):
+                weights[term] += weight
+    return weights
+
+
+def index_question_terms(questions):
+    """Add postings for new questions (with IDs assigned). Committed by the caller."""
+    rows = [
+        {'term': term, 'question_id': q.id, 'weight': weight}
+        for q in questions for term, weight in question_terms(q).items()
+    ]
+    if rows:
+        db.session.execute(QuestionSearchTerm.__table__.insert(), rows)
+    return len(rows)
+
+
+def search_questions(query_text, protocol_id=None, difficulty=None, offset=0, limit=20):
+    """
+    Ranked search over the question bank.
+
+    Returns:
+        (total hits, [(question_id, score)] for the requested page)
+    """
+    terms = tuple(dict.fromkeys(tokenize(query_text)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return 0, []
+
+    # The ranked hit list is cached per worker until the bank changes, so
+    # paging through results or repeating a search skips the aggregation
+    version = get_version(BANK_VERSION)
+    ranked = search_cache.get_or_compute(
+        (version, terms, protocol_id, difficulty),
+        lambda: rank_questions(terms, protocol_id, difficulty)
+    )
+    return len(ranked), ranked[offset:offset + limit]
+
+
+def rank_questions(terms, protocol_id=None, difficulty=None):
+    """[(question_id, score)] of every question matching all terms, best first."""
+    # Document frequencies; a term that occurs nowhere means no hits (AND semantics)
+    df = dict(db.session.query(
+        QuestionSearchTerm.term, db.func.count(QuestionSearchTerm.question_id)
+    ).filter(QuestionSearchTerm.term.in_(terms)).group_by(QuestionSearchTerm.term).all())
+    if len(df) < len(terms):
+        return []
+
+    total_questions = max(counters.get(BANK_VERSION, lambda: Question.query.count(), key='question_count'), 1)
+    idf = db.case(
+        {term: math.log(1 + total_questions / df[term]) for term in terms},
+        value=QuestionSearchTerm.term
+    )
+    score = db.func.sum(QuestionSearchTerm.weight * idf)
+
+    hits = db.session.query(
+        QuestionSearchTerm.question_id, score.label('score')
+    ).filter(QuestionSearchTerm.term.in_(terms))
+
+    if len(terms) > 1:
+        # Only questions in the shortest posting list can match every term
+        rarest = min(terms, key=df.get)
+        hits = hits.filter(QuestionSearchTerm.question_id.in_(
+            db.session.query(QuestionSearchTerm.question_id).filter(QuestionSearchTerm.term == rarest)
+        ))
+
+    if protocol_id is not None or difficulty is not None:
+        hits = hits.join(Question, Question.id == QuestionSearchTerm.question_id)
+        if protocol_id is not None:
+            hits = hits.filter(Question.protocol_id == protocol_id)
+        if difficulty is not None:
+            hits = hits.filter(Question.difficulty_level == difficulty)
+
+    # One posting per (term, question), so every term matched <=> count == len(terms)
+    rows = hits.group_by(QuestionSearchTerm.question_id).having(
+        db.func.count(QuestionSearchTerm.term) == len(terms)
+    ).order_by(score.desc(), QuestionSearchTerm.question_id).all()
+    return [(question_id, round(float(s), 2)) for question_id, s in rows]
+
+
+def rebuild_search_index(batch_size=1000):
+    """Recompute every question's postings. Returns the number of postings written."""
+    QuestionSearchTerm.query.delete()
+
+    written = 0
+    last_id = 0
+    while True:
+        batch = Question.query.filter(Question.id > last_id).order_by(Question.id).limit(batch_size).all()
+        if not batch:
+            break
+        written += index_question_terms(batch)
+        last_id = batch[-1].id
+        db.session.expunge_all()  # Keep the session small on large banks
+
+    db.session.commit()
+    return written
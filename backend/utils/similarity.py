@@ -0,0 +1,189 @@
+"""
+Near-duplicate question detection with MinHash / LSH.
+
+A question's fingerprint is the set of character SHINGLE_SIZE-grams of its
+Hebrew-normalized text plus its (sorted) options. A MinHash signature of
+NUM_PERM values estimates the Jaccard similarity of two shingle sets, and
+is split into BANDS bands of ROWS values; each band hashes to one bucket.
+Two questions share at least one bucket with high probability once their
+similarity passes ~(1/BANDS)^(1/ROWS) (about 0.37 here), so candidates are
+found with an indexed `bucket IN (...)` lookup instead of scanning the bank.
+
+Buckets of bank questions live in the QuestionSimilarityBucket table: every
+code path that adds questions calls index_questions() in its transaction,
+and `python rebuild_projections.py similarity_index` rebuilds it. Candidates
+are verified with the exact Jaccard similarity of their shingles, so only
+matches at or above DUPLICATE_THRESHOLD are reported.
+"""
+import hashlib
+import zlib
+from collections import Counter, namedtuple
+import numpy as np
+from database import db
+from models import Question, QuestionSimilarityBucket
+from utils.hebrew import normalize_hebrew
+
+SHINGLE_SIZE = 4
+NUM_PERM = 60
+BANDS = 20
+ROWS = NUM_PERM // BANDS
+DUPLICATE_THRESHOLD = 0.6      # Jaccard similarity reported as a near-duplicate
+MAX_CANDIDATES = 20            # Bank questions verified per lookup (most shared buckets first)
+LOOKUP_BATCH_SIZE = 500        # Fingerprints per bucket query
+
+# Universal hashing h(x) = (a * x + b) mod p, with fixed coefficients so every
+# worker and every rebuild computes the same buckets
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240601)
+_A = _rng.randint(1, _PRIME, NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, NUM_PERM).astype(np.uint64)
+
+Fingerprint = namedtuple('Fingerprint', ['shingles', 'signature', 'buckets'])
+
+
+def question_shingles(text, options):
+    """Character n-grams of the normalized question text and options."""
+    normalized = ' '.join([normalize_hebrew(text)] + sorted(normalize_hebrew(o) for o in options))
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def fingerprint(text, options):
+    """Shingles, MinHash signature and LSH buckets of one question."""
+    shingles = question_shingles(text, options)
+    if not shingles:
+        return Fingerprint(shingles, None, [])
+
+    # crc32 < 2^32 and a < 2^31, so a * x + b fits in uint64
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+    signature = ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1)
+
+    buckets = []
+    for band in range(BANDS):
+        values = signature[band * ROWS:(band + 1) * ROWS].astype('<u8').tobytes()
+        digest = hashlib.blake2b(bytes([band]) + values, digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return Fingerprint(shingles, signature, buckets)
+
+
+def question_fingerprint(q):
+    """Fingerprint of a Question (or any object with its text/option fields)."""
+    return fingerprint(q.text, (q.option_a, q.option_b, q.option_c, q.option_d))
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def index_questions(questions):
+    """Add bucket rows for new questions (with IDs assigned). Committed by the caller."""
+    rows = [{'question_id': q.id, 'bucket': bucket} for q in questions for bucket in question_fingerprint(q).buckets]
+    if rows:
+        db.session.execute(QuestionSimilarityBucket.__table__.insert(), rows)
+    return len(rows)
+
+
+def find_near_duplicates(fingerprints, threshold=DUPLICATE_THRESHOLD):
+    """
+    Closest bank question for each fingerprint.
+
+    Returns:
+        List aligned with `fingerprints`: (question_id, similarity) of the best
+        match at or above `threshold`, or None.
+    """
+    results = []
+    for start in range(0, len(fingerprints), LOOKUP_BATCH_SIZE):
+        results.extend(_lookup_batch(fingerprints[start:start + LOOKUP_BATCH_SIZE], threshold))
+    return results
+
+
+def _lookup_batch(fingerprints, threshold):
+    all_buckets = {bucket for fp in fingerprints for bucket in fp.buckets}
+    if not all_buckets:
+        return [None] * len(fingerprints)
+
+    # One indexed query for every bucket of the batch
+    questions_in_bucket = {}
+    for question_id, bucket in db.session.query(
+        QuestionSimilarityBucket.question_id, QuestionSimilarityBucket.bucket
+    ).filter(QuestionSimilarityBucket.bucket.in_(all_buckets)):
+        questions_in_bucket.setdefault(bucket, []).append(question_id)
+
+    candidates = []
+    for fp in fingerprints:
+        shared = Counter(qid for bucket in fp.buckets for qid in questions_in_bucket.get(bucket, ()))
+        candidates.append([qid for qid, _ in shared.most_common(MAX_CANDIDATES)])
+
+    # One query for the text of every candidate, then exact verification
+    candidate_ids = {qid for ids in candidates for qid in ids}
+    shingles = {}
+    if candidate_ids:
+        for q in db.session.query(
+            Question.id, Question.text, Question.option_a, Question.option_b, Question.option_c, Question.option_d
+        ).filter(Question.id.in_(candidate_ids)):
+            shingles[q.id] = question_shingles(q.text, (q.option_a, q.option_b, q.option_c, q.option_d))
+
+    results = []
+    for fp, ids in zip(fingerprints, candidates):
+        best = None
+        for qid in ids:
+            score = jaccard(fp.shingles, shingles.get(qid))
+            if score >= threshold and (best is None or score > best[1]):
+                best = (qid, round(score, 2))
+        results.append(best)
+    return results
+
+
+class BatchIndex:
+    """
+    In-memory LSH over questions that are not in the bank yet (e.g. earlier
+    rows of the same CSV), compared by their MinHash estimate.
+    """
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._buckets = {}
+        self._signatures = {}
+
+    def add(self, key, fp):
+        if fp.signature is None:
+            return
+        self._signatures[key] = fp.signature
+        for bucket in fp.buckets:
+            self._buckets.setdefault(bucket, []).append(key)
+
+    def best_match(self, fp):
+        """(key, estimated similarity) of the closest added question, or None."""
+        best = None
+        seen = set()
+        for bucket in fp.buckets:
+            for key in self._buckets.get(bucket, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                score = float(np.mean(self._signatures[key] == fp.signature))
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (key, round(score, 2))
+        return best
+
+
+def rebuild_similarity_index(batch_size=1000):
+    """Recompute every question's buckets. Returns the number of bucket rows written."""
+    QuestionSimilarityBucket.query.delete()
+
+    written = 0
+    last_id = 0
+    while True:
+        batch = db.session.query(
+            Question.id, Question.text, Question.option_a, Question.option_b, Question.option_c, Question.option_d
+        ).filter(Question.id > last_id).order_by(Question.id).limit(batch_size).all()
+        if not batch:
+            break
+        written += index_questions(batch)
+        last_id = batch[-1].id
+
+    db.session.commit()
+    return written
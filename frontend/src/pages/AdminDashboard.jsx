@@ -7,6 +7,7 @@ const AdminDashboard = () => {
     const navigate = useNavigate();
     const { user, loading: authLoading } = useAuth();
     const [suggestions, setSuggestions] = useState([]);
+    const [suggestionsCursor, setSuggestionsCursor] = useState(null);
     const [stats, setStats] = useState(null);
     const [loading, setLoading] = useState(true);
     const [statusFilter, setStatusFilter] = useState('pending');
@@ -15,6 +16,7 @@ const AdminDashboard = () => {
     const [toast, setToast] = useState({ show: false, message: '', type: '' });
     const [activeTab, setActiveTab] = useState('suggestions'); // 'suggestions' or 'flags'
     const [flaggedQuestions, setFlaggedQuestions] = useState([]);
+    const [flagsCursor, setFlagsCursor] = useState(null);
     const [flagFilter, setFlagFilter] = useState('pending');
 
     // Check admin access - only redirect AFTER auth is loaded
@@ -36,14 +38,16 @@ const AdminDashboard = () => {
         }
     }, [user, statusFilter, activeTab, flagFilter]);
 
-    const fetchSuggestions = async () => {
-        setLoading(true);
+    const fetchSuggestions = async (cursor = null) => {
+        if (!cursor) setLoading(true);
         try {
             const token = localStorage.getItem('token');
             const res = await axios.get(`http://127.0.0.1:5000/api/admin/suggestions?status=${statusFilter}`, {
-                headers: { Authorization: `Bearer ${token}` }
+                headers: { Authorization: `Bearer ${token}` },
+                params: cursor ? { before: cursor } : {}
             });
-            setSuggestions(res.data.suggestions);
+            setSuggestions(prev => cursor ? [...prev, ...res.data.suggestions] : res.data.suggestions);
+            setSuggestionsCursor(res.data.next_cursor);
         } catch (err) {
             console.error('Error fetching suggestions:', err);
             showToast('שגיאה בטעינת ההצעות', 'error');
@@ -52,14 +56,16 @@ const AdminDashboard = () => {
         }
     };
 
-    const fetchFlaggedQuestions = async () => {
-        setLoading(true);
+    const fetchFlaggedQuestions = async (cursor = null) => {
+        if (!cursor) setLoading(true);
         try {
             const token = localStorage.getItem('token');
-            const res = await axios.get(`http://127.0.0.1:5000/api/admin/flagged-questions?status=${flagFilter}`, {
-                headers: { Authorization: `Bearer ${token}` }
+            const res = await axios.get(`http://127.0.0.1:5000/api/admin/flag-queue?status=${flagFilter}`, {
+                headers: { Authorization: `Bearer ${token}` },
+                params: cursor ? { before: cursor } : {}
             });
-            setFlaggedQuestions(res.data.flags);
+            setFlaggedQuestions(prev => cursor ? [...prev, ...res.data.questions] : res.data.questions);
+            setFlagsCursor(res.data.next_cursor);
         } catch (err) {
             console.error('Error fetching flagged questions:', err);
             showToast('שגיאה בטעינת השאלות המסומנות', 'error');
@@ -68,15 +74,16 @@ const AdminDashboard = () => {
         }
     };
 
-    const handleResolveFlag = async (flagId) => {
+    const handleResolveFlags = async (questionId) => {
         try {
             const token = localStorage.getItem('token');
-            await axios.post(`http://127.0.0.1:5000/api/admin/resolve-flag/${flagId}`, {
+            await axios.post('http://127.0.0.1:5000/api/admin/resolve-flags', {
+                question_ids: [questionId],
                 status: 'resolved'
             }, {
                 headers: { Authorization: `Bearer ${token}` }
             });
-            setFlaggedQuestions(flaggedQuestions.filter(f => f.id !== flagId));
+            setFlaggedQuestions(flaggedQuestions.filter(f => f.question_id !== questionId));
             showToast('השאלה סומנה כטופלה', 'success');
         } catch (err) {
             showToast('שגיאה', 'error');
@@ -198,6 +205,32 @@ const AdminDashboard = () => {
                 </div>
             )}
 
+            {/* Activity (last 24 hours / 7 days / 30 days) */}
+            {stats?.activity && (
+                <div className="bg-gray-800 border border-gray-700 rounded-xl p-4 mb-8 overflow-x-auto">
+                    <table className="w-full text-sm text-center">
+                        <thead>
+                            <tr className="text-gray-400">
+                                <th className="text-right py-1">פעילות</th>
+                                <th>24 שעות</th>
+                                <th>7 ימים</th>
+                                <th>30 ימים</th>
+                            </tr>
+                        </thead>
+                        <tbody className="text-white">
+                            {[['new_users', 'משתמשים חדשים'], ['tests_taken', 'מבחנים'], ['attempts', 'תשובות'], ['flags', 'דיווחים']].map(([key, label]) => (
+                                <tr key={key} className="border-t border-gray-700">
+                                    <td className="text-right py-1 text-gray-300">{label}</td>
+                                    <td>{stats.activity['24h'][key]}</td>
+                                    <td>{stats.activity['7d'][key]}</td>
+                                    <td>{stats.activity['30d'][key]}</td>
+                                </tr>
+                            ))}
+                        </tbody>
+                    </table>
+                </div>
+            )}
+
 
 
             {/* Actions Bar */}
@@ -275,6 +308,11 @@ const AdminDashboard = () => {
                                                     }`}>
                                                     {s.status}
                                                 </span>
+                                                {s.duplicate_of_id && (
+                                                    <span className="bg-orange-500/20 text-orange-400 text-xs px-2 py-1 rounded">
+                                                        🔁 דומה לשאלה #{s.duplicate_of_id} ({Math.round(s.duplicate_score * 100)}%)
+                                                    </span>
+                                                )}
                                             </div>
                                             <div className="text-left">
                                                 <span className="text-gray-500 text-sm block">הוצע ע"י: <span className="text-cyan-400">{s.suggested_by}</span></span>
@@ -346,6 +384,11 @@ const AdminDashboard = () => {
                                         )}
                                     </div>
                                 ))}
+                                {suggestionsCursor && (
+                                    <button onClick={() => fetchSuggestions(suggestionsCursor)} className="w-full bg-gray-700 hover:bg-gray-600 text-white px-4 py-2 rounded-lg font-bold transition">
+                                        טען הצעות נוספות
+                                    </button>
+                                )}
                             </div>
                         )
                     }
@@ -410,42 +453,45 @@ const AdminDashboard = () => {
                     ) : (
                         <div className="space-y-4">
                             {flaggedQuestions.map(f => (
-                                <div key={f.id} className="bg-gray-800 p-5 rounded-xl border border-orange-500/30">
+                                <div key={f.question_id} className="bg-gray-800 p-5 rounded-xl border border-orange-500/30">
                                     <div className="flex items-start justify-between mb-3">
                                         <div className="flex items-center gap-3">
                                             <span className="bg-orange-500/20 text-orange-400 px-2 py-1 rounded text-xs">🚩 ID: {f.question_id}</span>
+                                            <span className="bg-gray-700 text-gray-300 px-2 py-1 rounded text-xs">{f.flag_count} דיווחים</span>
                                             <span className="text-blue-400 text-sm">{f.protocol_title}</span>
                                         </div>
                                         <div className="text-left">
-                                            <span className="text-gray-500 text-xs block">דווח ע"י: {f.flagged_by}</span>
-                                            {f.flagged_by_email && (
-                                                <span
-                                                    className="text-blue-400 text-xs cursor-pointer hover:underline"
-                                                    onClick={() => { navigator.clipboard.writeText(f.flagged_by_email); alert('המייל הועתק!'); }}
-                                                    title="לחץ להעתקה"
-                                                >
-                                                    📧 {f.flagged_by_email}
-                                                </span>
-                                            )}
+                                            <span className="text-gray-500 text-xs block">
+                                                דווח ע"י: {f.reporters.map(u => u.display_name).join(', ')}
+                                            </span>
+                                            <span className="text-gray-500 text-xs block">
+                                                {new Date(f.first_flagged_at).toLocaleDateString('he-IL')} - {new Date(f.last_flagged_at).toLocaleDateString('he-IL')}
+                                            </span>
                                         </div>
                                     </div>
 
                                     <p className="text-white font-medium mb-2">{f.question_text}</p>
-                                    <p className="text-gray-400 text-sm mb-3">📝 סיבה: {f.reason}</p>
+                                    {f.reasons.map((reason, i) => (
+                                        <p key={i} className="text-gray-400 text-sm mb-1">📝 סיבה: {reason}</p>
+                                    ))}
 
-                                    {f.status === 'pending' && (
+                                    {f.pending_count > 0 ? (
                                         <button
-                                            onClick={() => handleResolveFlag(f.id)}
-                                            className="bg-green-600 hover:bg-green-700 text-white font-bold py-2 px-4 rounded-lg transition"
+                                            onClick={() => handleResolveFlags(f.question_id)}
+                                            className="mt-2 bg-green-600 hover:bg-green-700 text-white font-bold py-2 px-4 rounded-lg transition"
                                         >
-                                            ✅ סמן כטופל
+                                            ✅ סמן את כל הדיווחים כטופלו
                                         </button>
-                                    )}
-                                    {f.status === 'resolved' && (
+                                    ) : (
                                         <span className="text-green-400 text-sm">✓ טופל</span>
                                     )}
                                 </div>
                             ))}
+                            {flagsCursor && (
+                                <button onClick={() => fetchFlaggedQuestions(flagsCursor)} className="w-full bg-gray-700 hover:bg-gray-600 text-white px-4 py-2 rounded-lg font-bold transition">
+                                    טען שאלות מסומנות נוספות
+                                </button>
+                            )}
                         </div>
                     )}
                 </div>
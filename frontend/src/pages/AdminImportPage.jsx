@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { useAuth } from '../context/AuthContext';
@@ -10,6 +10,35 @@ export default function AdminImportPage() {
     const [uploading, setUploading] = useState(false);
     const [result, setResult] = useState(null);
     const [error, setError] = useState('');
+    const [dryRun, setDryRun] = useState(false);
+    const [job, setJob] = useState(null);
+
+    // Poll the background import job until it finishes
+    useEffect(() => {
+        if (!job || job.status === 'completed' || job.status === 'failed') return;
+
+        const timer = setTimeout(async () => {
+            try {
+                const token = localStorage.getItem('token');
+                const res = await axios.get(`http://127.0.0.1:5000/api/admin/import-jobs/${job.job_id}`, {
+                    headers: { Authorization: `Bearer ${token}` }
+                });
+                setJob(res.data);
+                if (res.data.status === 'completed') {
+                    setResult(res.data);
+                    setUploading(false);
+                } else if (res.data.status === 'failed') {
+                    setError(res.data.message || 'הייבוא נכשל');
+                    setUploading(false);
+                }
+            } catch (err) {
+                console.error(err);
+                setError(err.response?.data?.message || 'שגיאה בבדיקת סטטוס הייבוא');
+                setUploading(false);
+            }
+        }, 1000);
+        return () => clearTimeout(timer);
+    }, [job]);
 
     const handleFileChange = (e) => {
         if (e.target.files) {
@@ -27,8 +56,11 @@ export default function AdminImportPage() {
 
         const formData = new FormData();
         formData.append('file', file);
+        if (dryRun) formData.append('dry_run', 'true');
 
         setUploading(true);
+        setResult(null);
+        setError('');
         try {
             const token = localStorage.getItem('token');
             const res = await axios.post('http://127.0.0.1:5000/api/admin/import-questions', formData, {
@@ -37,11 +69,10 @@ export default function AdminImportPage() {
                     Authorization: `Bearer ${token}`
                 }
             });
-            setResult(res.data);
+            setJob(res.data);
         } catch (err) {
             console.error(err);
             setError(err.response?.data?.message || 'שגיאה בהעלאת הקובץ');
-        } finally {
             setUploading(false);
         }
     };
@@ -106,6 +137,18 @@ export default function AdminImportPage() {
                             </label>
                         </div>
 
+                        {file && (
+                            <label className="mt-4 flex items-center gap-2 text-sm text-gray-300 cursor-pointer">
+                                <input
+                                    type="checkbox"
+                                    checked={dryRun}
+                                    onChange={(e) => setDryRun(e.target.checked)}
+                                    disabled={uploading}
+                                />
+                                בדיקה בלבד (Dry Run) - אימות הקובץ ללא שמירת שאלות
+                            </label>
+                        )}
+
                         {file && (
                             <button
                                 onClick={handleUpload}
@@ -113,10 +156,21 @@ export default function AdminImportPage() {
                                 className={`mt-4 w-full py-3 rounded-xl font-bold text-lg transition ${uploading ? 'bg-gray-600 cursor-not-allowed' : 'bg-gradient-to-r from-blue-600 to-cyan-600 hover:from-blue-500 hover:to-cyan-500 shadow-lg'
                                     }`}
                             >
-                                {uploading ? 'מעלה...' : '🚀 התחל ייבוא'}
+                                {uploading ? 'מייבא...' : (dryRun ? '🔍 בדוק קובץ' : '🚀 התחל ייבוא')}
                             </button>
                         )}
 
+                        {uploading && job && (
+                            <div className="mt-4">
+                                <div className="w-full bg-gray-700 rounded-full h-3">
+                                    <div className="bg-blue-500 h-3 rounded-full transition-all" style={{ width: `${job.progress}%` }}></div>
+                                </div>
+                                <p className="text-sm text-gray-400 mt-2 text-center">
+                                    {job.status === 'queued' ? 'ממתין בתור...' : `${job.processed_rows} שורות עובדו (${job.progress}%)`}
+                                </p>
+                            </div>
+                        )}
+
                         {error && (
                             <div className="mt-4 p-3 bg-red-900/30 border border-red-500/50 rounded-lg text-red-300 text-sm text-center">
                                 {error}
@@ -129,15 +183,19 @@ export default function AdminImportPage() {
             {/* Results Log */}
             {result && (
                 <div className="animate-fade-in">
-                    <div className="grid grid-cols-2 gap-4 mb-6">
+                    <div className="grid grid-cols-3 gap-4 mb-6">
                         <div className="bg-green-900/30 border border-green-500/30 p-4 rounded-xl text-center">
-                            <span className="block text-3xl font-bold text-green-400">{result.imported_count}</span>
-                            <span className="text-sm text-gray-400">שאלות יובאו בהצלחה ✅</span>
+                            <span className="block text-3xl font-bold text-green-400">{result.dry_run ? result.valid_count : result.imported_count}</span>
+                            <span className="text-sm text-gray-400">{result.dry_run ? 'שורות תקינות (לא נשמרו) 🔍' : 'שאלות יובאו בהצלחה ✅'}</span>
                         </div>
                         <div className="bg-red-900/30 border border-red-500/30 p-4 rounded-xl text-center">
                             <span className="block text-3xl font-bold text-red-400">{result.failed_count}</span>
                             <span className="text-sm text-gray-400">שורות נכשלים ❌</span>
                         </div>
+                        <div className="bg-orange-900/30 border border-orange-500/30 p-4 rounded-xl text-center">
+                            <span className="block text-3xl font-bold text-orange-400">{result.duplicate_count}</span>
+                            <span className="text-sm text-gray-400">כפילויות שדולגו 🔁</span>
+                        </div>
                     </div>
 
                     {result.errors.length > 0 && (
@@ -151,7 +209,7 @@ export default function AdminImportPage() {
                         </div>
                     )}
                     <div className="text-center mt-6">
-                        <button onClick={() => { setFile(null); setResult(null); }} className="text-blue-400 hover:text-blue-300 underline">
+                        <button onClick={() => { setFile(null); setResult(null); setJob(null); }} className="text-blue-400 hover:text-blue-300 underline">
                             ייבא קובץ נוסף
                         </button>
                     </div>
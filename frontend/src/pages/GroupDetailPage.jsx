@@ -9,6 +9,8 @@ const GroupDetailPage = () => {
     const [members, setMembers] = useState([]);
     const [leaderboard, setLeaderboard] = useState([]);
     const [posts, setPosts] = useState([]);
+    const [postsCursor, setPostsCursor] = useState(null);
+    const [feedLatestAt, setFeedLatestAt] = useState(null);
     const [goals, setGoals] = useState([]);
     const [loading, setLoading] = useState(true);
     const [activeTab, setActiveTab] = useState('feed');
@@ -74,18 +76,37 @@ const GroupDetailPage = () => {
         }
     };
 
-    const fetchPosts = async () => {
+    const fetchPosts = async (cursor = null) => {
         try {
             const token = localStorage.getItem('token');
             const res = await axios.get(`http://127.0.0.1:5000/api/groups/${id}/posts`, {
-                headers: { Authorization: `Bearer ${token}` }
+                headers: { Authorization: `Bearer ${token}` },
+                params: cursor ? { cursor } : {}
             });
-            setPosts(res.data.posts);
+            setPosts(prev => cursor ? [...prev, ...res.data.posts] : res.data.posts);
+            setPostsCursor(res.data.next_cursor);
+            if (!cursor && res.data.latest_at) setFeedLatestAt(res.data.latest_at);
         } catch (err) {
             console.error('Error fetching posts:', err);
         }
     };
 
+    // The feed counts as read once its top page is actually on screen
+    useEffect(() => {
+        if (!feedLatestAt || activeTab !== 'feed') return;
+        const markRead = () => {
+            if (document.visibilityState !== 'visible') return;
+            const token = localStorage.getItem('token');
+            axios.post(`http://127.0.0.1:5000/api/groups/${id}/posts/read`, { until: feedLatestAt }, {
+                headers: { Authorization: `Bearer ${token}` }
+            }).catch(err => console.error('Error marking feed as read:', err));
+            document.removeEventListener('visibilitychange', markRead);
+        };
+        markRead();
+        document.addEventListener('visibilitychange', markRead);
+        return () => document.removeEventListener('visibilitychange', markRead);
+    }, [feedLatestAt, activeTab, id]);
+
     const fetchGoals = async () => {
         try {
             const token = localStorage.getItem('token');
@@ -272,6 +293,11 @@ const GroupDetailPage = () => {
                                     </div>
                                 </div>
                             ))}
+                            {postsCursor && (
+                                <button onClick={() => fetchPosts(postsCursor)} className="w-full bg-gray-700 hover:bg-gray-600 text-white px-4 py-2 rounded-lg font-bold transition">
+                                    טען הודעות קודמות
+                                </button>
+                            )}
                         </div>
                     )}
                 </div>
@@ -154,17 +154,25 @@ const GroupsPage = () => {
                                 <h3 className="text-xl font-bold text-white group-hover:text-cyan-400 transition">
                                     {group.name}
                                 </h3>
-                                {group.role === 'admin' && (
-                                    <span className="text-xs px-2 py-1 rounded-full bg-yellow-500/20 text-yellow-400 border border-yellow-500/30">
-                                        מנהל
-                                    </span>
-                                )}
+                                <div className="flex items-center gap-2">
+                                    {group.unread_posts > 0 && (
+                                        <span className="text-xs px-2 py-1 rounded-full bg-cyan-500/20 text-cyan-400 border border-cyan-500/30">
+                                            {group.unread_posts} חדשות
+                                        </span>
+                                    )}
+                                    {group.role === 'admin' && (
+                                        <span className="text-xs px-2 py-1 rounded-full bg-yellow-500/20 text-yellow-400 border border-yellow-500/30">
+                                            מנהל
+                                        </span>
+                                    )}
+                                </div>
                             </div>
                             {group.description && (
                                 <p className="text-gray-400 text-sm mb-3">{group.description}</p>
                             )}
                             <div className="flex items-center justify-between text-sm text-gray-500">
                                 <span>👥 {group.member_count} חברים</span>
+                                <span>✅ {group.weekly_correct_answers} נכונות השבוע</span>
                                 <span>הצטרפת ב-{group.joined_at}</span>
                             </div>
                         </div>
@@ -3,6 +3,17 @@ import { useParams, useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import DiscussionSection from '../components/DiscussionSection';
 
+// The server sends questions in bank order (so the browser cache can revalidate
+// with a stable ETag); each session gets its own order here
+const shuffle = (items) => {
+    const result = [...items];
+    for (let i = result.length - 1; i > 0; i--) {
+        const j = Math.floor(Math.random() * (i + 1));
+        [result[i], result[j]] = [result[j], result[i]];
+    }
+    return result;
+};
+
 const ProtocolPage = () => {
     const { id } = useParams(); // Get the number from the URL (e.g., 1)
     const navigate = useNavigate();
@@ -24,7 +35,7 @@ const ProtocolPage = () => {
                 const res = await axios.get(`http://127.0.0.1:5000/api/content/protocol/${id}`, {
                     headers: { Authorization: `Bearer ${token}` }
                 });
-                setProtocol(res.data);
+                setProtocol({ ...res.data, questions: shuffle(res.data.questions) });
             } catch (err) {
                 console.error(err);
                 alert("שגיאה בטעינת הפרוטוקול");
@@ -2,20 +2,40 @@ import { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 
+// Tab -> history type of /api/content/stats?type=
+const HISTORY_TYPES = { all: 'all', protocols: 'protocol', general: 'general' };
+
 const StatsPage = () => {
     const navigate = useNavigate();
     const [stats, setStats] = useState(null);
     const [loading, setLoading] = useState(true);
     const [activeTab, setActiveTab] = useState('all'); // 'all', 'protocols', 'general'
+    // Per tab: the history pages loaded so far and the cursor of the next one
+    const [histories, setHistories] = useState({});
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    const fetchHistory = async (tab, cursor = null) => {
+        const token = localStorage.getItem('token');
+        const params = { type: HISTORY_TYPES[tab] };
+        if (cursor) params.before = cursor;
+        const res = await axios.get('http://127.0.0.1:5000/api/content/stats', {
+            headers: { Authorization: `Bearer ${token}` },
+            params
+        });
+        setStats(res.data);
+        setHistories(prev => ({
+            ...prev,
+            [tab]: {
+                items: cursor ? [...(prev[tab]?.items || []), ...res.data.history] : res.data.history,
+                cursor: res.data.next_cursor
+            }
+        }));
+    };
 
     useEffect(() => {
         const fetchStats = async () => {
             try {
-                const token = localStorage.getItem('token');
-                const res = await axios.get('http://127.0.0.1:5000/api/content/stats', {
-                    headers: { Authorization: `Bearer ${token}` }
-                });
-                setStats(res.data);
+                await fetchHistory('all');
             } catch (err) {
                 console.error(err);
                 navigate('/');
@@ -26,32 +46,26 @@ const StatsPage = () => {
         fetchStats();
     }, [navigate]);
 
-    if (loading) return <div className="text-white text-center mt-10">טוען נתונים... 📊</div>;
-    if (!stats) return null;
+    // Load a tab's first page the first time it is opened
+    useEffect(() => {
+        if (!stats || histories[activeTab]) return;
+        fetchHistory(activeTab).catch(err => console.error(err));
+    }, [activeTab, stats, histories]);
 
-    // Get the appropriate history based on active tab
-    const getHistoryData = () => {
-        switch (activeTab) {
-            case 'protocols':
-                return stats.protocol_stats.history;
-            case 'general':
-                return stats.general_stats.history;
-            default:
-                // Combine and sort by date (newest first)
-                return [...stats.protocol_stats.history, ...stats.general_stats.history]
-                    .sort((a, b) => {
-                        // Parse dates in DD/MM/YYYY HH:MM format
-                        const parseDate = (dateStr) => {
-                            const [datePart, timePart] = dateStr.split(' ');
-                            const [day, month, year] = datePart.split('/');
-                            const [hour, minute] = timePart.split(':');
-                            return new Date(year, month - 1, day, hour, minute);
-                        };
-                        return parseDate(b.date) - parseDate(a.date);
-                    });
+    const handleLoadMore = async () => {
+        setLoadingMore(true);
+        try {
+            await fetchHistory(activeTab, histories[activeTab].cursor);
+        } catch (err) {
+            console.error(err);
+        } finally {
+            setLoadingMore(false);
         }
     };
 
+    if (loading) return <div className="text-white text-center mt-10">טוען נתונים... 📊</div>;
+    if (!stats) return null;
+
     // Get stats for the current tab
     const getCurrentStats = () => {
         switch (activeTab) {
@@ -65,7 +79,8 @@ const StatsPage = () => {
     };
 
     const currentStats = getCurrentStats();
-    const historyData = getHistoryData();
+    const historyData = histories[activeTab]?.items || [];
+    const historyCursor = histories[activeTab]?.cursor;
 
     return (
         <div className="max-w-4xl mx-auto p-6 text-white">
@@ -216,6 +231,17 @@ const StatsPage = () => {
                         )}
                     </tbody>
                 </table>
+                {historyCursor && (
+                    <div className="p-4 border-t border-gray-700">
+                        <button
+                            onClick={handleLoadMore}
+                            disabled={loadingMore}
+                            className="w-full bg-gray-700 hover:bg-gray-600 disabled:opacity-50 text-white px-4 py-2 rounded-lg font-bold transition"
+                        >
+                            {loadingMore ? 'טוען...' : 'טען עוד'}
+                        </button>
+                    </div>
+                )}
             </div>
         </div>
     );